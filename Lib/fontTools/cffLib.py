@@ -5,7 +5,9 @@ from fontTools.misc.py23 import *
 from fontTools.misc import sstruct
 from fontTools.misc import psCharStrings
 from fontTools.misc.textTools import safeEval
+import array
 import struct
+import sys
 import logging
 
 
@@ -55,7 +57,14 @@ class CFFFontSet(object):
 			raise KeyError(name)
 		return self.topDictIndex[index]
 
-	def compile(self, file, otFont):
+	def compile(self, file, otFont, subroutinize=False):
+		for topDict in self.topDictIndex:
+			if not hasattr(topDict, "charset") or topDict.charset is None:
+				charset = otFont.getGlyphOrder()
+				topDict.charset = charset
+		if subroutinize:
+			self.subroutinize()
+
 		strings = IndexedStrings()
 		writer = CFFWriter()
 		writer.add(sstruct.pack(cffHeaderFormat, self))
@@ -68,16 +77,18 @@ class CFFFontSet(object):
 		writer.add(strings.getCompiler())
 		writer.add(self.GlobalSubrs.getCompiler(strings, None))
 
-		for topDict in self.topDictIndex:
-			if not hasattr(topDict, "charset") or topDict.charset is None:
-				charset = otFont.getGlyphOrder()
-				topDict.charset = charset
-
 		for child in topCompiler.getChildren(strings):
 			writer.add(child)
 
 		writer.toFile(file)
 
+	def subroutinize(self):
+		"""Replace the subroutines of the fonts with ones made of the
+		sequences of charstring commands that recur in their glyphs, so
+		that the table compiles smaller. Return False, leaving the fonts
+		as they are, if their charstrings cannot be flattened."""
+		return Subroutinizer(self).subroutinize()
+
 	def toXML(self, xmlWriter, progress=None):
 		xmlWriter.simpletag("major", value=self.major)
 		xmlWriter.newline()
@@ -184,6 +195,38 @@ def calcOffSize(largestOffset):
 	return offSize
 
 
+# array typecodes of the INDEX offsets by offSize; 3-byte ones are padded
+offsetTypecodes = {1: "B", 2: "H", 3: "I", 4: "I"}
+
+def unpackOffsets(data, offSize):
+	"""Return an array of the big-endian offsets, of offSize bytes each, in
+	data."""
+	if offSize == 3:
+		padded = bytearray(len(data) // 3 * 4)
+		for i in range(3):
+			padded[i+1::4] = data[i::3]
+		data = bytes(padded)
+		offSize = 4
+	offsets = array.array(offsetTypecodes[offSize])
+	offsets.fromstring(data)
+	if sys.byteorder != "big":
+		offsets.byteswap()
+	return offsets
+
+
+def packOffsets(offsets, offSize):
+	"""Return the offsets as big-endian ints of offSize bytes each."""
+	offsets = array.array(offsetTypecodes[offSize], offsets)
+	if sys.byteorder != "big":
+		offsets.byteswap()
+	data = offsets.tostring()
+	if offSize == 3:
+		data = bytearray(data)
+		del data[0::4]
+		data = bytes(data)
+	return data
+
+
 class IndexCompiler(object):
 
 	def __init__(self, items, strings, parent):
@@ -230,12 +273,7 @@ class IndexCompiler(object):
 		if self.items:
 			offSize = calcOffSize(offsets[-1])
 			writeCard8(file, offSize)
-			offSize = -offSize
-			pack = struct.pack
-			for offset in offsets:
-				binOffset = pack(">l", offset)[offSize:]
-				assert len(binOffset) == -offSize
-				file.write(binOffset)
+			file.write(packOffsets(offsets, offSize))
 			for item in self.items:
 				if hasattr(item, "toFile"):
 					item.toFile(file)
@@ -283,12 +321,7 @@ class FDArrayIndexCompiler(IndexCompiler):
 		writeCard16(file, len(self.items))
 		offSize = calcOffSize(offsets[-1])
 		writeCard8(file, offSize)
-		offSize = -offSize
-		pack = struct.pack
-		for offset in offsets:
-			binOffset = pack(">l", offset)[offSize:]
-			assert len(binOffset) == -offSize
-			file.write(binOffset)
+		file.write(packOffsets(offsets, offSize))
 		for item in self.items:
 			if hasattr(item, "toFile"):
 				item.toFile(file)
@@ -337,13 +370,7 @@ class Index(object):
 		offSize = readCard8(file)
 		log.log(DEBUG, "    index count: %s offSize: %s", count, offSize)
 		assert offSize <= 4, "offSize too large: %s" % offSize
-		self.offsets = offsets = []
-		pad = b'\0' * (4 - offSize)
-		for index in range(count+1):
-			chunk = file.read(offSize)
-			chunk = pad + chunk
-			offset, = struct.unpack(">L", chunk)
-			offsets.append(int(offset))
+		self.offsets = offsets = unpackOffsets(file.read((count+1) * offSize), offSize)
 		self.offsetBase = file.tell() - 1
 		file.seek(self.offsetBase + offsets[-1])  # pretend we've read the whole lot
 		log.log(DEBUG, "    end of %s at %s", name, file.tell())
@@ -627,6 +654,466 @@ class CharStrings(object):
 			self[glyphName] = charString
 
 
+# Subroutinization
+
+maxSubrNesting = 10	# the T2 limit on the depth of nested subroutine calls
+maxSubrs = 65535	# the most items an INDEX can hold
+
+
+def _flattenProgram(program, localSubrs, globalSubrs, memo):
+	"""Return a copy of the decompiled 'program' in which the calls to
+	subroutines are replaced by the programs they call, up to the first
+	endchar, and whether it has one; or None, if a subroutine number is
+	computed rather than given as a literal. 'memo' caches the expanded
+	subroutines."""
+	localBias = psCharStrings.calcSubrBias(localSubrs)
+	globalBias = psCharStrings.calcSubrBias(globalSubrs)
+	flat = []
+	i = 0
+	end = len(program)
+	while i < end:
+		token = program[i]
+		i = i + 1
+		if token in ("hintmask", "cntrmask"):
+			flat.append(token)
+			flat.append(program[i])  # hint mask
+			i = i + 1
+		elif token in ("callsubr", "callgsubr"):
+			if not flat or type(flat[-1]) != int:
+				return None, False
+			if token == "callsubr":
+				subrs, bias = localSubrs, localBias
+			else:
+				subrs, bias = globalSubrs, globalBias
+			subr = subrs[flat.pop() + bias]
+			# global subroutines call the local ones of the glyph
+			key = id(subr), id(localSubrs)
+			if key not in memo:
+				if subr.needsDecompilation():
+					return None, False
+				memo[key] = None, False  # in case it calls itself
+				memo[key] = _flattenProgram(subr.program, localSubrs, globalSubrs, memo)
+			expansion, ended = memo[key]
+			if expansion is None:
+				return None, False
+			flat.extend(expansion)
+			if ended:
+				return flat, True
+		elif token == "return":
+			break
+		else:
+			flat.append(token)
+			if token == "endchar":
+				return flat, True
+	return flat, False
+
+
+def _splitCommands(program):
+	"""Split a flat program in tuples of operands followed by their operator
+	(and the mask of the hintmask and cntrmask operators)."""
+	commands = []
+	start = 0
+	i = 0
+	end = len(program)
+	while i < end:
+		token = program[i]
+		i = i + 1
+		if isinstance(token, basestring):
+			if token in ("hintmask", "cntrmask"):
+				i = i + 1
+			commands.append(tuple(program[start:i]))
+			start = i
+	if start < end:
+		commands.append(tuple(program[start:]))
+	return commands
+
+
+def _commandSize(command, opcodes=psCharStrings.T2CharString.opcodes):
+	size = 0
+	if command[-2:-1] in (("hintmask",), ("cntrmask",)):
+		size = len(command[-1])  # hint mask
+		command = command[:-1]
+	for token in command:
+		tp = type(token)
+		if tp == int:
+			size += len(psCharStrings.encodeIntT2(token))
+		elif tp == float:
+			size += 5
+		else:
+			size += len(opcodes[token])
+	return size
+
+
+def _suffixArray(seq):
+	"""Return the start positions of the suffixes of 'seq', a list of
+	non-negative ints, in sorted order, and the inverse permutation; by
+	prefix doubling."""
+	n = len(seq)
+	rank = list(seq)
+	suffixes = sorted(range(n), key=rank.__getitem__)
+	k = 1
+	while n:
+		keys = list(zip(rank, rank[k:] + [-1] * k))
+		suffixes.sort(key=keys.__getitem__)
+		rank = [0] * n
+		r = 0
+		previous = keys[suffixes[0]]
+		for i in suffixes:
+			key = keys[i]
+			if key != previous:
+				r += 1
+				previous = key
+			rank[i] = r
+		if r == n - 1:
+			break
+		k <<= 1
+	return suffixes, rank
+
+
+def _longestCommonPrefixes(seq, suffixes, rank):
+	"""Return the length of the common prefix of each suffix with the one
+	before it in sorted order; by Kasai's algorithm."""
+	n = len(seq)
+	lcp = [0] * n
+	h = 0
+	for i in range(n):
+		r = rank[i]
+		if r:
+			j = suffixes[r - 1]
+			while i + h < n and j + h < n and seq[i + h] == seq[j + h]:
+				h += 1
+			lcp[r] = h
+			if h:
+				h -= 1
+		else:
+			h = 0
+	return lcp
+
+
+def _repeats(suffixes, lcp):
+	"""Yield the length and the range [start, end) of the sorted suffixes
+	that start with it of each sequence that more than one suffix starts
+	with, i.e. the intervals of the longest common prefixes."""
+	stack = [(0, 0)]
+	n = len(suffixes)
+	for i in range(1, n + 1):
+		length = lcp[i] if i < n else 0
+		start = i - 1
+		while length < stack[-1][0]:
+			top, start = stack.pop()
+			yield top, start, i
+		if length > stack[-1][0]:
+			stack.append((length, start))
+
+
+class Subroutinizer(object):
+
+	"""Rewrites the charstrings of a CFFFontSet, replacing the sequences of
+	commands (operands and their operator) that recur in the glyphs with
+	calls to new subroutines, in the global and local subroutine INDEXes.
+	Subroutines start and end at command boundaries, so they leave nothing
+	on the argument stack, and are only nested as deep as T2 allows.
+	"""
+
+	subrOverhead = 3  # the return operator, and the offset in the INDEX
+	numRounds = 3  # passes of selecting the subroutines that pay off
+
+	def __init__(self, fontSet):
+		self.fontSet = fontSet
+		self.globalSubrs = fontSet.GlobalSubrs
+		self.charStrings = []
+		self.privates = []
+
+	def subroutinize(self):
+		if not self.load():
+			return False
+		self.findRepeats()
+		selected = self.select()
+		self.emit(selected)
+		return True
+
+	def load(self):
+		"""Split the flattened programs of the glyphs in commands, numbered
+		in 'self.seq', where each glyph is followed by a separator."""
+		privateIndices = {}
+		programs = []
+		memo = {}
+		for topDict in self.fontSet.topDictIndex:
+			charStrings = topDict.CharStrings
+			for name in topDict.charset or charStrings.keys():
+				charString = charStrings[name]
+				private = charString.private
+				localSubrs = getattr(private, "Subrs", [])
+				decompiler = psCharStrings.SimpleT2Decompiler(localSubrs, charString.globalSubrs)
+				decompiler.execute(charString)
+				program, _ = _flattenProgram(charString.program, localSubrs,
+						charString.globalSubrs, memo)
+				if program is None:
+					log.warning("not subroutinizing CFF charstrings: %s calls "
+							"a subroutine whose number it computes", name)
+					return False
+				if id(private) not in privateIndices:
+					privateIndices[id(private)] = len(self.privates)
+					self.privates.append(private)
+				self.charStrings.append((charString, privateIndices[id(private)]))
+				programs.append(program)
+
+		numGlyphs = len(programs)
+		commandIds = {}
+		self.commands = commands = []
+		self.sizes = sizes = []
+		self.seq = seq = []
+		self.glyphRanges = []
+		for program in programs:
+			start = len(seq)
+			for command in _splitCommands(program):
+				commandId = commandIds.get(command)
+				if commandId is None:
+					commandId = commandIds[command] = len(commands)
+					commands.append(command)
+					sizes.append(_commandSize(command))
+				seq.append(commandId)
+			self.glyphRanges.append((start, len(seq)))
+			seq.append(None)
+		# separators are unique, and sort before the commands
+		for i, (_, end) in enumerate(self.glyphRanges):
+			seq[end] = i - numGlyphs
+		self.offsets = offsets = [0]
+		for commandId in seq:
+			offsets.append(offsets[-1] + (sizes[commandId] if commandId >= 0 else 0))
+		return True
+
+	def findRepeats(self):
+		"""Collect, as candidate subroutines, the repeated sequences of
+		commands that would save bytes if they were called twice as often
+		as they appear."""
+		seq = self.seq
+		offsets = self.offsets
+		numGlyphs = len(self.glyphRanges)
+		suffixes, rank = _suffixArray([commandId + numGlyphs for commandId in seq])
+		lcp = _longestCommonPrefixes(seq, suffixes, rank)
+		del rank
+		self.lengths = lengths = []
+		self.positions = positions = []
+		for length, start, end in _repeats(suffixes, lcp):
+			position = suffixes[start]
+			size = offsets[position + length] - offsets[position]
+			count = end - start
+			if count * (size - 2) <= size + self.subrOverhead:
+				continue
+			lengths.append(length)
+			positions.append(suffixes[start:end])
+
+	def size(self, candidate):
+		position = self.positions[candidate][0]
+		return self.offsets[position + self.lengths[candidate]] - self.offsets[position]
+
+	def encode(self, start, end, starts, prices):
+		"""Return the cheapest encoding of seq[start:end] as a list of command
+		numbers and (complemented) candidates called, by dynamic programming
+		over the candidates in 'starts' at each position."""
+		seq = self.seq
+		sizes = self.sizes
+		lengths = self.lengths
+		n = end - start
+		cost = [0] * (n + 1)
+		choice = [None] * n
+		for i in range(n - 1, -1, -1):
+			best = sizes[seq[start + i]] + cost[i + 1]
+			chosen = None
+			candidates = starts.get(start + i)
+			if candidates is not None:
+				for candidate in candidates:
+					length = lengths[candidate]
+					if i + length > n:
+						continue
+					value = prices[candidate] + cost[i + length]
+					if value < best:
+						best = value
+						chosen = candidate
+			cost[i] = best
+			choice[i] = chosen
+		encoding = []
+		i = 0
+		while i < n:
+			candidate = choice[i]
+			if candidate is None:
+				encoding.append(seq[start + i])
+				i += 1
+			else:
+				encoding.append(~candidate)
+				i += lengths[candidate]
+		return encoding
+
+	def encodeAll(self, selected, prices):
+		"""Encode the glyphs, and the 'selected' candidates with the shorter
+		ones, nested no deeper than T2 allows. Return the encodings of the
+		glyphs, those of the candidates, and how many times each candidate
+		is called by the glyphs and by the candidates they call."""
+		lengths = self.lengths
+		positions = self.positions
+		starts = {}
+		for candidate in selected:
+			for position in positions[candidate]:
+				starts.setdefault(position, []).append(candidate)
+		glyphEncodings = [self.encode(start, end, starts, prices)
+				for start, end in self.glyphRanges]
+		bodies = {}
+		depths = {}
+		bodyStarts = {}  # the candidates shorter than the current one
+		callees = []
+		numCallees = 0
+		for candidate in sorted(selected, key=lengths.__getitem__):
+			length = lengths[candidate]
+			while numCallees < len(callees) and lengths[callees[numCallees]] < length:
+				callee = callees[numCallees]
+				numCallees += 1
+				for position in positions[callee]:
+					bodyStarts.setdefault(position, []).append(callee)
+			position = positions[candidate][0]
+			body = self.encode(position, position + length, bodyStarts, prices)
+			bodies[candidate] = body
+			depth = depths[candidate] = 1 + max([depths[~item] for item in body if item < 0] or [0])
+			if depth < maxSubrNesting:
+				callees.append(candidate)
+		uses = dict((candidate, 0) for candidate in selected)
+		for encoding in glyphEncodings:
+			for item in encoding:
+				if item < 0:
+					uses[~item] += 1
+		for candidate in sorted(selected, key=lengths.__getitem__, reverse=True):
+			if uses[candidate]:
+				for item in bodies[candidate]:
+					if item < 0:
+						uses[~item] += 1
+		return glyphEncodings, bodies, uses
+
+	def select(self):
+		"""Return the candidates that pay off when the glyphs are encoded
+		with them, repeatedly dropping those that do not. The price of
+		calling a candidate, which the encodings minimize, includes its
+		share of the size of the subroutine."""
+		selected = list(range(len(self.lengths)))
+		callSizes = dict((candidate, 2) for candidate in selected)
+		prices = dict((candidate, 2 + (self.size(candidate) + self.subrOverhead) /
+				len(self.positions[candidate])) for candidate in selected)
+		for _ in range(self.numRounds):
+			_, bodies, uses = self.encodeAll(selected, prices)
+			# the calls to the candidates that do not pay off get inlined
+			sizes = self.sizes
+			inlined = {}
+			bodySizes = {}
+			for candidate in sorted(selected, key=self.lengths.__getitem__):
+				size = 0
+				for item in bodies[candidate]:
+					if item >= 0:
+						size += sizes[item]
+					elif ~item in bodySizes:
+						size += callSizes[~item]
+					else:
+						size += inlined[~item]
+				count = uses[candidate]
+				if count * (size - callSizes[candidate]) > size + self.subrOverhead:
+					bodySizes[candidate] = size
+				else:
+					inlined[candidate] = size
+			selected = sorted(bodySizes, key=lambda c: (-uses[c], c))[:maxSubrs]
+			# the most used get the shortest numbers, in two INDEXes
+			bias = psCharStrings.calcSubrBias(selected[::2])
+			for i, candidate in enumerate(selected):
+				callSizes[candidate] = len(psCharStrings.encodeIntT2(i // 2 - bias)) + 1
+				prices[candidate] = callSizes[candidate] + (
+						bodySizes[candidate] + self.subrOverhead) / uses[candidate]
+		# inline the subroutines called only once
+		while True:
+			encoded = self.encodeAll(selected, prices)
+			uses = encoded[2]
+			if all(uses[candidate] > 1 for candidate in selected):
+				break
+			selected = [candidate for candidate in selected if uses[candidate] > 1]
+		self.encoded = encoded
+		return selected
+
+	def emit(self, selected):
+		"""Encode the glyphs and the subroutines with the 'selected'
+		candidates, place the subroutines in the INDEXes, and set the
+		programs of the charstrings."""
+		glyphEncodings, bodies, uses = self.encoded
+
+		# gather the private dicts of the glyphs that end up running each
+		# subroutine
+		privates = dict((candidate, set()) for candidate in selected)
+		for encoding, (_, privateIndex) in zip(glyphEncodings, self.charStrings):
+			for item in encoding:
+				if item < 0:
+					privates[~item].add(privateIndex)
+		for candidate in sorted(selected, key=self.lengths.__getitem__, reverse=True):
+			if uses[candidate]:
+				for item in bodies[candidate]:
+					if item < 0:
+						privates[~item].update(privates[candidate])
+		used = sorted(selected, key=lambda c: (-uses[c], c))
+
+		# With one private dict, subroutines alternate between the global
+		# and the local INDEX, so that twice as many get short numbers;
+		# with several, those run by the glyphs of one go in its local
+		# INDEX, and the others in the global one, which can only call
+		# global subroutines (the callers of a local subroutine share its
+		# private dict).
+		globalPool = []
+		localPools = [[] for _ in self.privates]
+		for i, candidate in enumerate(used):
+			if len(self.privates) == 1:
+				pool = localPools[0] if i % 2 == 0 else globalPool
+			elif len(privates[candidate]) == 1:
+				pool = localPools[next(iter(privates[candidate]))]
+			else:
+				pool = globalPool
+			pool.append(candidate)
+		calls = {}
+		for i, candidate in enumerate(globalPool):
+			calls[candidate] = i - psCharStrings.calcSubrBias(globalPool), "callgsubr"
+		for pool in localPools:
+			for i, candidate in enumerate(pool):
+				calls[candidate] = i - psCharStrings.calcSubrBias(pool), "callsubr"
+
+		def makeProgram(encoding):
+			program = []
+			for item in encoding:
+				if item < 0:
+					program.extend(calls[~item])
+				else:
+					program.extend(self.commands[item])
+			return program
+
+		for (charString, _), encoding in zip(self.charStrings, glyphEncodings):
+			charString.setProgram(makeProgram(encoding))
+		globalSubrs = self.globalSubrs
+		globalSubrs.items = [self.makeSubr(makeProgram(bodies[c]), c, None)
+				for c in globalPool]
+		for attr in ("file", "offsets"):
+			if hasattr(globalSubrs, attr):
+				delattr(globalSubrs, attr)
+		for private, pool in zip(self.privates, localPools):
+			if pool:
+				subrs = SubrsIndex(globalSubrs=globalSubrs, private=private)
+				subrs.items = [self.makeSubr(makeProgram(bodies[c]), c, private)
+						for c in pool]
+				private.Subrs = subrs
+			else:
+				# Subrs is read lazily from the raw dict
+				private.rawDict.pop("Subrs", None)
+				private.__dict__.pop("Subrs", None)
+
+	def makeSubr(self, program, candidate, private):
+		position = self.positions[candidate][0]
+		last = self.commands[self.seq[position + self.lengths[candidate] - 1]]
+		if last[-1] != "endchar":
+			program.append("return")
+		return psCharStrings.T2CharString(program=program, private=private,
+				globalSubrs=self.globalSubrs)
+
+
 def readCard8(file):
 	return byteord(file.read(1))
 
@@ -1558,6 +2045,10 @@ class BaseDict(object):
 		return self.compilerClass(self, strings, parent)
 
 	def __getattr__(self, name):
+		if name[:2] == name[-2:] == "__":
+			# special methods such as __setstate__, looked up by pickle.load()
+			# before rawDict is restored, are simply not implemented
+			raise AttributeError(name)
 		value = self.rawDict.get(name)
 		if value is None:
 			value = self.defaults.get(name)
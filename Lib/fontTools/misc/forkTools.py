@@ -0,0 +1,73 @@
+"""Pools of worker processes forked from the current one.
+
+Several operations can take a number of 'workers' and, if it is greater
+than 1, do their work in a pool of that many processes: TTFont.save() and
+TTFont.importXML(), varLib.build(), varLib.mutator.instantiateVariableFonts()
+and subset.SubsetterSession.subset_many(). The processes are started with
+the 'fork' process start method, so that they share the objects of the
+current process, e.g. the fonts, without these having to be pickled. Where
+'fork' is not available (e.g. on Windows), the work is done in the current
+process instead, with the same result.
+"""
+from __future__ import print_function, division, absolute_import
+from fontTools.misc.py23 import *
+import os
+
+
+__all__ = ["getForkContext", "getForkPool", "getWorkerArgs", "parseWorkers"]
+
+
+def getForkContext():
+	"""Return the multiprocessing module, or context, whose pools start
+	their worker processes with 'fork'; or None if it is not available.
+	"""
+	import multiprocessing
+	if hasattr(multiprocessing, "get_context"):
+		if "fork" not in multiprocessing.get_all_start_methods():
+			return None
+		return multiprocessing.get_context("fork")
+	elif not hasattr(os, "fork"):
+		return None
+	return multiprocessing
+
+
+# the arguments given to getForkPool(), in the worker processes of the pool
+_workerArgs = None
+
+def _initWorker(args):
+	global _workerArgs
+	_workerArgs = args
+
+def getForkPool(workers, *args):
+	"""Return a pool of 'workers' processes forked from this one, in which
+	getWorkerArgs() returns 'args'; or None if 'fork' is not available.
+
+	The arguments are inherited by the forked processes, not pickled.
+	"""
+	multiprocessing = getForkContext()
+	if multiprocessing is None:
+		return None
+	return multiprocessing.Pool(workers, initializer=_initWorker,
+		initargs=(args,))
+
+def getWorkerArgs():
+	"""Return the arguments given to getForkPool(), in one of the worker
+	processes of the pool it returned."""
+	return _workerArgs
+
+
+def parseWorkers(value):
+	"""Return the number of worker processes given by the value of a -j
+	command-line option: a number of processes, or 0 for as many as there
+	are CPUs. Raise ValueError if it isn't a number, or is negative.
+	"""
+	try:
+		workers = int(value)
+	except ValueError:
+		workers = -1
+	if workers < 0:
+		raise ValueError("-j requires a number of worker processes, or 0")
+	if workers == 0:
+		import multiprocessing
+		workers = multiprocessing.cpu_count()
+	return workers
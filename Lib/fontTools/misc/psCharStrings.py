@@ -507,14 +507,112 @@ class SimpleT2Decompiler(object):
 		self.hintCount = 0
 		self.hintMaskBytes = 0
 
+	def getHandlers(self):
+		"""Return the dict, shared by the instances of the class, that maps
+		operator names to the op_ methods handling them, or to None."""
+		cls = self.__class__
+		handlers = cls.__dict__.get("_handlers")
+		if handlers is None:
+			handlers = {}
+			setattr(cls, "_handlers", handlers)
+		return handlers
+
 	def execute(self, charString):
 		self.callingStack.append(charString)
-		needsDecompilation = charString.needsDecompilation()
-		if needsDecompilation:
-			program = []
-			pushToProgram = program.append
+		handlers = self.getHandlers()
+		pushToStack = self.operandStack.append
+		if charString.needsDecompilation():
+			if charString.operandEncoding is t2OperandEncoding:
+				program = self.executeT2Bytecode(charString, handlers)
+			else:
+				program = self.executeTokens(charString, handlers)
+			assert program, "illegal CharString: decompiled to empty program"
+			assert program[-1] in ("endchar", "return", "callsubr", "callgsubr",
+					"seac"), "illegal CharString"
+			charString.setProgram(program)
 		else:
-			pushToProgram = lambda x: None
+			program = charString.program
+			end = len(program)
+			index = 0
+			while index < end:
+				token = program[index]
+				index = index + 1
+				if isinstance(token, basestring):
+					try:
+						handler = handlers[token]
+					except KeyError:
+						handler = handlers[token] = getattr(self.__class__, "op_" + token, None)
+					if handler is not None:
+						rv = handler(self, index)
+						if rv:
+							index = rv[1]
+					else:
+						self.popall()
+				else:
+					pushToStack(token)
+		del self.callingStack[-1]
+
+	def executeT2Bytecode(self, charString, handlers,
+			unpack=struct.unpack, fixedToFloat=fixedToFloat):
+		"""Run the Type 2 bytecode of charString, decoding the operands
+		inline, and return the program it decompiles to."""
+		bytecode = charString.bytecode
+		data = bytearray(bytecode)
+		operators = charString.operators
+		pushToStack = self.operandStack.append
+		program = []
+		pushToProgram = program.append
+		end = len(data)
+		index = 0
+		while index < end:
+			b0 = data[index]
+			index = index + 1
+			if b0 >= 32:
+				if b0 <= 246:
+					token = b0 - 139
+				elif b0 <= 250:
+					token = (b0 - 247) * 256 + data[index] + 108
+					index = index + 1
+				elif b0 <= 254:
+					token = -(b0 - 251) * 256 - data[index] - 108
+					index = index + 1
+				else:
+					value, = unpack(">l", bytecode[index:index+4])
+					token = fixedToFloat(value, precisionBits=16)
+					index = index + 4
+			elif b0 == 28:
+				token = (data[index] << 8 | data[index+1])
+				if token > 0x7FFF:
+					token = token - 0x10000
+				index = index + 2
+			else:
+				if b0 == 12:
+					op = operators[(12, data[index])]
+					index = index + 1
+				else:
+					op = operators[b0]
+				pushToProgram(op)
+				try:
+					handler = handlers[op]
+				except KeyError:
+					handler = handlers[op] = getattr(self.__class__, "op_" + op, None)
+				if handler is not None:
+					rv = handler(self, index)
+					if rv:
+						hintMaskBytes, index = rv
+						pushToProgram(hintMaskBytes)
+				else:
+					self.popall()
+				continue
+			pushToProgram(token)
+			pushToStack(token)
+		return program
+
+	def executeTokens(self, charString, handlers):
+		"""Run the bytecode of charString, decoding it token by token, and
+		return the program it decompiles to."""
+		program = []
+		pushToProgram = program.append
 		pushToStack = self.operandStack.append
 		index = 0
 		while True:
@@ -523,10 +621,12 @@ class SimpleT2Decompiler(object):
 				break  # we're done!
 			pushToProgram(token)
 			if isOperator:
-				handlerName = "op_" + token
-				handler = getattr(self, handlerName, None)
+				try:
+					handler = handlers[token]
+				except KeyError:
+					handler = handlers[token] = getattr(self.__class__, "op_" + token, None)
 				if handler is not None:
-					rv = handler(index)
+					rv = handler(self, index)
 					if rv:
 						hintMaskBytes, index = rv
 						pushToProgram(hintMaskBytes)
@@ -534,12 +634,7 @@ class SimpleT2Decompiler(object):
 					self.popall()
 			else:
 				pushToStack(token)
-		if needsDecompilation:
-			assert program, "illegal CharString: decompiled to empty program"
-			assert program[-1] in ("endchar", "return", "callsubr", "callgsubr",
-					"seac"), "illegal CharString"
-			charString.setProgram(program)
-		del self.callingStack[-1]
+		return program
 
 	def pop(self):
 		value = self.operandStack[-1]
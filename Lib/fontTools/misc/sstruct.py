@@ -78,7 +78,8 @@ def pack(fmt, obj):
 def unpack(fmt, data, obj=None):
 	if obj is None:
 		obj = {}
-	data = tobytes(data)
+	if not isinstance(data, memoryview):
+		data = tobytes(data)
 	formatstring, names, fixes = getformat(fmt)
 	if isinstance(obj, dict):
 		d = obj
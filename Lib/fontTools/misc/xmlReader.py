@@ -1,6 +1,7 @@
 from __future__ import print_function, division, absolute_import
 from fontTools.misc.py23 import *
 from fontTools import ttLib
+from fontTools.misc import forkTools
 from fontTools.misc.textTools import safeEval
 from fontTools.ttLib.tables.DefaultTable import DefaultTable
 import sys
@@ -17,7 +18,8 @@ BUFSIZE = 0x4000
 
 class XMLReader(object):
 
-	def __init__(self, fileOrPath, ttFont, progress=None, quiet=None):
+	def __init__(self, fileOrPath, ttFont, progress=None, quiet=None,
+			workers=None):
 		if fileOrPath == '-':
 			fileOrPath = sys.stdin
 		if not hasattr(fileOrPath, "read"):
@@ -33,6 +35,7 @@ class XMLReader(object):
 			from fontTools.misc.loggingTools import deprecateArgument
 			deprecateArgument("quiet", "configure logging instead")
 			self.quiet = quiet
+		self.workers = workers
 		self.root = None
 		self.contentStack = []
 		self.stackSize = 0
@@ -45,7 +48,10 @@ class XMLReader(object):
 			fileSize = self.file.tell()
 			self.progress.set(0, fileSize // 100 or 1)
 			self.file.seek(0)
-		self._parseFile(self.file)
+		if self.workers is not None and self.workers > 1 and not rootless:
+			self._readInParallel()
+		else:
+			self._parseFile(self.file)
 		if self._closeStream:
 			self.close()
 		if rootless:
@@ -72,6 +78,115 @@ class XMLReader(object):
 				self.progress.set(pos // 100)
 			parser.Parse(chunk, 0)
 
+	def _readInParallel(self):
+		"""Parse the tables in a pool of forked worker processes, and add
+		them to the font in this process; the ones that depend on other
+		tables, or that can't be parsed on their own, are then parsed here.
+		Each worker parses a document made of the root element with the
+		table's element, or a part of its child elements, in it. The tables
+		are sent to the workers while the rest of the file is scanned.
+		"""
+		data = self.file.read()
+		ttFont = self.ttFont
+		if forkTools.getForkContext() is None:
+			log.debug("'fork' is not available; parsing tables serially")
+			self._parseFile(BytesIO(data))
+			return
+		if ttFont.lazy and not ttFont.mmap and ttFont.reader is not None:
+			log.debug("font file is not in memory; parsing tables serially")
+			self._parseFile(BytesIO(data))
+			return
+
+		present = set(ttFont.keys())
+		seen = set()
+		pool = None
+		jobs = []
+		serial = []
+		head = b""
+		tail = b"</ttFont>"
+		try:
+			for element in _iterTableElements(data):
+				tag = ttLib.xmlToTag(element.name)
+				tableClass = ttLib.getTableClass(tag) or DefaultTable
+				if not seen:
+					# the root element's start tag, and anything before it
+					head = data[:element.start]
+					if tag == "GlyphOrder":
+						# the glyph order is needed by the other tables
+						self._parseFile(BytesIO(head + element.getData(data) + tail))
+						seen.add(tag)
+						continue
+					self._parseFile(BytesIO(head + tail))
+				if (pool is False or tag in seen or tag == "GlyphOrder" or
+						any(master in present for master in tableClass.dependencies) or
+						(tag == "loca" and tag in ttFont)):
+					serial.append(element)
+				else:
+					if pool is None:
+						try:
+							ttFont.getGlyphOrder()
+						except Exception:
+							log.debug("can't get the glyph order; parsing tables serially")
+							pool = False
+							serial.append(element)
+							continue
+						pool = forkTools.getForkPool(self.workers, ttFont)
+					subFile = element.attrs.get("src")
+					if subFile is not None:
+						parts = [(None, self._getSubFilePath(subFile))]
+					else:
+						attrs = element.attrs
+						numParts = 1
+						if (hasattr(tableClass, "mergeXMLParts") and
+								"ERROR" not in attrs and "raw" not in attrs):
+							# don't bother splitting small tables
+							numParts = max(1, min(self.workers, len(element.children) // 64))
+						parts = [(head + fragment + tail, None)
+							for fragment in element.split(data, numParts)]
+					jobs.append((element, [pool.apply_async(_parseInWorker, (part,))
+						for part in parts]))
+				seen.add(tag)
+				present.add(tag)
+				if self.progress:
+					self.progress.set(element.start // 100)
+			if not seen:
+				self._parseFile(BytesIO(data))
+				return
+
+			for element, parts in jobs:
+				tables = [result.get() for result in parts]
+				tables = [None if t is None else ttLib._unpickleTables(ttFont, t)
+					for t in tables]
+				if any(t is None for t in tables):
+					log.debug("parsing '%s' in the main process", element.name)
+					serial.append(element)
+					continue
+				for tag, table in tables[0].items():
+					if len(tables) > 1:
+						table.mergeXMLParts([t[tag] for t in tables[1:]])
+					ttFont[tag] = table
+			if pool:
+				pool.close()
+		finally:
+			if pool:
+				pool.terminate()
+				pool.join()
+
+		serial.sort(key=lambda element: element.start)
+		for element in serial:
+			self._parseFile(BytesIO(head + element.getData(data) + tail))
+		if self.progress:
+			self.progress.set(len(data) // 100)
+
+	def _getSubFilePath(self, subFile):
+		if hasattr(self.file, 'name'):
+			# if file has a name, get its parent directory
+			dirname = os.path.dirname(self.file.name)
+		else:
+			# else fall back to using the current working directory
+			dirname = os.getcwd()
+		return os.path.join(dirname, subFile)
+
 	def _startElementHandler(self, name, attrs):
 		stackSize = self.stackSize
 		self.stackSize = stackSize + 1
@@ -87,13 +202,7 @@ class XMLReader(object):
 		elif stackSize == 1:
 			subFile = attrs.get("src")
 			if subFile is not None:
-				if hasattr(self.file, 'name'):
-					# if file has a name, get its parent directory
-					dirname = os.path.dirname(self.file.name)
-				else:
-					# else fall back to using the current working directory
-					dirname = os.getcwd()
-				subFile = os.path.join(dirname, subFile)
+				subFile = self._getSubFilePath(subFile)
 				subReader = XMLReader(subFile, self.ttFont, self.progress)
 				subReader.read()
 				self.contentStack.append([])
@@ -142,6 +251,110 @@ class XMLReader(object):
 			self.root = None
 
 
+
+class _TableElement(object):
+	"""The location in a TTX document of an element that is a child of
+	the root element: the offset of its start tag, of its child elements,
+	and of its end tag, if it has one (else 'closeStart' is None).
+	"""
+
+	def __init__(self, name, attrs, start):
+		self.name = name
+		self.attrs = attrs
+		self.start = start
+		self.children = []
+		self.closeStart = None
+		self.end = None
+
+	def getData(self, data):
+		if self.closeStart is None:
+			return data[self.start:self.end]
+		return data[self.start:self.closeStart] + self._getEndTag()
+
+	def split(self, data, numParts):
+		"""Return 'numParts' copies of the element, each with a run of
+		its child elements in it."""
+		children = self.children
+		if numParts < 2 or len(children) < 2:
+			return [self.getData(data)]
+		startTag = data[self.start:children[0]]
+		endTag = self._getEndTag()
+		bounds = [children[len(children) * i // numParts] for i in range(numParts)]
+		bounds.append(self.closeStart)
+		return [startTag + data[bounds[i]:bounds[i+1]] + endTag
+			for i in range(numParts)]
+
+	def _getEndTag(self):
+		return tobytes("</%s>" % self.name, encoding="utf_8")
+
+
+def _iterTableElements(data, chunkSize=64*BUFSIZE):
+	"""Parse the TTX document in 'data' in chunks, and yield a _TableElement
+	for each child of the root element, as soon as its end tag is found.
+	The content of the elements isn't built.
+	"""
+	from xml.parsers.expat import ParserCreate
+	parser = ParserCreate()
+	elements = []
+	done = []
+	depth = [0]
+
+	# these are called for every element, so they're kept to the minimum
+	def startElementHandler(name, attrs):
+		stackSize = depth[0]
+		depth[0] = stackSize + 1
+		if stackSize == 2:
+			elements[-1].children.append(parser.CurrentByteIndex)
+		elif stackSize == 1:
+			elements.append(_TableElement(name, attrs, parser.CurrentByteIndex))
+		elif not stackSize and name != "ttFont":
+			raise TTXParseError("illegal root tag: %s" % name)
+
+	def endElementHandler(name):
+		stackSize = depth[0] - 1
+		depth[0] = stackSize
+		if stackSize == 1:
+			element = elements.pop()
+			index = parser.CurrentByteIndex
+			if not element.children and data[index-2:index] == b"/>":
+				# empty element: the index is past its start tag
+				element.end = index
+			else:
+				element.closeStart = index
+			done.append(element)
+
+	parser.StartElementHandler = startElementHandler
+	parser.EndElementHandler = endElementHandler
+	for pos in range(0, len(data), chunkSize):
+		parser.Parse(data[pos:pos+chunkSize], 0)
+		for element in done:
+			yield element
+		del done[:]
+	parser.Parse(b"", 1)
+	for element in done:
+		yield element
+
+
+def _parseInWorker(part):
+	"""Parse a document, or a file, into the worker's copy of the font, and
+	return the tables that it adds, pickled; or None if this fails."""
+	data, path = part
+	ttFont, = forkTools.getWorkerArgs()
+	tables = dict(ttFont.tables)
+	try:
+		reader = XMLReader(BytesIO(data) if path is None else path, ttFont)
+		reader.read()
+		parsed = dict((tag, table) for tag, table in ttFont.tables.items()
+			if tables.get(tag) is not table)
+		return ttLib._pickleTables(ttFont, parsed)
+	except Exception:
+		log.debug("error while parsing in a worker process", exc_info=True)
+		return None
+	finally:
+		ttFont.tables.clear()
+		ttFont.tables.update(tables)
+
+
 class ProgressPrinter(object):
 
 	def __init__(self, title, maxval=100):
@@ -4,15 +4,29 @@ from __future__ import print_function, division, absolute_import
 from fontTools.misc.py23 import *
 import sys
 import os
+import re
 import string
 
 INDENT = "  "
 
+# when buffering, the pending output is written out every so many lines
+FLUSH_LINES = 1000
+
+try:
+	_numberTypes = (int, long, float)
+except NameError:
+	_numberTypes = (int, float)
+
 
 class XMLWriter(object):
 
 	def __init__(self, fileOrPath, indentwhite=INDENT, idlefunc=None, encoding="utf_8",
-			newlinestr=None):
+			newlinestr=None, buffered=False):
+		"""If 'buffered' is true, the output is collected and written to the
+		file in large chunks, rather than with one write() call per piece.
+		In that case, flush() must be called before reading the file, unless
+		the writer is closed.
+		"""
 		if encoding.lower().replace('-','').replace('_','') != 'utf8':
 			raise Exception('Only UTF-8 encoding is supported.')
 		if fileOrPath == '-':
@@ -33,11 +47,20 @@ class XMLWriter(object):
 			# This better not fail.
 			self.file.write(tounicode(''))
 			self.totype = tounicode
-		self.indentwhite = self.totype(indentwhite)
-		if newlinestr is None:
-			self.newlinestr = self.totype(os.linesep)
+		self.buffered = buffered
+		if buffered:
+			# collect text, and encode it all at once when flushing
+			self._chunks = []
+			self._write = self._chunks.append
+			self._convert = tounicode
 		else:
-			self.newlinestr = self.totype(newlinestr)
+			self._chunks = None
+			self._write = self.file.write
+			self._convert = self.totype
+		if newlinestr is None:
+			newlinestr = os.linesep
+		self.indentwhite = self._convert(indentwhite)
+		self.newlinestr = self._convert(newlinestr)
 		self.indentlevel = 0
 		self.stack = []
 		self.needindent = 1
@@ -46,7 +69,15 @@ class XMLWriter(object):
 		self._writeraw('<?xml version="1.0" encoding="UTF-8"?>')
 		self.newline()
 
+	def flush(self):
+		"""Writes out the buffered output, if any."""
+		chunks = self._chunks
+		if chunks:
+			self.file.write(self.totype(tounicode("").join(chunks), encoding="utf_8"))
+			del chunks[:]
+
 	def close(self):
+		self.flush()
 		self.file.close()
 
 	def write(self, string, indent=True):
@@ -71,19 +102,22 @@ class XMLWriter(object):
 	def _writeraw(self, data, indent=True, strip=False):
 		"""Writes bytes, possibly indented."""
 		if indent and self.needindent:
-			self.file.write(self.indentlevel * self.indentwhite)
+			self._write(self.indentlevel * self.indentwhite)
 			self.needindent = 0
-		s = self.totype(data, encoding="utf_8")
+		s = self._convert(data, encoding="utf_8")
 		if (strip):
 			s = s.strip()
-		self.file.write(s)
+		self._write(s)
 
 	def newline(self):
-		self.file.write(self.newlinestr)
+		self._write(self.newlinestr)
 		self.needindent = 1
 		idlecounter = self.idlecounter
-		if not idlecounter % 100 and self.idlefunc is not None:
-			self.idlefunc()
+		if not idlecounter % 100:
+			if self.idlefunc is not None:
+				self.idlefunc()
+			if self._chunks and not idlecounter % FLUSH_LINES:
+				self.flush()
 		self.idlecounter = idlecounter + 1
 
 	def comment(self, data):
@@ -144,16 +178,26 @@ class XMLWriter(object):
 			attributes = args[0]
 		else:
 			return ""
-		data = ""
+		data = []
 		for attr, value in attributes:
-			if not isinstance(value, (bytes, unicode)):
+			if isinstance(value, _numberTypes):
+				# the string form of a number never needs escaping
 				value = str(value)
-			data = data + ' %s="%s"' % (attr, escapeattr(value))
-		return data
+			else:
+				if not isinstance(value, (bytes, unicode)):
+					value = str(value)
+				value = escapeattr(value)
+			data.append(' %s="%s"' % (attr, value))
+		return "".join(data)
+
 
+_needsEscape = re.compile(r'[&<>\r]').search
+_attrNeedsEscape = re.compile(r'[&<>"\r]').search
 
 def escape(data):
 	data = tostr(data, 'utf_8')
+	if _needsEscape(data) is None:
+		return data
 	data = data.replace("&", "&amp;")
 	data = data.replace("<", "&lt;")
 	data = data.replace(">", "&gt;")
@@ -161,6 +205,10 @@ def escape(data):
 	return data
 
 def escapeattr(data):
+	data = tostr(data, 'utf_8')
+	if _attrNeedsEscape(data) is None:
+		# most values, e.g. glyph names, are already safe
+		return data
 	data = escape(data)
 	data = data.replace('"', "&quot;")
 	return data
@@ -5,6 +5,7 @@
 from __future__ import print_function, division, absolute_import
 from fontTools.misc.py23 import *
 from fontTools import ttLib
+from fontTools.misc import forkTools
 from fontTools.ttLib.tables import otTables
 from fontTools.misc import psCharStrings
 from fontTools.pens.basePen import NullPen
@@ -13,6 +14,7 @@ import sys
 import struct
 import array
 import logging
+from itertools import repeat
 from types import MethodType
 
 __usage__ = "pyftsubset font-file [glyph...] [--option=value]..."
@@ -191,6 +193,13 @@ Optimization options:
       Also see note under --no-hinting.
   --no-desubroutinize [default]
       Leave CFF subroutinizes as is, only throw away unused subroutinizes.
+  --subroutinize
+      Replace the CFF subroutines with new ones, made of the sequences of
+      charstring operations that recur in the glyphs kept.  This makes the
+      CFF table smaller than keeping the original subroutines used, or
+      desubroutinizing, at the cost of a slower subsetting.
+  --no-subroutinize [default]
+      Do not make new CFF subroutines.
 
 Font table options:
   --drop-tables[+|-]=<table>[,<table>...]
@@ -379,21 +388,193 @@ def _dict_subset(d, glyphs):
     return {g:d[g] for g in glyphs}
 
 
+class _GlyphIdMap(object):
+    """Maps the glyph names of a font to glyph IDs, to represent sets of
+    glyphs as bitmasks of their glyph IDs (Python ints), so that they can be
+    intersected a machine word at a time. The bitmasks of the Coverage and
+    ClassDef tables that glyph sets are intersected with, and the closure
+    dependencies of the GSUB lookups, are remembered; the tables and lookups
+    are identified by id, so their font must be kept alive as long as the
+    map is used."""
+
+    maxsize = 100000
+    min_intersections = 4
+    min_glyphs = 32
+
+    def __init__(self, glyphOrder):
+        self.glyphOrder = list(glyphOrder)
+        self.reverse = {g:i for i,g in enumerate(self.glyphOrder)}
+        self._tables = {}
+        self._last = None
+        # for LookupList.closure_dependencies
+        self.dependencies = {}
+
+    def mask(self, glyphs):
+        """Returns the bitmask of the IDs of 'glyphs', and the set of those
+        that have no ID."""
+        last = self._last
+        if (last is not None and isinstance(glyphs, (set, frozenset)) and
+                len(last) <= len(glyphs) and last.issubset(glyphs)):
+            # Typically, the glyphs of the closure so far, and a few more
+            mask, unmapped = self._mask(glyphs.difference(last))
+            return last.mask | mask, last.unmapped | unmapped
+        return self._mask(glyphs)
+
+    def _mask(self, glyphs):
+        gids = list(map(self.reverse.get, glyphs))
+        unmapped = set()
+        if None in gids:
+            unmapped = set(g for g in glyphs if g not in self.reverse)
+            gids = [gid for gid in gids if gid is not None]
+        if not gids:
+            return 0, unmapped
+        bits = bytearray(b'0') * (max(gids) + 1)
+        for _ in map(bits.__setitem__, gids, repeat(ord('1'), len(gids))):
+            pass
+        return int(bytes(bits[::-1]), 2), unmapped
+
+    def ids(self, mask):
+        """Returns the ascending list of the glyph IDs in 'mask'."""
+        bits = bin(mask)[:1:-1]
+        ids = []
+        i = bits.find('1')
+        while i >= 0:
+            ids.append(i)
+            i = bits.find('1', i + 1)
+        return ids
+
+    def names(self, mask):
+        """Returns the list of the names of the glyphs in 'mask'."""
+        return list(map(self.glyphOrder.__getitem__, self.ids(mask)))
+
+    def freeze(self, glyphs):
+        """Returns a _GlyphSet of 'glyphs'; the same one as last time if
+        they have not changed."""
+        last = self._last
+        if (last is None or len(last) != len(glyphs) or
+                not last.issuperset(glyphs)):
+            last = _GlyphSet(glyphs, self)
+            last.mask
+            self._last = last
+        return last
+
+    def _entry(self, table, glyphs):
+        # Small tables are intersected faster by looking up their glyphs.
+        if len(glyphs) < self.min_glyphs:
+            return None
+        entry = self._tables.get(id(table))
+        if entry is None or entry[0] is not glyphs or entry[1] != len(glyphs):
+            if len(self._tables) >= self.maxsize:
+                self._tables.clear()
+            entry = self._tables[id(table)] = [glyphs, len(glyphs), 0, None]
+        entry[2] += 1
+        # Building the bitmask of a table takes longer than intersecting
+        # the glyph names once, so only do it for tables intersected again.
+        return entry if entry[2] >= self.min_intersections else None
+
+    def coverage(self, coverage):
+        """Returns the bitmask of the glyphs of 'coverage', and a dict from
+        their IDs to their coverage indices; or None if some glyph has no
+        ID, or is covered twice, or the coverage is small or was rarely
+        intersected."""
+        glyphs = coverage.glyphs
+        entry = self._entry(coverage, glyphs)
+        if entry is None:
+            return None
+        if entry[3] is None:
+            mask, unmapped = self.mask(glyphs)
+            if unmapped or bin(mask).count('1') != len(glyphs):
+                entry[3] = False
+            else:
+                entry[3] = (mask, dict(zip(map(self.reverse.__getitem__, glyphs),
+                                           range(len(glyphs)))))
+        return entry[3] or None
+
+    def classDef(self, classDef):
+        """Returns the bitmask of the glyphs of 'classDef', and a dict from
+        their classes to the bitmasks of their glyphs; or None if some glyph
+        has no ID, or the ClassDef is small or was rarely intersected."""
+        classDefs = classDef.classDefs
+        entry = self._entry(classDef, classDefs)
+        if entry is None:
+            return None
+        if entry[3] is None:
+            mask, unmapped = self.mask(classDefs)
+            if unmapped:
+                entry[3] = False
+            else:
+                byClass = {}
+                for g,v in classDefs.items():
+                    byClass.setdefault(v, []).append(g)
+                entry[3] = (mask, {v:self._mask(glyphs)[0]
+                                   for v,glyphs in byClass.items()})
+        return entry[3] or None
+
+
+class _GlyphSet(frozenset):
+    """A frozenset of glyph names that also has the bitmask of their IDs in
+    a _GlyphIdMap, used by the Coverage and ClassDef methods to intersect
+    the set quickly. Glyph names without an ID are kept in 'unmapped'."""
+
+    def __new__(cls, glyphs, glyph_ids):
+        self = frozenset.__new__(cls, glyphs)
+        self.glyph_ids = glyph_ids
+        self._mask = None
+        return self
+
+    def __reduce__(self):
+        return (frozenset, (list(self),))
+
+    @property
+    def mask(self):
+        if self._mask is None:
+            self._mask, self._unmapped = self.glyph_ids.mask(self)
+        return self._mask
+
+    @property
+    def unmapped(self):
+        self.mask
+        return self._unmapped
+
+def _frozen_glyphs(s):
+    """Returns the current glyphs of the subsetter 's' as a frozenset; a
+    _GlyphSet if it has a _GlyphIdMap."""
+    glyph_ids = getattr(s, '_glyph_ids', None)
+    if glyph_ids is None:
+        return frozenset(s.glyphs)
+    return glyph_ids.freeze(s.glyphs)
+
+
 @_add_method(otTables.Coverage)
 def intersect(self, glyphs):
     """Returns ascending list of matching coverage values."""
+    if isinstance(glyphs, _GlyphSet):
+        coverage = glyphs.glyph_ids.coverage(self)
+        if coverage is not None:
+            mask, indices = coverage
+            common = mask & glyphs.mask
+            if common == mask:
+                return list(range(len(self.glyphs)))
+            return sorted(map(indices.__getitem__, glyphs.glyph_ids.ids(common)))
     return [i for i,g in enumerate(self.glyphs) if g in glyphs]
 
 @_add_method(otTables.Coverage)
 def intersect_glyphs(self, glyphs):
     """Returns set of intersecting glyphs."""
+    if isinstance(glyphs, _GlyphSet):
+        coverage = glyphs.glyph_ids.coverage(self)
+        if coverage is not None:
+            common = coverage[0] & glyphs.mask
+            if common == coverage[0]:
+                return set(self.glyphs)
+            return set(glyphs.glyph_ids.names(common))
     return set(g for g in self.glyphs if g in glyphs)
 
 @_add_method(otTables.Coverage)
 def subset(self, glyphs):
     """Returns ascending list of remaining coverage values."""
     indices = self.intersect(glyphs)
-    self.glyphs = [g for g in self.glyphs if g in glyphs]
+    self.glyphs = [self.glyphs[i] for i in indices]
     return indices
 
 @_add_method(otTables.Coverage)
@@ -404,6 +585,13 @@ def remap(self, coverage_map):
 @_add_method(otTables.ClassDef)
 def intersect(self, glyphs):
     """Returns ascending list of matching class values."""
+    if isinstance(glyphs, _GlyphSet):
+        classDef = glyphs.glyph_ids.classDef(self)
+        if classDef is not None:
+            mask, classes = classDef
+            return _uniq_sort(
+                ([0] if glyphs.mask & ~mask or glyphs.unmapped else []) +
+                    [v for v,m in classes.items() if m & glyphs.mask])
     return _uniq_sort(
          ([0] if any(g not in self.classDefs for g in glyphs) else []) +
             [v for g,v in self.classDefs.items() if g in glyphs])
@@ -411,6 +599,14 @@ def intersect(self, glyphs):
 @_add_method(otTables.ClassDef)
 def intersect_class(self, glyphs, klass):
     """Returns set of glyphs matching class."""
+    if isinstance(glyphs, _GlyphSet):
+        classDef = glyphs.glyph_ids.classDef(self)
+        if classDef is not None:
+            mask, classes = classDef
+            if klass == 0:
+                return set(glyphs.glyph_ids.names(glyphs.mask & ~mask)).union(
+                    glyphs.unmapped)
+            return set(glyphs.glyph_ids.names(classes.get(klass, 0) & glyphs.mask))
     if klass == 0:
         return set(g for g in glyphs if g not in self.classDefs)
     return set(g for g,v in self.classDefs.items()
@@ -419,11 +615,21 @@ def intersect_class(self, glyphs, klass):
 @_add_method(otTables.ClassDef)
 def subset(self, glyphs, remap=False):
     """Returns ascending list of remaining classes."""
-    self.classDefs = {g:v for g,v in self.classDefs.items() if g in glyphs}
+    classDef = None
+    if isinstance(glyphs, _GlyphSet):
+        classDef = glyphs.glyph_ids.classDef(self)
+    if classDef is not None:
+        mask = classDef[0] & glyphs.mask
+        self.classDefs = {g:self.classDefs[g]
+                          for g in glyphs.glyph_ids.names(mask)}
+        hasClass0 = bool(glyphs.mask & ~mask or glyphs.unmapped)
+    else:
+        self.classDefs = {g:v for g,v in self.classDefs.items() if g in glyphs}
+        hasClass0 = any(g not in self.classDefs for g in glyphs)
     # Note: while class 0 has the special meaning of "not matched",
     # if no glyph will ever /not match/, we can optimize class 0 out too.
     indices = _uniq_sort(
-         ([0] if any(g not in self.classDefs for g in glyphs) else []) +
+         ([0] if hasClass0 else []) +
             list(self.classDefs.values()))
     if remap:
         self.remap(indices)
@@ -492,7 +698,7 @@ def closure_glyphs(self, s, cur_glyphs):
     if self.Format == 1:
         indices = self.Coverage.intersect(cur_glyphs)
         if(not indices or
-           not all(c.intersect(s.glyphs)
+           not all(c.intersect(_frozen_glyphs(s))
                    for c in self.LookAheadCoverage + self.BacktrackCoverage)):
             return
         s.glyphs.update(self.Substitute[i] for i in indices)
@@ -765,6 +971,11 @@ def may_have_non_1to1(self):
              otTables.ChainContextPos)
 def __subset_classify_context(self):
 
+    helpers = self.__class__.__dict__.get("__ContextHelpers")
+    if helpers is not None and self.Format in helpers:
+        # Don't rebuild the helper class below on every call
+        return helpers[self.Format]
+
     class ContextHelper(object):
         def __init__(self, klass, Format):
             if klass.__name__.endswith('Subst'):
@@ -906,7 +1117,8 @@ def closure_glyphs(self, s, cur_glyphs):
             if i >= rssCount or not rss[i]: continue
             for r in getattr(rss[i], c.Rule):
                 if not r: continue
-                if not all(all(c.Intersect(s.glyphs, cd, k) for k in klist)
+                glyphs = _frozen_glyphs(s)
+                if not all(all(c.Intersect(glyphs, cd, k) for k in klist)
                            for cd,klist in zip(ContextData, c.RuleData(r))):
                     continue
                 chaos = set()
@@ -936,7 +1148,8 @@ def closure_glyphs(self, s, cur_glyphs):
             if i >= rssCount or not rss[i]: continue
             for r in getattr(rss[i], c.Rule):
                 if not r: continue
-                if not all(all(c.Intersect(s.glyphs, cd, k) for k in klist)
+                glyphs = _frozen_glyphs(s)
+                if not all(all(c.Intersect(glyphs, cd, k) for k in klist)
                            for cd,klist in zip(ContextData, c.RuleData(r))):
                     continue
                 chaos = set()
@@ -950,14 +1163,15 @@ def closure_glyphs(self, s, cur_glyphs):
                         if seqi == 0:
                             pos_glyphs = frozenset(ClassDef.intersect_class(cur_glyphs, i))
                         else:
-                            pos_glyphs = frozenset(ClassDef.intersect_class(s.glyphs, getattr(r, c.Input)[seqi - 1]))
+                            pos_glyphs = frozenset(ClassDef.intersect_class(_frozen_glyphs(s), getattr(r, c.Input)[seqi - 1]))
                     lookup = s.table.LookupList.Lookup[ll.LookupListIndex]
                     chaos.add(seqi)
                     if lookup.may_have_non_1to1():
                         chaos.update(range(seqi, len(getattr(r, c.Input))+2))
                     lookup.closure_glyphs(s, cur_glyphs=pos_glyphs)
     elif self.Format == 3:
-        if not all(x.intersect(s.glyphs) for x in c.RuleData(self)):
+        glyphs = _frozen_glyphs(s)
+        if not all(x.intersect(glyphs) for x in c.RuleData(self)):
             return []
         r = self
         chaos = set()
@@ -971,7 +1185,7 @@ def closure_glyphs(self, s, cur_glyphs):
                 if seqi == 0:
                     pos_glyphs = frozenset(cur_glyphs)
                 else:
-                    pos_glyphs = frozenset(r.InputCoverage[seqi].intersect_glyphs(s.glyphs))
+                    pos_glyphs = frozenset(r.InputCoverage[seqi].intersect_glyphs(_frozen_glyphs(s)))
             lookup = s.table.LookupList.Lookup[ll.LookupListIndex]
             chaos.add(seqi)
             if lookup.may_have_non_1to1():
@@ -1115,6 +1329,83 @@ def may_have_non_1to1(self):
     else:
         assert 0, "unknown format: %s" % self.Format
 
+@_add_method(otTables.SingleSubst,
+             otTables.MultipleSubst)
+def closure_inputs(self):
+    return set(self.mapping), set()
+
+@_add_method(otTables.AlternateSubst)
+def closure_inputs(self):
+    return set(self.alternates), set()
+
+@_add_method(otTables.LigatureSubst)
+def closure_inputs(self):
+    return set(self.ligatures), {c for seqs in self.ligatures.values()
+                                 for seq in seqs for c in seq.Component}
+
+@_add_method(otTables.ReverseChainSingleSubst)
+def closure_inputs(self):
+    if self.Format == 1:
+        return set(self.Coverage.glyphs), {g
+            for c in self.LookAheadCoverage + self.BacktrackCoverage
+            for g in c.glyphs}
+    else:
+        assert 0, "unknown format: %s" % self.Format
+
+@_add_method(otTables.ContextSubst,
+             otTables.ChainContextSubst)
+def closure_inputs(self):
+    return None
+
+@_add_method(otTables.ExtensionSubst)
+def closure_inputs(self):
+    if self.Format == 1:
+        return self.ExtSubTable.closure_inputs()
+    else:
+        assert 0, "unknown format: %s" % self.Format
+
+@_add_method(otTables.SingleSubst,
+             otTables.MultipleSubst,
+             otTables.AlternateSubst,
+             otTables.LigatureSubst,
+             otTables.ReverseChainSingleSubst)
+def closure_dependencies(self):
+    input_glyphs, context_glyphs = self.closure_inputs()
+    return input_glyphs | context_glyphs, []
+
+@_add_method(otTables.ContextSubst,
+             otTables.ChainContextSubst)
+def closure_dependencies(self):
+    c = self.__subset_classify_context()
+
+    glyphs = set(c.Coverage(self).glyphs)
+    classdefs = []
+    if self.Format == 1:
+        for rs in getattr(self, c.RuleSet):
+            if not rs: continue
+            for r in getattr(rs, c.Rule):
+                if not r: continue
+                for klist in c.RuleData(r):
+                    glyphs.update(klist)
+    elif self.Format == 2:
+        for cd in c.ContextData(self):
+            if not cd: continue
+            glyphs.update(cd.classDefs)
+            classdefs.append(cd)
+    elif self.Format == 3:
+        for cov in c.RuleData(self):
+            glyphs.update(cov.glyphs)
+    else:
+        assert 0, "unknown format: %s" % self.Format
+    return glyphs, classdefs
+
+@_add_method(otTables.ExtensionSubst)
+def closure_dependencies(self):
+    if self.Format == 1:
+        return self.ExtSubTable.closure_dependencies()
+    else:
+        assert 0, "unknown format: %s" % self.Format
+
 @_add_method(otTables.ExtensionSubst,
              otTables.ExtensionPos)
 def subset_glyphs(self, s):
@@ -1150,7 +1441,7 @@ def collect_lookups(self):
 @_add_method(otTables.Lookup)
 def closure_glyphs(self, s, cur_glyphs=None):
     if cur_glyphs is None:
-        cur_glyphs = frozenset(s.glyphs)
+        cur_glyphs = _frozen_glyphs(s)
 
     # Memoize
     if (id(self), cur_glyphs) in s._doneLookups:
@@ -1160,12 +1451,65 @@ def closure_glyphs(self, s, cur_glyphs=None):
     if self in s._activeLookups:
         raise Exception("Circular loop in lookup recursion")
     s._activeLookups.append(self)
-    for st in self.SubTable:
-        if not st: continue
-        st.closure_glyphs(s, cur_glyphs)
+    cache = getattr(s, '_lookup_closures', None)
+    inputs = cache.get_inputs(self) if cache is not None else None
+    if inputs is None:
+        for st in self.SubTable:
+            if not st: continue
+            st.closure_glyphs(s, cur_glyphs)
+    else:
+        # The glyphs that a non-contextual lookup adds only depend on the
+        # current glyphs it applies to, and on whether its context glyphs
+        # (e.g. ligature components) are in the subset.
+        input_glyphs, context_glyphs = inputs
+        key = (id(self),
+               cur_glyphs.intersection(input_glyphs),
+               frozenset(s.glyphs.intersection(context_glyphs)))
+        added = cache.get(key)
+        if added is None:
+            glyphs = s.glyphs
+            s.glyphs = set(key[2])
+            for st in self.SubTable:
+                if not st: continue
+                st.closure_glyphs(s, key[1])
+            added = frozenset(s.glyphs)
+            s.glyphs = glyphs
+            cache.put(key, added)
+        s.glyphs.update(added)
     assert(s._activeLookups[-1] == self)
     del s._activeLookups[-1]
 
+@_add_method(otTables.Lookup)
+def closure_inputs(self):
+    """Return the glyphs whose presence in the current glyphs, and in the
+    subset, determine which glyphs the closure of this lookup adds; or None
+    if the lookup is contextual."""
+    input_glyphs = set()
+    context_glyphs = set()
+    for st in self.SubTable:
+        if not st: continue
+        inputs = st.closure_inputs()
+        if inputs is None:
+            return None
+        input_glyphs.update(inputs[0])
+        context_glyphs.update(inputs[1])
+    return input_glyphs, context_glyphs
+
+@_add_method(otTables.Lookup)
+def closure_dependencies(self):
+    """Return the glyphs that the closure of this lookup may look at, and
+    the ClassDefs of its contextual subtables, whose class 0 matches any
+    glyph not in them. Lookups called by the contextual subtables are not
+    included."""
+    glyphs = set()
+    classdefs = []
+    for st in self.SubTable:
+        if not st: continue
+        deps = st.closure_dependencies()
+        glyphs.update(deps[0])
+        classdefs.extend(deps[1])
+    return glyphs, classdefs
+
 @_add_method(otTables.Lookup)
 def subset_glyphs(self, s):
     self.SubTable = [st for st in self.SubTable if st and st.subset_glyphs(s)]
@@ -1237,6 +1581,28 @@ def closure_lookups(self, lookup_indices):
         lookup_indices.extend(recurse_lookups)
         recurse = recurse_lookups
 
+@_add_method(otTables.LookupList)
+def closure_dependencies(self, lookup_index, glyph_ids):
+    """Returns the glyphs that the closure of a lookup, and of the lookups
+    it calls, may look at, as a bitmask of 'glyph_ids' and a set of the
+    glyphs that have no ID; and the ClassDefs whose class 0 they may match.
+    'glyph_ids' remembers the same for each lookup, by id."""
+    memo = glyph_ids.dependencies
+    mask = 0
+    unmapped = set()
+    classdefs = []
+    for i in self.closure_lookups([lookup_index]):
+        if i >= self.LookupCount or not self.Lookup[i]: continue
+        lookup = self.Lookup[i]
+        deps = memo.get(id(lookup))
+        if deps is None:
+            glyphs, cds = lookup.closure_dependencies()
+            deps = memo[id(lookup)] = glyph_ids.mask(glyphs) + (cds,)
+        mask |= deps[0]
+        unmapped.update(deps[1])
+        classdefs.extend(deps[2])
+    return mask, unmapped, classdefs
+
 @_add_method(otTables.Feature)
 def subset_lookups(self, lookup_indices):
     self.LookupListIndex = [l for l in self.LookupListIndex
@@ -1358,17 +1724,47 @@ def closure_glyphs(self, s):
     else:
         lookup_indices = []
     if self.table.LookupList:
-        while True:
+        lookups = self.table.LookupList.Lookup
+        lookup_indices = [i for i in lookup_indices
+                          if i < self.table.LookupList.LookupCount and lookups[i]]
+        # Without glyph IDs, every glyph is "unmapped", and kept in sets.
+        glyph_ids = getattr(s, '_glyph_ids', None) or _GlyphIdMap([])
+        dependencies = None
+        pending = lookup_indices
+        while pending:
             orig_glyphs = frozenset(s.glyphs)
             s._activeLookups = []
             s._doneLookups = set()
-            for i in lookup_indices:
-                if i >= self.table.LookupList.LookupCount: continue
-                if not self.table.LookupList.Lookup[i]: continue
-                self.table.LookupList.Lookup[i].closure_glyphs(s)
+            for i in pending:
+                lookups[i].closure_glyphs(s)
             del s._activeLookups, s._doneLookups
-            if orig_glyphs == s.glyphs:
+            new_glyphs = s.glyphs.difference(orig_glyphs)
+            if not new_glyphs:
                 break
+            # Only revisit the lookups whose closure depends on some of the
+            # glyphs just added, instead of all of them.
+            if dependencies is None:
+                dependencies = {}
+                for i in lookup_indices:
+                    mask, unmapped, classdefs = self.table.LookupList.closure_dependencies(i, glyph_ids)
+                    # Class 0 matches the glyphs not in the ClassDef: until
+                    # one of them is added, any new glyph may be matched.
+                    classdefs = [cd for cd in classdefs
+                                 if all(g in cd.classDefs for g in orig_glyphs)]
+                    dependencies[i] = (mask, unmapped, classdefs)
+            new_mask, new_unmapped = glyph_ids.mask(new_glyphs)
+            pending = []
+            for i in lookup_indices:
+                mask, unmapped, classdefs = dependencies[i]
+                if classdefs:
+                    remaining = [cd for cd in classdefs
+                                 if all(g in cd.classDefs for g in new_glyphs)]
+                    if len(remaining) != len(classdefs):
+                        dependencies[i] = (mask, unmapped, remaining)
+                        pending.append(i)
+                        continue
+                if mask & new_mask or not unmapped.isdisjoint(new_unmapped):
+                    pending.append(i)
     del s.table
 
 @_add_method(ttLib.getTableClass('GSUB'),
@@ -1918,6 +2314,85 @@ def subset_subroutines(self, subrs, gsubrs):
         elif p[i] == 'callgsubr':
             assert isinstance(p[i-1], int)
             p[i-1] = gsubrs._used.index(p[i-1] + gsubrs._old_bias) - gsubrs._new_bias
+    self.__dict__.pop('_subr_calls', None)
+
+@_add_method(psCharStrings.T2CharString)
+def subr_calls(self):
+    """Returns the (unbiased) indices of the local and of the global
+    subroutines that the decompiled charstring calls, as two tuples: its
+    edges in the subroutine call graph of the font. They are remembered
+    until the program is changed by the subsetter."""
+    calls = self.__dict__.get('_subr_calls')
+    if calls is None:
+        p = self.program
+        local = []
+        glob = []
+        for i,token in enumerate(p):
+            if token == 'callsubr':
+                assert isinstance(p[i-1], int)
+                local.append(p[i-1])
+            elif token == 'callgsubr':
+                assert isinstance(p[i-1], int)
+                glob.append(p[i-1])
+        calls = self._subr_calls = (tuple(local), tuple(glob))
+    return calls
+
+def _mark_used_subrs(charString, localSubrs, globalSubrs, visited):
+    """Adds the indices of the subroutines that 'charString' calls, directly
+    or not, to the _used sets of 'localSubrs' and 'globalSubrs', walking
+    the subroutine call graph. 'visited' holds the subroutines walked
+    already, as (id(localSubrs), index) pairs for the local ones, and
+    (id(localSubrs), ~index) for the global ones, whose calls to local
+    subroutines depend on the local subroutines of the glyph."""
+    for subrs in [localSubrs, globalSubrs]:
+        if subrs and not hasattr(subrs, "_used"):
+            subrs._used = set()
+    localBias = psCharStrings.calcSubrBias(localSubrs)
+    globalBias = psCharStrings.calcSubrBias(globalSubrs)
+    localKey = id(localSubrs)
+    stack = [charString]
+    while stack:
+        c = stack.pop()
+        if c.needsDecompilation():
+            # Running the glyph decompiles it, and the subroutines it calls,
+            # which need the hints of their caller
+            psCharStrings.SimpleT2Decompiler(localSubrs, globalSubrs).execute(charString)
+        local, glob = c.subr_calls()
+        for i in local:
+            i += localBias
+            if (localKey, i) not in visited:
+                visited.add((localKey, i))
+                localSubrs._used.add(i)
+                stack.append(localSubrs[i])
+        for i in glob:
+            i += globalBias
+            if (localKey, ~i) not in visited:
+                visited.add((localKey, ~i))
+                globalSubrs._used.add(i)
+                stack.append(globalSubrs[i])
+
+@_add_method(ttLib.getTableClass('CFF '))
+def build_subr_call_graph(self):
+    """Decompiles all the charstrings of the font, and remembers the
+    subroutines that each one calls, so that the subroutines used by any
+    set of glyphs are found without running the charstrings again."""
+    for fontname in self.cff.keys():
+        font = self.cff[fontname]
+        cs = font.CharStrings
+        visited = set()
+        for g in font.charset:
+            c, _ = cs.getItemAndSelector(g)
+            subrs = getattr(c.private, "Subrs", [])
+            _mark_used_subrs(c, subrs, font.GlobalSubrs, visited)
+
+        all_subrs = [font.GlobalSubrs]
+        if hasattr(font, 'FDSelect'):
+            all_subrs.extend(fd.Private.Subrs for fd in font.FDArray if hasattr(fd.Private, 'Subrs'))
+        elif hasattr(font.Private, 'Subrs'):
+            all_subrs.append(font.Private.Subrs)
+        for subrs in all_subrs:
+            if hasattr(subrs, '_used'):
+                del subrs._used
 
 @_add_method(psCharStrings.T2CharString)
 def drop_hints(self):
@@ -1949,24 +2424,7 @@ def drop_hints(self):
     assert len(self.program)
 
     del self._hints
-
-class _MarkingT2Decompiler(psCharStrings.SimpleT2Decompiler):
-
-    def __init__(self, localSubrs, globalSubrs):
-        psCharStrings.SimpleT2Decompiler.__init__(self,
-                                                  localSubrs,
-                                                  globalSubrs)
-        for subrs in [localSubrs, globalSubrs]:
-            if subrs and not hasattr(subrs, "_used"):
-                subrs._used = set()
-
-    def op_callsubr(self, index):
-        self.localSubrs._used.add(self.operandStack[-1]+self.localBias)
-        psCharStrings.SimpleT2Decompiler.op_callsubr(self, index)
-
-    def op_callgsubr(self, index):
-        self.globalSubrs._used.add(self.operandStack[-1]+self.globalBias)
-        psCharStrings.SimpleT2Decompiler.op_callgsubr(self, index)
+    self.__dict__.pop('_subr_calls', None)
 
 class _DehintingT2Decompiler(psCharStrings.T2WidthExtractor):
 
@@ -2183,6 +2641,7 @@ def prune_post_subset(self, options):
                 decompiler = _DesubroutinizingT2Decompiler(subrs, c.globalSubrs)
                 decompiler.execute(c)
                 c.program = c._desubroutinized
+                c.__dict__.pop('_subr_calls', None)
 
         # Drop hints if not needed
         if not options.hinting:
@@ -2233,11 +2692,11 @@ def prune_post_subset(self, options):
         # Renumber subroutines to remove unused ones
 
         # Mark all used subroutines
+        visited = set()
         for g in font.charset:
             c, _ = cs.getItemAndSelector(g)
             subrs = getattr(c.private, "Subrs", [])
-            decompiler = _MarkingT2Decompiler(subrs, c.globalSubrs)
-            decompiler.execute(c)
+            _mark_used_subrs(c, subrs, c.globalSubrs, visited)
 
         all_subrs = [font.GlobalSubrs]
         if hasattr(font, 'FDSelect'):
@@ -2284,6 +2743,9 @@ def prune_post_subset(self, options):
         for subrs in all_subrs:
             del subrs._used, subrs._old_bias, subrs._new_bias
 
+    if options.subroutinize:
+        cff.subroutinize()
+
     return True
 
 @_add_method(ttLib.getTableClass('cmap'))
@@ -2482,6 +2944,7 @@ class Options(object):
         self.flavor = None  # May be 'woff' or 'woff2'
         self.with_zopfli = False  # use zopfli instead of zlib for WOFF 1.0
         self.desubroutinize = False # Desubroutinize CFF CharStrings
+        self.subroutinize = False # Subroutinize CFF CharStrings anew
         self.verbose = False
         self.timing = False
         self.xml = False
@@ -2620,10 +3083,13 @@ class Subsetter(object):
                 else:
                     log.info("%s pruned", tag)
 
-    def _closure_glyphs(self, font):
+    def _closure_glyphs(self, font, glyph_ids=None):
 
         realGlyphs = set(font.getGlyphOrder())
         glyph_order = font.getGlyphOrder()
+        if glyph_ids is None:
+            glyph_ids = _GlyphIdMap(glyph_order)
+        self._glyph_ids = glyph_ids
 
         self.glyphs_requested = set()
         self.glyphs_requested.update(self.glyph_names_requested)
@@ -2678,7 +3144,7 @@ class Subsetter(object):
                 log.info("Closed glyph list over 'GSUB': %d glyphs after",
                          len(self.glyphs))
                 log.glyphs(self.glyphs, font=font)
-        self.glyphs_gsubed = frozenset(self.glyphs)
+        self.glyphs_gsubed = _GlyphSet(self.glyphs, glyph_ids)
 
         if 'MATH' in font:
             with timer("close glyph list over 'MATH'"):
@@ -2716,11 +3182,11 @@ class Subsetter(object):
                 log.glyphs(self.glyphs, font=font)
         self.glyphs_glyfed = frozenset(self.glyphs)
 
-        self.glyphs_all = frozenset(self.glyphs)
+        self.glyphs_all = _GlyphSet(self.glyphs, glyph_ids)
 
         log.info("Retaining %d glyphs", len(self.glyphs_all))
 
-        del self.glyphs
+        del self.glyphs, self._glyph_ids
 
     def _subset_glyphs(self, font):
         for tag in self._sort_tables(font):
@@ -2789,6 +3255,246 @@ class Subsetter(object):
         self._prune_post_subset(font)
 
 
+class _LookupClosureCache(object):
+    """Remembers the glyphs that non-contextual GSUB lookups add to the
+    closure, for given input and context glyphs; see Lookup.closure_glyphs.
+    The lookups are identified by id, so the font that they belong to must
+    be kept alive as long as the cache."""
+
+    maxsize = 100000
+
+    def __init__(self):
+        self._inputs = {}
+        self._closures = {}
+
+    def get_inputs(self, lookup):
+        key = id(lookup)
+        if key not in self._inputs:
+            self._inputs[key] = lookup.closure_inputs()
+        return self._inputs[key]
+
+    def get(self, key):
+        return self._closures.get(key)
+
+    def put(self, key, glyphs):
+        if len(self._closures) >= self.maxsize:
+            self._closures.clear()
+        self._closures[key] = glyphs
+
+
+def _collect_glyph_names(obj, glyphs):
+    """Add the glyph names that an OpenType layout object refers to (with
+    maybe some other strings) to the set 'glyphs'."""
+    if isinstance(obj, basestring):
+        glyphs.add(obj)
+    elif isinstance(obj, (list, tuple)):
+        for v in obj:
+            _collect_glyph_names(v, glyphs)
+    elif isinstance(obj, dict):
+        for k, v in obj.items():
+            _collect_glyph_names(k, glyphs)
+            _collect_glyph_names(v, glyphs)
+    elif isinstance(obj, otTables.BaseTable):
+        _collect_glyph_names(list(vars(obj).values()), glyphs)
+
+
+class SubsetterSession(object):
+    """Subsets the same font repeatedly, e.g. for different sets of Unicode
+    characters, with the same options.
+
+    The font, a TTFont or a file to load with load_font(), is loaded
+    completely, and the tables are pruned of what the options drop (hinting,
+    layout features, etc.) only once. The pruned tables are kept pickled, as
+    a template: each call to subset() returns a new font, made of copies of
+    them. Large binary data (e.g. of glyf) is shared by the copies, rather
+    than copied. The GSUB and GPOS subtables that refer to none of the
+    glyphs kept are not copied at all, as they would be dropped. The glyph
+    closures of the GSUB lookups, and the closures of whole requests, are
+    remembered across calls.
+
+    The session keeps no reference to the font it is given, or to its file,
+    which can be closed; it keeps the pickled tables, and a pruned copy of the
+    font, which the glyph closures are computed from. It can be shared by
+    processes forked after it was created, e.g. by subset_many(): the pickled
+    tables and the shared binary data stay shared with the parent process,
+    but each process ends up with its own copy of the pruned font, whose
+    reference counts computing the closures updates.
+    """
+
+    maxsize = 1000
+
+    # bytes objects at least this large are shared by the copies of the tables
+    shared_buffer_size = 1024
+
+    def __init__(self, font, options=None):
+        if not options:
+            options = Options()
+        self.options = options
+        if isinstance(font, ttLib.TTFont):
+            source = font
+        else:
+            source = load_font(font, options)
+
+        self._font_args = dict(sfntVersion=source.sfntVersion,
+                               flavor=source.flavor,
+                               recalcBBoxes=source.recalcBBoxes,
+                               recalcTimestamp=source.recalcTimestamp,
+                               allowVID=source.allowVID)
+        self._flavor_data = source.flavorData
+        self._glyph_order = list(source.getGlyphOrder())
+
+        self._buffers = []
+        self._buffer_ids = {}
+        self._subtables = {}
+        tables = {}
+        for tag in source.keys():
+            if tag == 'GlyphOrder': continue
+            with timer("load '%s'" % tag):
+                tables[tag] = source[tag]
+        self._base = self._new_font()
+        self._base.tables.update(self._unpickle(
+            self._base, self._pickle(source, tables)))
+        if source is not font:
+            source.close()
+        del source, tables
+        Subsetter(options)._prune_pre_subset(self._base)
+        if 'CFF ' in self._base and not options.desubroutinize:
+            with timer("build CFF subroutine call graph"):
+                self._base['CFF '].build_subr_call_graph()
+
+        with timer("snapshot tables"):
+            for tag in ('GSUB', 'GPOS'):
+                if tag not in self._base or not self._base[tag].table.LookupList:
+                    continue
+                for lookup in self._base[tag].table.LookupList.Lookup:
+                    if not lookup: continue
+                    for st in lookup.SubTable:
+                        if not st: continue
+                        glyphs = set()
+                        _collect_glyph_names(st, glyphs)
+                        self._subtables[id(st)] = (
+                            glyphs, self._pickle(self._base, st))
+            self._tables = self._pickle(self._base, self._base.tables)
+        del self._buffer_ids
+
+        self._lookup_closures = _LookupClosureCache()
+        self._glyph_ids = _GlyphIdMap(self._glyph_order)
+        self._closures = {}
+
+    def _pickle(self, font, tables):
+        def persistent_id(obj):
+            if id(obj) in self._subtables:
+                return ('SubTable', id(obj))
+            if ((isinstance(obj, bytes) and len(obj) >= self.shared_buffer_size)
+                    or isinstance(obj, memoryview)):
+                index = self._buffer_ids.get(id(obj))
+                if index is None:
+                    # data of a memory-mapped font is copied once, here
+                    data = obj.tobytes() if isinstance(obj, memoryview) else obj
+                    index = len(self._buffers)
+                    self._buffers.append(data)
+                    self._buffer_ids[id(obj)] = self._buffer_ids[id(data)] = index
+                return ('Buffer', index)
+            return None
+        return ttLib._pickleTables(font, tables, persistent_id)
+
+    def _unpickle(self, font, data, glyphs=None):
+        def persistent_load(pid):
+            if pid[0] == 'Buffer':
+                return self._buffers[pid[1]]
+            subtable_glyphs, data = self._subtables[pid[1]]
+            if subtable_glyphs.isdisjoint(glyphs):
+                return None
+            return self._unpickle(font, data)
+        return ttLib._unpickleTables(font, data, persistent_load)
+
+    def _new_font(self):
+        font = ttLib.TTFont(**self._font_args)
+        font.flavorData = self._flavor_data
+        font.setGlyphOrder(list(self._glyph_order))
+        return font
+
+    def _copy_font(self, glyphs):
+        font = self._new_font()
+        font.tables.update(self._unpickle(font, self._tables, glyphs))
+        return font
+
+    _closure_attrs = ['glyphs_requested', 'glyphs_missing', 'unicodes_missing',
+                      'glyphs_cmaped', 'glyphs_gsubed', 'glyphs_mathed',
+                      'glyphs_colred', 'glyphs_glyfed', 'glyphs_all']
+
+    def subset(self, glyphs=[], gids=[], unicodes=[], text=""):
+        """Return a new font, subset to the given glyph names, glyph ids,
+        Unicode characters and text, as with Subsetter.populate()."""
+        subsetter = Subsetter(self.options)
+        subsetter.populate(glyphs=glyphs, gids=gids, unicodes=unicodes, text=text)
+        key = (frozenset(subsetter.glyph_names_requested),
+               frozenset(subsetter.glyph_ids_requested),
+               frozenset(subsetter.unicodes_requested))
+        closure = self._closures.get(key)
+        if closure is None:
+            subsetter._lookup_closures = self._lookup_closures
+            subsetter._closure_glyphs(self._base, self._glyph_ids)
+            del subsetter._lookup_closures
+            closure = {attr: getattr(subsetter, attr)
+                       for attr in self._closure_attrs}
+            if len(self._closures) >= self.maxsize:
+                self._closures.clear()
+            self._closures[key] = closure
+        else:
+            log.info("Retaining %d glyphs", len(closure['glyphs_all']))
+            for attr, value in closure.items():
+                setattr(subsetter, attr, value)
+
+        with timer("copy tables"):
+            font = self._copy_font(subsetter.glyphs_all)
+        subsetter._subset_glyphs(font)
+        subsetter._prune_post_subset(font)
+        return font
+
+    def _subset_to_bytes(self, request):
+        font = self.subset(**request)
+        buf = BytesIO()
+        save_font(font, buf, self.options)
+        return buf.getvalue()
+
+    def subset_many(self, requests, workers=None):
+        """Subset the font for each of 'requests', a list of dicts of
+        keyword arguments to subset(), and return the subset fonts compiled
+        as with save_font(), as a list of bytes.
+
+        If 'workers' is more than 1, the requests are processed by a pool of
+        that many worker processes, forked from this one, which share this
+        session (see fontTools.misc.forkTools); where 'fork' is not
+        available, or if a request fails in a worker, it is processed here
+        instead.
+        """
+        requests = list(requests)
+        pool = None
+        if workers and workers > 1 and len(requests) > 1:
+            pool = forkTools.getForkPool(min(workers, len(requests)), self)
+        if pool is None:
+            return [self._subset_to_bytes(request) for request in requests]
+        try:
+            pending = [pool.apply_async(_subset_in_worker, (request,))
+                       for request in requests]
+            results = [result.get() for result in pending]
+        finally:
+            pool.terminate()
+            pool.join()
+        return [self._subset_to_bytes(request) if result is None else result
+                for request, result in zip(requests, results)]
+
+
+def _subset_in_worker(request):
+    session, = forkTools.getWorkerArgs()
+    try:
+        return session._subset_to_bytes(request)
+    except Exception:
+        log.debug("error while subsetting in a worker process", exc_info=True)
+        return None
+
+
 @timer("load font")
 def load_font(fontFile,
               options,
@@ -2990,6 +3696,7 @@ def main(args=None):
 __all__ = [
     'Options',
     'Subsetter',
+    'SubsetterSession',
     'load_font',
     'save_font',
     'parse_gids',
@@ -44,9 +44,14 @@ Dumping 'prep' table...
 from __future__ import print_function, division, absolute_import
 from fontTools.misc.py23 import *
 from fontTools.misc.loggingTools import deprecateArgument, deprecateFunction
+from fontTools.misc import forkTools
 import os
 import sys
 import logging
+try:
+	import cPickle as pickle
+except ImportError:
+	import pickle
 
 
 log = logging.getLogger(__name__)
@@ -65,7 +70,8 @@ class TTFont(object):
 	def __init__(self, file=None, res_name_or_index=None,
 			sfntVersion="\000\001\000\000", flavor=None, checkChecksums=False,
 			verbose=None, recalcBBoxes=True, allowVID=False, ignoreDecompileErrors=False,
-			recalcTimestamp=True, fontNumber=-1, lazy=None, quiet=None):
+			recalcTimestamp=True, fontNumber=-1, lazy=None, quiet=None,
+			mmap=False, copyUnchanged=False):
 
 		"""The constructor can be called with a few different arguments.
 		When reading a font from disk, 'file' should be either a pathname
@@ -120,6 +126,13 @@ class TTFont(object):
 		If lazy is set to True, many data structures are loaded lazily, upon
 		access only.  If it is set to False, many data structures are loaded
 		immediately.  The default is lazy=None which is somewhere in between.
+
+		If copyUnchanged is set to True, a checksum of the contents of each
+		table is taken when it is decompiled, and save() copies the tables
+		whose contents are still the same from the original file, instead of
+		compiling them again.  This doesn't apply to the tables that other
+		tables depend on or are recalculated from (e.g. 'glyf', 'loca',
+		'maxp', 'head'), which are compiled whenever they were loaded.
 		"""
 
 		from fontTools.ttLib import sfnt
@@ -131,6 +144,9 @@ class TTFont(object):
 			setattr(self, name, val)
 
 		self.lazy = lazy
+		self.mmap = mmap
+		self.copyUnchanged = copyUnchanged
+		self._fingerprints = {}
 		self.recalcBBoxes = recalcBBoxes
 		self.recalcTimestamp = recalcTimestamp
 		self.tables = {}
@@ -168,7 +184,7 @@ class TTFont(object):
 		else:
 			# assume "file" is a readable file object
 			closeStream = False
-		if not self.lazy:
+		if not self.lazy and not self.mmap:
 			# read input file in memory and wrap a stream around it to allow overwriting
 			tmp = BytesIO(file.read())
 			if hasattr(file, 'name'):
@@ -177,7 +193,8 @@ class TTFont(object):
 			if closeStream:
 				file.close()
 			file = tmp
-		self.reader = sfnt.SFNTReader(file, checkChecksums, fontNumber=fontNumber)
+		self.reader = sfnt.SFNTReader(file, checkChecksums, fontNumber=fontNumber,
+				mmap=self.mmap)
 		self.sfntVersion = self.reader.sfntVersion
 		self.flavor = self.reader.flavor
 		self.flavorData = self.reader.flavorData
@@ -187,16 +204,31 @@ class TTFont(object):
 		if self.reader is not None:
 			self.reader.close()
 
-	def save(self, file, reorderTables=True):
+	def save(self, file, reorderTables=True, workers=None):
 		"""Save the font to disk. Similarly to the constructor,
 		the 'file' argument can be either a pathname or a writable
 		file object.
+
+		If 'workers' is greater than 1, the tables that no other table
+		depends on (e.g. GSUB, GPOS, CFF, gvar) are compiled in a pool of
+		that many worker processes, while the tables that depend on each
+		other (e.g. glyf, loca, head, maxp) are compiled in this process.
+		The output is the same as when compiling the tables one after the
+		other. See fontTools.misc.forkTools.
+		"""
+		self._save(file, reorderTables, workers)
+
+	def _save(self, file, reorderTables=True, workers=None):
+		"""Internal helper function for self.save(). Returns the list of the
+		tags of the tables that were compiled, as opposed to copied from the
+		original file (see 'copyUnchanged').
 		"""
 		from fontTools.ttLib import sfnt
 		if not hasattr(file, "write"):
-			if self.lazy and self.reader.file.name == file:
+			if (self.lazy or self.mmap) and self.reader is not None and \
+					self.reader.file.name == file:
 				raise TTLibError(
-					"Can't overwrite TTFont when 'lazy' attribute is True")
+					"Can't overwrite TTFont when 'lazy' or 'mmap' attribute is True")
 			closeStream = True
 			file = open(file, "wb")
 		else:
@@ -214,9 +246,16 @@ class TTFont(object):
 		tmp = BytesIO()
 		writer = sfnt.SFNTWriter(tmp, numTables, self.sfntVersion, self.flavor, self.flavorData)
 
+		unchanged = self._findUnchangedTables(tags)
+		tableCache = dict((tag, _bufferToBytes(self.reader[tag])) for tag in unchanged)
+		compiled = [tag for tag in tags if self.isLoaded(tag) and tag not in tableCache]
+		if unchanged:
+			log.info("copying unchanged tables: %s", " ".join(unchanged))
+		if workers is not None and workers > 1:
+			tableCache.update(self._compileTablesInParallel(compiled, workers) or {})
 		done = []
 		for tag in tags:
-			self._writeTable(tag, writer, done)
+			self._writeTable(tag, writer, done, tableCache)
 
 		writer.close()
 
@@ -243,6 +282,8 @@ class TTFont(object):
 		if closeStream:
 			file.close()
 
+		return compiled
+
 	def saveXML(self, fileOrPath, progress=None, quiet=None,
 			tables=None, skipTables=None, splitTables=False, disassembleInstructions=True,
 			bitmapGlyphDataFormat='raw', newlinestr=None):
@@ -281,7 +322,7 @@ class TTFont(object):
 			idlefunc = None
 
 		writer = xmlWriter.XMLWriter(fileOrPath, idlefunc=idlefunc,
-				newlinestr=newlinestr)
+				newlinestr=newlinestr, buffered=True)
 		writer.begintag("ttFont", sfntVersion=repr(tostr(self.sfntVersion))[1:-1],
 				ttLibVersion=version)
 		writer.newline()
@@ -300,7 +341,7 @@ class TTFont(object):
 			if splitTables:
 				tablePath = fileNameTemplate % tagToIdentifier(tag)
 				tableWriter = xmlWriter.XMLWriter(tablePath, idlefunc=idlefunc,
-						newlinestr=newlinestr)
+						newlinestr=newlinestr, buffered=True)
 				tableWriter.begintag("ttFont", ttLibVersion=version)
 				tableWriter.newline()
 				tableWriter.newline()
@@ -321,6 +362,8 @@ class TTFont(object):
 		# The special string "-" means standard output so leave that open too
 		if not hasattr(fileOrPath, "write") and fileOrPath != "-":
 			writer.close()
+		else:
+			writer.flush()
 
 	def _tableToXML(self, writer, tag, progress, quiet=None):
 		if quiet is not None:
@@ -352,9 +395,16 @@ class TTFont(object):
 		writer.newline()
 		writer.newline()
 
-	def importXML(self, fileOrPath, progress=None, quiet=None):
+	def importXML(self, fileOrPath, progress=None, quiet=None, workers=None):
 		"""Import a TTX file (an XML-based text format), so as to recreate
 		a font object.
+
+		If 'workers' is greater than 1, the tables, or the files of a TTX
+		split per table, are parsed in a pool of that many worker processes;
+		the glyf table is itself split in parts. The tables whose parsing
+		needs other tables (e.g. gvar) are parsed in this process, after
+		the others. The result is the same as when parsing the file in one
+		go. See fontTools.misc.forkTools.
 		"""
 		if quiet is not None:
 			deprecateArgument("quiet", "configure logging instead")
@@ -368,7 +418,8 @@ class TTFont(object):
 
 		from fontTools.misc import xmlReader
 
-		reader = xmlReader.XMLReader(fileOrPath, self, progress)
+		reader = xmlReader.XMLReader(fileOrPath, self, progress,
+				workers=workers)
 		reader.read()
 
 	def isLoaded(self, tag):
@@ -417,11 +468,16 @@ class TTFont(object):
 				log.debug("Reading '%s' table from disk", tag)
 				data = self.reader[tag]
 				tableClass = getTableClass(tag)
+				if not tableClass.acceptsBuffer:
+					data = _bufferToBytes(data)
 				table = tableClass(tag)
 				self.tables[tag] = table
 				log.debug("Decompiling '%s' table", tag)
 				try:
 					table.decompile(data, self)
+					if self.copyUnchanged and \
+							tag not in self._getRelatedTables(self.reader.keys()):
+						self._fingerprints[tag] = _tableFingerprint(self, table)
 				except:
 					if not self.ignoreDecompileErrors:
 						raise
@@ -434,7 +490,7 @@ class TTFont(object):
 					table = DefaultTable(tag)
 					table.ERROR = file.getvalue()
 					self.tables[tag] = table
-					table.decompile(data, self)
+					table.decompile(_bufferToBytes(data), self)
 				return table
 			else:
 				raise KeyError("'%s' table not found" % tag)
@@ -447,6 +503,7 @@ class TTFont(object):
 			raise KeyError("'%s' table not found" % tag)
 		if tag in self.tables:
 			del self.tables[tag]
+		self._fingerprints.pop(tag, None)
 		if self.reader and tag in self.reader:
 			del self.reader[tag]
 
@@ -464,6 +521,7 @@ class TTFont(object):
 			return self.glyphOrder
 		except AttributeError:
 			pass
+		loaded = set(self.tables)
 		if 'CFF ' in self:
 			cff = self['CFF ']
 			self.glyphOrder = cff.getGlyphOrder()
@@ -481,6 +539,12 @@ class TTFont(object):
 				self.glyphOrder = glyphOrder
 		else:
 			self._getGlyphNamesFromCmap()
+		if self.copyUnchanged:
+			# what the glyph IDs in the original tables refer to
+			self._originalGlyphOrder = list(self.glyphOrder)
+			# the tables loaded above may have handed over their glyph names
+			for tag in set(self._fingerprints) - loaded:
+				self._fingerprints[tag] = _tableFingerprint(self, self.tables[tag])
 		return self.glyphOrder
 
 	def _getGlyphNamesFromCmap(self):
@@ -642,7 +706,7 @@ class TTFont(object):
 		for glyphID in range(len(glyphOrder)):
 			d[glyphOrder[glyphID]] = glyphID
 
-	def _writeTable(self, tag, writer, done):
+	def _writeTable(self, tag, writer, done, tableCache=None):
 		"""Internal helper function for self.save(). Keeps track of
 		inter-table dependencies.
 		"""
@@ -652,14 +716,126 @@ class TTFont(object):
 		for masterTable in tableClass.dependencies:
 			if masterTable not in done:
 				if masterTable in self:
-					self._writeTable(masterTable, writer, done)
+					self._writeTable(masterTable, writer, done, tableCache)
 				else:
 					done.append(masterTable)
-		tabledata = self.getTableData(tag)
+		if tableCache is not None and tag in tableCache:
+			tabledata = tableCache[tag]
+		else:
+			tabledata = self.getTableData(tag)
 		log.debug("writing '%s' table to disk", tag)
 		writer[tag] = tabledata
 		done.append(tag)
 
+	def _findUnchangedTables(self, tags):
+		"""Internal helper function for self.save(). Returns the loaded
+		tables in 'tags' that can be copied from the original file, as
+		their contents are the same as when they were decompiled.
+
+		The tables whose compile() reads or modifies other tables, and
+		those tables, are left out, as is 'head' if its modified timestamp
+		is to be recalculated. If the glyph order was changed (or set,
+		rather than read from the font), no table is left unchanged.
+		"""
+		if not self.copyUnchanged or self.reader is None:
+			return []
+		if hasattr(self, "glyphOrder") and \
+				self.glyphOrder != getattr(self, "_originalGlyphOrder", None):
+			return []
+		related = self._getRelatedTables(tags)
+		unchanged = []
+		for tag in tags:
+			if tag in related or not self.isLoaded(tag) or tag not in self.reader:
+				continue
+			fingerprint = self._fingerprints.get(tag)
+			if fingerprint is not None and \
+					fingerprint == _tableFingerprint(self, self.tables[tag]):
+				unchanged.append(tag)
+		return unchanged
+
+	def _getRelatedTables(self, tags):
+		"""Internal helper function for self.save(). Returns the set of the
+		tables in 'tags' that are always compiled, rather than copied from
+		the original file: those whose compile() reads or modifies other
+		tables, those tables, and 'head' if its modified timestamp is to be
+		recalculated.
+		"""
+		related = set()
+		if self.recalcTimestamp:
+			related.add("head")
+		for tag in tags:
+			dependencies = [t for t in getTableClass(tag).dependencies if t in tags]
+			if dependencies:
+				related.add(tag)
+				related.update(dependencies)
+		return related
+
+	def _compileTablesInParallel(self, tags, workers):
+		"""Internal helper function for self.save(). Returns a dict
+		containing the compiled data of the tables in 'tags', except for
+		those that were not loaded, which are simply copied from disk later.
+
+		A table whose compile() may modify other tables is always listed in
+		their 'dependencies', so only the tables that no other table depends
+		on can be compiled in a forked process, whose changes to the font
+		are lost. The ones among these that have no dependencies are sent to
+		the workers right away, while the other tables are compiled here in
+		dependency order; the remaining ones are sent to a second pool of
+		workers, forked once their dependencies have been compiled.
+		"""
+		if forkTools.getForkContext() is None:
+			log.debug("'fork' is not available; compiling tables serially")
+			return None
+		if self.lazy and not self.mmap and self.reader is not None:
+			# the forked processes would share the position of the input file
+			log.debug("font file is not in memory; compiling tables serially")
+			return None
+
+		if "glyf" in self or "CFF " in self:
+			self.getGlyphOrder()  # so that workers don't all have to build it
+		masters = set()
+		for tag in tags:
+			masters.update(getTableClass(tag).dependencies)
+		independent = []
+		dependent = []
+		for tag in tags:
+			if tag in masters or not self.isLoaded(tag):
+				continue
+			if any(master in self for master in getTableClass(tag).dependencies):
+				dependent.append(tag)
+			else:
+				independent.append(tag)
+
+		def startPool(tags):
+			if len(tags) < 2:
+				return None, []
+			pool = forkTools.getForkPool(min(workers, len(tags)), self)
+			return pool, [(tag, pool.apply_async(_compileTableInWorker, (tag,)))
+				for tag in tags]
+
+		tableCache = {}
+		pools = []
+		try:
+			pool, pending = startPool(independent)
+			if pool is not None:
+				pools.append(pool)
+			done = []
+			for tag in tags:
+				if tag in masters:
+					self._writeTable(tag, tableCache, done)
+			for tag, result in pending:
+				tableCache[tag] = result.get()
+			pool, pending = startPool(dependent)
+			if pool is not None:
+				pools.append(pool)
+			for tag, result in pending:
+				tableCache[tag] = result.get()
+		finally:
+			for pool in pools:
+				pool.terminate()
+				pool.join()
+		return tableCache
+
 	def getTableData(self, tag):
 		"""Returns raw table data, whether compiled or directly read from disk.
 		"""
@@ -669,7 +845,7 @@ class TTFont(object):
 			return self.tables[tag].compile(self)
 		elif self.reader and tag in self.reader:
 			log.debug("Reading '%s' table from disk", tag)
-			return self.reader[tag]
+			return _bufferToBytes(self.reader[tag])
 		else:
 			raise KeyError(tag)
 
@@ -697,6 +873,123 @@ class TTFont(object):
 		return glyphs
 
 
+def _getSubclasses(cls):
+	"""Return the list of all the subclasses of 'cls', recursively."""
+	result = []
+	stack = [cls]
+	while stack:
+		subclasses = stack.pop().__subclasses__()
+		result.extend(subclasses)
+		stack.extend(subclasses)
+	return result
+
+
+def _tableFingerprint(font, table):
+	"""Return a digest of the pickled contents of 'table'. References to
+	the font, and to the original data of tables that are loaded lazily,
+	are pickled as placeholders; so are the OpenType subtables that were
+	not decompiled yet, which pickling would otherwise decompile. Return
+	None if the table can't be pickled.
+	"""
+	import hashlib
+	from fontTools.ttLib.tables.otBase import BaseTable, OTTableReader
+
+	def lazySubtableId(obj):
+		reader = obj.__dict__.get("reader")
+		if reader is None:
+			return None
+		return "<%s at %d>" % (obj.__class__.__name__, reader.offset)
+
+	f = BytesIO()
+	pickler = pickle.Pickler(f, 2)
+	try:
+		# a dispatch_table is looked up by the C pickler of Python 3, while
+		# persistent_id would be called back for each object
+		import copyreg
+		pickler.dispatch_table = dispatch = copyreg.dispatch_table.copy()
+		dispatch[font.__class__] = lambda obj: (str, ("<TTFont>",))
+		dispatch[OTTableReader] = lambda obj: (int, (obj.offset,))
+		dispatch[memoryview] = lambda obj: (bytes, (hashlib.md5(obj).digest(),))
+		def reduceSubtable(obj):
+			subtableId = lazySubtableId(obj)
+			if subtableId is not None:
+				return (str, (subtableId,))
+			return obj.__reduce_ex__(2)
+		for cls in _getSubclasses(BaseTable):
+			dispatch[cls] = reduceSubtable
+	except (ImportError, AttributeError):
+		def persistent_id(obj):
+			if obj is font:
+				return "<TTFont>"
+			if isinstance(obj, OTTableReader):
+				return str(obj.offset)
+			if isinstance(obj, memoryview):
+				return hashlib.md5(obj).hexdigest()
+			if isinstance(obj, BaseTable):
+				return lazySubtableId(obj)
+			return None
+		pickler.persistent_id = persistent_id
+	try:
+		pickler.dump(table)
+	except Exception as e:
+		log.debug("can't pickle '%s' table: %s", table.tableTag, e)
+		return None
+	return hashlib.md5(f.getvalue()).digest()
+
+
+def _pickleTables(font, tables, persistent_id=None):
+	"""Pickle a dict of tables, with the font and its glyph order replaced
+	by references that _unpickleTables() resolves to another font, e.g. in
+	another process. 'persistent_id' can return references for more objects;
+	see the pickle module.
+	"""
+	from types import MethodType
+	glyphOrder = getattr(font, "glyphOrder", None)
+	getExtraId = persistent_id
+	def persistent_id(obj):
+		if obj is font:
+			return "TTFont"
+		if obj is glyphOrder:
+			return "GlyphOrder"
+		if isinstance(obj, MethodType) and obj.__self__ is font:
+			# e.g. VORG.getGlyphName; Python 2 can't pickle bound methods
+			return ("TTFont", obj.__name__)
+		if getExtraId is not None:
+			return getExtraId(obj)
+		return None
+	f = BytesIO()
+	pickler = pickle.Pickler(f, 2)
+	pickler.persistent_id = persistent_id
+	pickler.dump(tables)
+	return f.getvalue()
+
+
+def _unpickleTables(font, data, persistent_load=None):
+	loadExtra = persistent_load
+	def persistent_load(pid):
+		if pid == "TTFont":
+			return font
+		if pid == "GlyphOrder":
+			return font.getGlyphOrder()
+		if isinstance(pid, tuple) and pid[0] == "TTFont":
+			return getattr(font, pid[1])
+		if loadExtra is not None:
+			return loadExtra(pid)
+		raise pickle.UnpicklingError("unknown reference: %r" % pid)
+	unpickler = pickle.Unpickler(BytesIO(data))
+	unpickler.persistent_load = persistent_load
+	return unpickler.load()
+
+
+def _bufferToBytes(data):
+	"""Return a bytes copy of 'data' if it's a memoryview, as returned by
+	a memory-mapped SFNTReader; return 'data' unchanged otherwise.
+	"""
+	if isinstance(data, memoryview):
+		return data.tobytes()
+	return data
+
+
 class _TTGlyphSet(object):
 
 	"""Generic dict-like GlyphSet class that pulls metrics from hmtx and
@@ -934,6 +1227,11 @@ TTFTableOrder = ["head", "hhea", "maxp", "OS/2", "hmtx", "LTSH", "VDMX",
 OTFTableOrder = ["head", "hhea", "maxp", "OS/2", "name", "cmap", "post",
 				"CFF "]
 
+def _compileTableInWorker(tag):
+	font, = forkTools.getWorkerArgs()
+	return font.getTableData(tag)
+
+
 def sortedTagList(tagList, tableOrder=None):
 	"""Return a sorted copy of tagList, sorted according to the OpenType
 	specification, or according to a custom tableOrder. If given and not
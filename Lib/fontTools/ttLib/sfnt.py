@@ -17,6 +17,7 @@ from fontTools.misc.py23 import *
 from fontTools.misc import sstruct
 from fontTools.ttLib import getSearchRange
 import struct
+import mmap
 from collections import OrderedDict
 import logging
 
@@ -41,10 +42,14 @@ class SFNTReader(object):
 		# return default object
 		return object.__new__(cls)
 
-	def __init__(self, file, checkChecksums=1, fontNumber=-1):
+	def __init__(self, file, checkChecksums=1, fontNumber=-1, mmap=False):
 		self.file = file
 		self.checkChecksums = checkChecksums
 
+		# When 'mmap' is true, the file is memory-mapped and table data is
+		# returned as memoryview slices over the mapping, without copying.
+		self.buffer = _mapFile(file) if mmap else None
+
 		self.flavor = None
 		self.flavorData = None
 		self.DirectoryEntry = SFNTDirectoryEntry
@@ -111,11 +116,14 @@ class SFNTReader(object):
 	def __getitem__(self, tag):
 		"""Fetch the raw table data."""
 		entry = self.tables[Tag(tag)]
-		data = entry.loadData (self.file)
+		if self.buffer is not None:
+			data = entry.loadDataFromBuffer(self.buffer)
+		else:
+			data = entry.loadData(self.file)
 		if self.checkChecksums:
 			if tag == 'head':
 				# Beh: we have to special-case the 'head' table.
-				checksum = calcChecksum(data[:8] + b'\0\0\0\0' + data[12:])
+				checksum = calcChecksum(bytes(data[:8]) + b'\0\0\0\0' + bytes(data[12:]))
 			else:
 				checksum = calcChecksum(data)
 			if self.checkChecksums > 1:
@@ -130,9 +138,34 @@ class SFNTReader(object):
 		del self.tables[Tag(tag)]
 
 	def close(self):
+		if self.buffer is not None:
+			mapping = self.buffer.obj
+			self.buffer.release()
+			self.buffer = None
+			try:
+				mapping.close()
+			except BufferError:
+				# some table data still references the mapping; it will be
+				# unmapped when the last memoryview is garbage collected.
+				pass
 		self.file.close()
 
 
+def _mapFile(file):
+	"""Return a read-only memoryview over the memory-mapped 'file', or None
+	if the file can't be mapped (e.g. in-memory streams, or Python 2 where
+	mmap objects don't support the new buffer protocol).
+	"""
+	try:
+		fileno = file.fileno()
+	except (AttributeError, EnvironmentError, ValueError):
+		return None
+	try:
+		return memoryview(mmap.mmap(fileno, 0, access=mmap.ACCESS_READ))
+	except (TypeError, ValueError, EnvironmentError):
+		return None
+
+
 # default compression level for WOFF 1.0 tables and metadata
 ZLIB_COMPRESSION_LEVEL = 6
 
@@ -456,6 +489,13 @@ class DirectoryEntry(object):
 			data = self.decodeData(data)
 		return data
 
+	def loadDataFromBuffer(self, buffer):
+		data = buffer[self.offset:self.offset+self.length]
+		assert len(data) == self.length
+		if hasattr(self.__class__, 'decodeData'):
+			data = self.decodeData(data)
+		return data
+
 	def saveData(self, file, data):
 		if hasattr(self.__class__, 'encodeData'):
 			data = self.encodeData(data)
@@ -556,7 +596,7 @@ def calcChecksum(data):
 	"""
 	remainder = len(data) % 4
 	if remainder:
-		data += b"\0" * (4 - remainder)
+		data = bytes(data) + b"\0" * (4 - remainder)
 	value = 0
 	blockSize = 4096
 	assert blockSize % 4 == 0
@@ -6,6 +6,10 @@ from . import DefaultTable
 
 class table_C_F_F_(DefaultTable.DefaultTable):
 
+	# whether compile() replaces the subroutines with ones found anew
+	# in the charstrings; see cffLib.CFFFontSet.subroutinize()
+	subroutinize = False
+
 	def __init__(self, tag=None):
 		DefaultTable.DefaultTable.__init__(self, tag)
 		self.cff = cffLib.CFFFontSet()
@@ -17,7 +21,7 @@ class table_C_F_F_(DefaultTable.DefaultTable):
 
 	def compile(self, otFont):
 		f = BytesIO()
-		self.cff.compile(f, otFont)
+		self.cff.compile(f, otFont, subroutinize=self.subroutinize)
 		return f.getvalue()
 
 	def haveGlyphNames(self):
@@ -6,6 +6,10 @@ class DefaultTable(object):
 
 	dependencies = []
 
+	# Whether decompile() can handle a memoryview of the table data (as read
+	# from a memory-mapped font file) instead of a bytes string.
+	acceptsBuffer = False
+
 	def __init__(self, tag=None):
 		if tag is None:
 			tag = getClassTag(self.__class__)
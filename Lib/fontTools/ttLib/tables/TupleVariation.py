@@ -2,11 +2,10 @@ from __future__ import print_function, division, absolute_import
 from fontTools.misc.py23 import *
 from fontTools.misc.fixedTools import fixedToFloat, floatToFixed
 from fontTools.misc.textTools import safeEval
-import array
-import io
+import itertools
 import logging
+import re
 import struct
-import sys
 
 
 # https://www.microsoft.com/typography/otspec/otvarcommonformats.htm
@@ -28,6 +27,33 @@ TUPLE_INDEX_MASK = 0x0fff
 
 log = logging.getLogger(__name__)
 
+# The codecs of the point numbers and of the deltas below work on all the
+# values at once. To encode them, each value is classified with a letter,
+# and the runs are found with a regular expression over the letters; to
+# decode them, only the run headers are read one at a time, to build a
+# struct format that unpacks all the values in a single call, skipping the
+# headers with pad bytes ('x').
+
+# Runs of point number deltas: 'B' is a delta that fits in a byte, 'W' one
+# that doesn't. A run of words isn't switched back to bytes.
+_pointRunRE = re.compile(r"B{1,128}|W[BW]{0,127}")
+
+# Runs of deltas: 'Z' is a zero, 'B' a delta that fits in a signed byte,
+# 'W' one that doesn't. A single zero (but not two) is stored literally in
+# a run of bytes, as is a single byte value (but not two consecutive ones,
+# or a zero) in a run of words.
+_deltaRunRE = re.compile(r"Z{1,64}|B(?:B|Z(?!Z)){0,63}|W(?:W|B(?=W|$)){0,63}")
+
+# F2Dot14 values are decoded once: the axis coordinates of the tuples
+# share a few values.
+_f2dot14Values = {}
+
+def _f2dot14ToFloat(value):
+	result = _f2dot14Values.get(value)
+	if result is None:
+		result = _f2dot14Values[value] = fixedToFloat(value, 14)
+	return result
+
 
 class TupleVariation(object):
 	def __init__(self, axes, coordinates):
@@ -173,12 +199,10 @@ class TupleVariation(object):
 
 	@staticmethod
 	def decompileCoord_(axisTags, data, offset):
-		coord = {}
-		pos = offset
-		for axis in axisTags:
-			coord[axis] = fixedToFloat(struct.unpack(">h", data[pos:pos+2])[0], 14)
-			pos += 2
-		return coord, pos
+		end = offset + 2 * len(axisTags)
+		values = struct.unpack(">%dh" % len(axisTags), data[offset:end])
+		coord = dict(zip(axisTags, map(_f2dot14ToFloat, values)))
+		return coord, end
 
 	@staticmethod
 	def compilePoints(points, numPointsInGlyph):
@@ -193,50 +217,31 @@ class TupleVariation(object):
 		# [6, 17, 1, 1, 1, 1, 1, 1]. The first value (6) is the run length minus 1.
 		# There are two types of runs, with values being either 8 or 16 bit unsigned
 		# integers.
-		points = list(points)
-		points.sort()
+		points = sorted(points)
 		numPoints = len(points)
 
 		# The binary representation starts with the total number of points in the set,
 		# encoded into one or two bytes depending on the value.
 		if numPoints < 0x80:
-			result = [bytechr(numPoints)]
+			fmt = [">B"]
+			values = [numPoints]
 		else:
-			result = [bytechr((numPoints >> 8) | 0x80) + bytechr(numPoints & 0xff)]
-
-		MAX_RUN_LENGTH = 127
-		pos = 0
-		lastValue = 0
-		while pos < numPoints:
-			run = io.BytesIO()
-			runLength = 0
-			useByteEncoding = None
-			while pos < numPoints and runLength <= MAX_RUN_LENGTH:
-				curValue = points[pos]
-				delta = curValue - lastValue
-				if useByteEncoding is None:
-					useByteEncoding = 0 <= delta <= 0xff
-				if useByteEncoding and (delta > 0xff or delta < 0):
-					# we need to start a new run (which will not use byte encoding)
-					break
-				# TODO This never switches back to a byte-encoding from a short-encoding.
-				# That's suboptimal.
-				if useByteEncoding:
-					run.write(bytechr(delta))
-				else:
-					run.write(bytechr(delta >> 8))
-					run.write(bytechr(delta & 0xff))
-				lastValue = curValue
-				pos += 1
-				runLength += 1
-			if useByteEncoding:
-				runHeader = bytechr(runLength - 1)
+			fmt = [">H"]
+			values = [numPoints | 0x8000]
+
+		deltas = [p - q for p, q in zip(points, itertools.chain((0,), points))]
+		classes = "".join(["B" if d <= 0xff else "W" for d in deltas])
+		for run in _pointRunRE.finditer(classes):
+			start, end = run.span()
+			runLength = end - start
+			if classes[start] == "B":
+				fmt.append("B%dB" % runLength)
+				values.append(runLength - 1)
 			else:
-				runHeader = bytechr((runLength - 1) | POINTS_ARE_WORDS)
-			result.append(runHeader)
-			result.append(run.getvalue())
-
-		return bytesjoin(result)
+				fmt.append("B%dH" % runLength)
+				values.append((runLength - 1) | POINTS_ARE_WORDS)
+			values.extend(deltas[start:end])
+		return struct.pack("".join(fmt), *values)
 
 	@staticmethod
 	def decompilePoints_(numPoints, data, offset, tableTag):
@@ -251,26 +256,20 @@ class TupleVariation(object):
 		if numPointsInData == 0:
 			return (range(numPoints), pos)
 
-		result = []
-		while len(result) < numPointsInData:
+		fmt = [">"]
+		start = pos
+		count = 0
+		while count < numPointsInData:
 			runHeader = byteord(data[pos])
-			pos += 1
 			numPointsInRun = (runHeader & POINT_RUN_COUNT_MASK) + 1
-			point = 0
 			if (runHeader & POINTS_ARE_WORDS) != 0:
-				points = array.array("H")
-				pointsSize = numPointsInRun * 2
+				fmt.append("x%dH" % numPointsInRun)
+				pos += 1 + numPointsInRun * 2
 			else:
-				points = array.array("B")
-				pointsSize = numPointsInRun
-			points.fromstring(data[pos:pos+pointsSize])
-			if sys.byteorder != "big":
-				points.byteswap()
-
-			assert len(points) == numPointsInRun
-			pos += pointsSize
-
-			result.extend(points)
+				fmt.append("x%dB" % numPointsInRun)
+				pos += 1 + numPointsInRun
+			count += numPointsInRun
+		result = struct.unpack("".join(fmt), data[start:pos])
 
 		# Convert relative to absolute
 		absolute = []
@@ -288,10 +287,16 @@ class TupleVariation(object):
 		return (result, pos)
 
 	def compileDeltas(self, points):
+		coordinates = self.coordinates
+		deltas = [coordinates[p] for p in sorted(points)]
+		kinds = set(map(type, deltas))
+		if kinds == {tuple} and set(map(len, deltas)) == {2}:
+			# the usual 'gvar' deltas: all points have an (x, y) delta
+			return (self.compileDeltaValues_([c[0] for c in deltas]) +
+			        self.compileDeltaValues_([c[1] for c in deltas]))
 		deltaX = []
 		deltaY = []
-		for p in sorted(list(points)):
-			c = self.coordinates[p]
+		for c in deltas:
 			if type(c) is tuple and len(c) == 2:
 				deltaX.append(c[0])
 				deltaY.append(c[1])
@@ -318,116 +323,54 @@ class TupleVariation(object):
 		bytes; if (header & 0x40) is set, the delta values are
 		signed 16-bit integers.
 		"""  # Explaining the format because the 'gvar' spec is hard to understand.
-		stream = io.BytesIO()
-		pos = 0
-		while pos < len(deltas):
-			value = deltas[pos]
-			if value == 0:
-				pos = TupleVariation.encodeDeltaRunAsZeroes_(deltas, pos, stream)
-			elif value >= -128 and value <= 127:
-				pos = TupleVariation.encodeDeltaRunAsBytes_(deltas, pos, stream)
+		if set(map(type, deltas)) - {int}:
+			deltas = [int(round(v)) for v in deltas]
+		classes = "".join(["Z" if v == 0 else "B" if -128 <= v <= 127 else "W"
+		                   for v in deltas])
+		fmt = [">"]
+		values = []
+		for run in _deltaRunRE.finditer(classes):
+			start, end = run.span()
+			runLength = end - start
+			runClass = classes[start]
+			if runClass == "Z":
+				fmt.append("B")
+				values.append(DELTAS_ARE_ZERO | (runLength - 1))
+				continue
+			if runClass == "B":
+				fmt.append("B%db" % runLength)
+				values.append(runLength - 1)
 			else:
-				pos = TupleVariation.encodeDeltaRunAsWords_(deltas, pos, stream)
-		return stream.getvalue()
-
-	@staticmethod
-	def encodeDeltaRunAsZeroes_(deltas, offset, stream):
-		runLength = 0
-		pos = offset
-		numDeltas = len(deltas)
-		while pos < numDeltas and runLength < 64 and deltas[pos] == 0:
-			pos += 1
-			runLength += 1
-		assert runLength >= 1 and runLength <= 64
-		stream.write(bytechr(DELTAS_ARE_ZERO | (runLength - 1)))
-		return pos
-
-	@staticmethod
-	def encodeDeltaRunAsBytes_(deltas, offset, stream):
-		runLength = 0
-		pos = offset
-		numDeltas = len(deltas)
-		while pos < numDeltas and runLength < 64:
-			value = deltas[pos]
-			if value < -128 or value > 127:
-				break
-			# Within a byte-encoded run of deltas, a single zero
-			# is best stored literally as 0x00 value. However,
-			# if are two or more zeroes in a sequence, it is
-			# better to start a new run. For example, the sequence
-			# of deltas [15, 15, 0, 15, 15] becomes 6 bytes
-			# (04 0F 0F 00 0F 0F) when storing the zero value
-			# literally, but 7 bytes (01 0F 0F 80 01 0F 0F)
-			# when starting a new run.
-			if value == 0 and pos+1 < numDeltas and deltas[pos+1] == 0:
-				break
-			pos += 1
-			runLength += 1
-		assert runLength >= 1 and runLength <= 64
-		stream.write(bytechr(runLength - 1))
-		for i in range(offset, pos):
-			stream.write(struct.pack('b', round(deltas[i])))
-		return pos
-
-	@staticmethod
-	def encodeDeltaRunAsWords_(deltas, offset, stream):
-		runLength = 0
-		pos = offset
-		numDeltas = len(deltas)
-		while pos < numDeltas and runLength < 64:
-			value = deltas[pos]
-			# Within a word-encoded run of deltas, it is easiest
-			# to start a new run (with a different encoding)
-			# whenever we encounter a zero value. For example,
-			# the sequence [0x6666, 0, 0x7777] needs 7 bytes when
-			# storing the zero literally (42 66 66 00 00 77 77),
-			# and equally 7 bytes when starting a new run
-			# (40 66 66 80 40 77 77).
-			if value == 0:
-				break
-
-			# Within a word-encoded run of deltas, a single value
-			# in the range (-128..127) should be encoded literally
-			# because it is more compact. For example, the sequence
-			# [0x6666, 2, 0x7777] becomes 7 bytes when storing
-			# the value literally (42 66 66 00 02 77 77), but 8 bytes
-			# when starting a new run (40 66 66 00 02 40 77 77).
-			isByteEncodable = lambda value: value >= -128 and value <= 127
-			if isByteEncodable(value) and pos+1 < numDeltas and isByteEncodable(deltas[pos+1]):
-				break
-			pos += 1
-			runLength += 1
-		assert runLength >= 1 and runLength <= 64
-		stream.write(bytechr(DELTAS_ARE_WORDS | (runLength - 1)))
-		for i in range(offset, pos):
-			stream.write(struct.pack('>h', round(deltas[i])))
-		return pos
+				fmt.append("B%dh" % runLength)
+				values.append(DELTAS_ARE_WORDS | (runLength - 1))
+			values.extend(deltas[start:end])
+		return struct.pack("".join(fmt), *values)
 
 	@staticmethod
 	def decompileDeltas_(numDeltas, data, offset):
 		"""(numDeltas, data, offset) --> ([delta, delta, ...], newOffset)"""
-		result = []
+		fmt = [">"]
+		zeroRuns = []  # (index, numDeltasInRun)
 		pos = offset
-		while len(result) < numDeltas:
+		count = 0
+		while count < numDeltas:
 			runHeader = byteord(data[pos])
-			pos += 1
 			numDeltasInRun = (runHeader & DELTA_RUN_COUNT_MASK) + 1
 			if (runHeader & DELTAS_ARE_ZERO) != 0:
-				result.extend([0] * numDeltasInRun)
+				fmt.append("x")
+				zeroRuns.append((count, numDeltasInRun))
+				pos += 1
+			elif (runHeader & DELTAS_ARE_WORDS) != 0:
+				fmt.append("x%dh" % numDeltasInRun)
+				pos += 1 + numDeltasInRun * 2
 			else:
-				if (runHeader & DELTAS_ARE_WORDS) != 0:
-					deltas = array.array("h")
-					deltasSize = numDeltasInRun * 2
-				else:
-					deltas = array.array("b")
-					deltasSize = numDeltasInRun
-				deltas.fromstring(data[pos:pos+deltasSize])
-				if sys.byteorder != "big":
-					deltas.byteswap()
-				assert len(deltas) == numDeltasInRun
-				pos += deltasSize
-				result.extend(deltas)
-		assert len(result) == numDeltas
+				fmt.append("x%db" % numDeltasInRun)
+				pos += 1 + numDeltasInRun
+			count += numDeltasInRun
+		assert count == numDeltas
+		result = list(struct.unpack("".join(fmt), data[offset:pos]))
+		for index, numDeltasInRun in zeroRuns:
+			result[index:index] = [0] * numDeltasInRun
 		return (result, pos)
 
 	@staticmethod
@@ -507,15 +450,16 @@ def compileTupleVariationStore(variations, pointCount,
 	for v in variations:
 		privateTuple, privateData = v.compile(
 			axisTags, sharedTupleIndices, sharedPoints=None)
-		sharedTuple, sharedData = v.compile(
-			axisTags, sharedTupleIndices, sharedPoints=allPoints)
 		# TODO: Apple macOS 10.9.5 (maybe also earlier) up to 10.12 had a bug
 		# that broke variations if the `gvar` table contains shared tuples.
 		# Apple will likely fix this in macOS 10.13. But for the time being,
-		# we never emit shared points although the result would be more compact.
+		# we never emit shared points although the result would be more compact,
+		# and don't compile variant (b) either, which took half the time.
 		# https://rawgit.com/unicode-org/text-rendering-tests/master/reports/CoreText.html#GVAR-1
 		#if (len(sharedTuple) + len(sharedData)) < (len(privateTuple) + len(privateData)):
 		if False:
+			sharedTuple, sharedData = v.compile(
+				axisTags, sharedTupleIndices, sharedPoints=allPoints)
 			tuples.append(sharedTuple)
 			data.append(sharedData)
 			someTuplesSharePoints = True
@@ -581,24 +525,24 @@ def decompileTupleVariation_(pointCount, sharedTuples, sharedPoints,
 	else:
 		points = sharedPoints
 
-	deltas = [None] * pointCount
-
 	if tableTag == "cvar":
-		deltas_cvt, pos = TupleVariation.decompileDeltas_(
+		values, pos = TupleVariation.decompileDeltas_(
 			len(points), tupleData, pos)
-		for p, delta in zip(points, deltas_cvt):
-			if 0 <= p < pointCount:
-				deltas[p] = delta
 
 	elif tableTag == "gvar":
 		deltas_x, pos = TupleVariation.decompileDeltas_(
 			len(points), tupleData, pos)
 		deltas_y, pos = TupleVariation.decompileDeltas_(
 			len(points), tupleData, pos)
-		for p, x, y in zip(points, deltas_x, deltas_y):
-			if 0 <= p < pointCount:
-				deltas[p] = (x, y)
+		values = list(zip(deltas_x, deltas_y))
 
+	if isinstance(points, range) and len(points) == pointCount:
+		# all the points of the glyph
+		return TupleVariation(axes, values)
+	deltas = [None] * pointCount
+	for p, delta in zip(points, values):
+		if 0 <= p < pointCount:
+			deltas[p] = delta
 	return TupleVariation(axes, deltas)
 
 
@@ -14,7 +14,19 @@ from . import ttProgram
 import sys
 import struct
 import array
+import re
 import logging
+try:
+	from collections.abc import MutableMapping
+except ImportError:
+	from UserDict import DictMixin as MutableMapping
+
+haveNumpy = False
+try:
+	import numpy
+	haveNumpy = True
+except ImportError:
+	pass
 
 
 log = logging.getLogger(__name__)
@@ -40,12 +52,18 @@ class table__g_l_y_f(DefaultTable.DefaultTable):
 	# no padding, except for when padding would allow to use short loca offsets.
 	padding = 1
 
+	# glyph data can be sliced from a memoryview of the table without copying
+	acceptsBuffer = True
+
 	def decompile(self, data, ttFont):
 		loca = ttFont['loca']
+		self.glyphOrder = glyphOrder = ttFont.getGlyphOrder()
+		if ttFont.lazy:
+			self._decompileLazy(data, loca.locations, glyphOrder)
+			return
 		last = int(loca[0])
 		noname = 0
 		self.glyphs = {}
-		self.glyphOrder = glyphOrder = ttFont.getGlyphOrder()
 		for i in range(0, len(loca)-1):
 			try:
 				glyphName = glyphOrder[i]
@@ -69,6 +87,25 @@ class table__g_l_y_f(DefaultTable.DefaultTable):
 			for glyph in self.glyphs.values():
 				glyph.expand(self)
 
+	def _decompileLazy(self, data, locations, glyphOrder):
+		# Don't create any Glyph object yet: glyphs are sliced from the
+		# table data on first access.
+		numGlyphs = len(locations) - 1
+		glyphNames = glyphOrder[:numGlyphs]
+		noname = numGlyphs - len(glyphNames)
+		if noname > 0:
+			glyphNames.extend('ttxautoglyph%s' % i
+					for i in range(len(glyphNames), numGlyphs))
+			log.warning('%s glyphs have no name', noname)
+		end = int(locations[-1]) if numGlyphs > 0 else 0
+		if end > len(data):
+			raise ttLib.TTLibError("not enough 'glyf' table data")
+		if len(data) - end >= 4:
+			log.warning(
+				"too much 'glyf' table data: expected %d, received %d bytes",
+				end, len(data))
+		self.glyphs = LazyGlyphDict(data, locations, glyphNames)
+
 	def compile(self, ttFont):
 		if not hasattr(self, "glyphOrder"):
 			self.glyphOrder = ttFont.getGlyphOrder()
@@ -78,9 +115,18 @@ class table__g_l_y_f(DefaultTable.DefaultTable):
 		currentLocation = 0
 		dataList = []
 		recalcBBoxes = ttFont.recalcBBoxes
+		# glyphs that were never accessed are copied verbatim, unless the
+		# bounding boxes are recalculated
+		getRawData = None
+		if not recalcBBoxes:
+			getRawData = getattr(self.glyphs, "getRawData", None)
 		for glyphName in self.glyphOrder:
-			glyph = self.glyphs[glyphName]
-			glyphData = glyph.compile(self, recalcBBoxes)
+			glyphData = None
+			if getRawData is not None:
+				glyphData = getRawData(glyphName)
+			if glyphData is None:
+				glyph = self.glyphs[glyphName]
+				glyphData = glyph.compile(self, recalcBBoxes)
 			if padding > 1:
 				glyphData = pad(glyphData, size=padding)
 			locations.append(currentLocation)
@@ -163,6 +209,14 @@ class table__g_l_y_f(DefaultTable.DefaultTable):
 		if not ttFont.recalcBBoxes:
 			glyph.compact(self, 0)
 
+	def mergeXMLParts(self, parts):
+		"""Add the glyphs of the glyf tables in 'parts', each imported
+		from a TTX document with the rest of the TTGlyph elements."""
+		if not hasattr(self, "glyphs"):
+			self.glyphs = {}
+		for part in parts:
+			self.glyphs.update(getattr(part, "glyphs", {}))
+
 	def setGlyphOrder(self, glyphOrder):
 		self.glyphOrder = glyphOrder
 
@@ -200,6 +254,92 @@ class table__g_l_y_f(DefaultTable.DefaultTable):
 		return len(self.glyphs)
 
 
+class LazyGlyphDict(MutableMapping):
+
+	"""Dictionary of glyph names to Glyph objects, used by the 'glyf' table
+	when the font is loaded with lazy=True. The Glyph objects are created on
+	first access, by slicing the raw table data at the 'loca' offsets.
+	"""
+
+	def __init__(self, data, locations, glyphNames):
+		self._data = data
+		self._locations = locations
+		self._glyphNames = glyphNames
+		# glyphs that have not been accessed yet, mapped to their index
+		self._pending = {glyphName: i for i, glyphName in enumerate(glyphNames)}
+		self._glyphs = {}
+
+	def _getRawData(self, index):
+		start = int(self._locations[index])
+		end = int(self._locations[index+1])
+		data = self._data[start:end]
+		if len(data) != end - start:
+			raise ttLib.TTLibError("not enough 'glyf' table data")
+		return data
+
+	def getRawData(self, glyphName):
+		"""Return the original binary data of the glyph if it was never
+		accessed, else None.
+		"""
+		index = self._pending.get(glyphName)
+		if index is None:
+			return None
+		data = self._getRawData(index)
+		if isinstance(data, memoryview):
+			data = data.tobytes()
+		return data
+
+	def __getitem__(self, glyphName):
+		try:
+			return self._glyphs[glyphName]
+		except KeyError:
+			pass
+		index = self._pending[glyphName]
+		glyph = self._glyphs[glyphName] = Glyph(self._getRawData(index))
+		del self._pending[glyphName]
+		return glyph
+
+	def __setitem__(self, glyphName, glyph):
+		self._pending.pop(glyphName, None)
+		self._glyphs[glyphName] = glyph
+
+	def __delitem__(self, glyphName):
+		if glyphName in self._glyphs:
+			del self._glyphs[glyphName]
+		else:
+			del self._pending[glyphName]
+
+	def __contains__(self, glyphName):
+		return glyphName in self._glyphs or glyphName in self._pending
+
+	has_key = __contains__
+
+	def __len__(self):
+		return len(self._glyphs) + len(self._pending)
+
+	def __iter__(self):
+		# original glyphs first, in glyph order, then the added ones
+		count = 0
+		for glyphName in self._glyphNames:
+			if glyphName in self:
+				count += 1
+				yield glyphName
+		if count < len(self):
+			glyphNames = set(self._glyphNames)
+			for glyphName in list(self._glyphs):
+				if glyphName not in glyphNames:
+					yield glyphName
+
+	def keys(self):
+		return list(self)
+
+	def __getstate__(self):
+		# Pickle or copy the data of a memory-mapped font file as bytes.
+		if isinstance(self._data, memoryview):
+			return dict(self.__dict__, _data=self._data.tobytes())
+		return self.__dict__
+
+
 glyphHeaderFormat = """
 		>	# big endian
 		numberOfContours:	h
@@ -281,6 +421,100 @@ def flagEncodeCoords(flag, x, y, xBytes, yBytes):
 	flagEncodeCoord(flag, flagXsame|flagXShort, x, xBytes)
 	flagEncodeCoord(flag, flagYsame|flagYShort, y, yBytes)
 
+# The coordinate codec below works on all points of a glyph at once. The
+# per-point flags are mapped, with bytes.translate(), to a struct format
+# string ('B' for a short coordinate, 'h' for a word, and a blank -- which
+# struct ignores -- for a repeated one), so that all x or y coordinates are
+# unpacked or packed in a single struct call.
+
+def _coordFormats(shortFlag, sameFlag):
+	formats = bytearray()
+	for flag in range(256):
+		if flag & shortFlag:
+			formats.append(ord('B'))
+		elif flag & sameFlag:
+			formats.append(ord(' '))
+		else:
+			formats.append(ord('h'))
+	return bytes(formats)
+
+def _coordSigns(shortFlag, sameFlag):
+	signs = []
+	for flag in range(256):
+		if flag & shortFlag:
+			signs.append(1 if flag & sameFlag else -1)
+		elif flag & sameFlag:
+			signs.append(0)
+		else:
+			signs.append(1)
+	return tuple(signs)
+
+_xCoordFormats = _coordFormats(flagXShort, flagXsame)
+_yCoordFormats = _coordFormats(flagYShort, flagYsame)
+_xCoordSigns = _coordSigns(flagXShort, flagXsame)
+_yCoordSigns = _coordSigns(flagYShort, flagYsame)
+
+def _decompileFlags(nCoordinates, data):
+	"""Expands the run-length encoded flags of nCoordinates points at the
+	start of data. Returns the flags as a bytearray, and the number of bytes
+	they occupied in data."""
+	data = bytearray(data)
+	flags = bytearray()
+	i = 0
+	while len(flags) < nCoordinates:
+		flag = data[i]
+		i = i + 1
+		if flag & flagRepeat:
+			flags.extend(bytearray((flag,)) * (data[i] + 1))
+			i = i + 1
+		else:
+			flags.append(flag)
+	assert len(flags) == nCoordinates, "bad glyph flags"
+	return flags, i
+
+_flagRunRE = re.compile(br"(.)\1\1+", re.DOTALL)
+
+def _compileFlags(flags):
+	"""Run-length encodes a sequence of point flags, using repeat counts
+	for runs of three or more identical flags."""
+	flags = bytes(bytearray(flags))
+	data = bytearray()
+	pos = 0
+	for run in _flagRunRE.finditer(flags):
+		start, end = run.span()
+		data.extend(flags[pos:start])
+		flag = byteord(flags[start])
+		count = end - start
+		while count > 2:
+			repeat = min(count, 256)
+			data.append(flag | flagRepeat)
+			data.append(repeat - 1)
+			count = count - repeat
+		data.extend(bytearray((flag,)) * count)
+		pos = end
+	data.extend(flags[pos:])
+	return bytes(data)
+
+def _decodeCoords(flags, coords, signs):
+	coords = iter(coords)
+	return [sign * next(coords) if sign else 0 for sign in map(signs.__getitem__, flags)]
+
+def _encodeCoords(flags, deltas, shortFlag, sameFlag, formats):
+	mask = shortFlag | sameFlag
+	values = [abs(v) if flag & shortFlag else v
+		for flag, v in zip(flags, deltas) if (flag & mask) != sameFlag]
+	return struct.pack(b">" + bytes(bytearray(flags)).translate(formats), *values)
+
+def _deltaFlags(deltas, shortFlag, sameFlag):
+	return [sameFlag if v == 0 else
+		(shortFlag | sameFlag if v > 0 else shortFlag) if -255 <= v <= 255 else 0
+		for v in deltas]
+
+def _splitDeltas(deltas):
+	if isinstance(deltas, GlyphCoordinates):
+		return deltas._a[0::2], deltas._a[1::2]
+	return [x for x, y in deltas], [y for x, y in deltas]
+
 
 ARG_1_AND_2_ARE_WORDS		= 0x0001  # if set args are words otherwise they are bytes
 ARGS_ARE_XY_VALUES		= 0x0002  # if set args are xy values, otherwise they are points
@@ -306,6 +540,13 @@ class Glyph(object):
 			return
 		self.data = data
 
+	def __getstate__(self):
+		# Pickle or copy a slice of a memory-mapped font file as bytes.
+		data = self.__dict__.get("data")
+		if isinstance(data, memoryview):
+			return dict(self.__dict__, data=data.tobytes())
+		return self.__dict__
+
 	def compact(self, glyfTable, recalcBBoxes=True):
 		data = self.compile(glyfTable, recalcBBoxes)
 		self.__dict__.clear()
@@ -338,7 +579,11 @@ class Glyph(object):
 				# must unpack glyph in order to recalculate bounding box
 				self.expand(glyfTable)
 			else:
-				return self.data
+				data = self.data
+				if isinstance(data, memoryview):
+					# slice of a memory-mapped font file
+					data = data.tobytes()
+				return data
 		if self.numberOfContours == 0:
 			return ""
 		if recalcBBoxes:
@@ -482,71 +727,20 @@ class Glyph(object):
 
 		# fill in repetitions and apply signs
 		self.coordinates = coordinates = GlyphCoordinates.zeros(nCoordinates)
-		xIndex = 0
-		yIndex = 0
-		for i in range(nCoordinates):
-			flag = flags[i]
-			# x coordinate
-			if flag & flagXShort:
-				if flag & flagXsame:
-					x = xCoordinates[xIndex]
-				else:
-					x = -xCoordinates[xIndex]
-				xIndex = xIndex + 1
-			elif flag & flagXsame:
-				x = 0
-			else:
-				x = xCoordinates[xIndex]
-				xIndex = xIndex + 1
-			# y coordinate
-			if flag & flagYShort:
-				if flag & flagYsame:
-					y = yCoordinates[yIndex]
-				else:
-					y = -yCoordinates[yIndex]
-				yIndex = yIndex + 1
-			elif flag & flagYsame:
-				y = 0
-			else:
-				y = yCoordinates[yIndex]
-				yIndex = yIndex + 1
-			coordinates[i] = (x, y)
-		assert xIndex == len(xCoordinates)
-		assert yIndex == len(yCoordinates)
+		coordinates._a[0::2] = array.array("h", _decodeCoords(flags, xCoordinates, _xCoordSigns))
+		coordinates._a[1::2] = array.array("h", _decodeCoords(flags, yCoordinates, _yCoordSigns))
 		coordinates.relativeToAbsolute()
 		# discard all flags but for "flagOnCurve"
 		self.flags = array.array("B", (f & flagOnCurve for f in flags))
 
 	def decompileCoordinatesRaw(self, nCoordinates, data):
 		# unpack flags and prepare unpacking of coordinates
-		flags = array.array("B", [0] * nCoordinates)
+		flags, i = _decompileFlags(nCoordinates, data)
 		# Warning: deep Python trickery going on. We use the struct module to unpack
 		# the coordinates. We build a format string based on the flags, so we can
 		# unpack the coordinates in one struct.unpack() call.
-		xFormat = ">" # big endian
-		yFormat = ">" # big endian
-		i = j = 0
-		while True:
-			flag = byteord(data[i])
-			i = i + 1
-			repeat = 1
-			if flag & flagRepeat:
-				repeat = byteord(data[i]) + 1
-				i = i + 1
-			for k in range(repeat):
-				if flag & flagXShort:
-					xFormat = xFormat + 'B'
-				elif not (flag & flagXsame):
-					xFormat = xFormat + 'h'
-				if flag & flagYShort:
-					yFormat = yFormat + 'B'
-				elif not (flag & flagYsame):
-					yFormat = yFormat + 'h'
-				flags[j] = flag
-				j = j + 1
-			if j >= nCoordinates:
-				break
-		assert j == nCoordinates, "bad glyph flags"
+		xFormat = b">" + bytes(flags).translate(_xCoordFormats) # big endian
+		yFormat = b">" + bytes(flags).translate(_yCoordFormats) # big endian
 		data = data[i:]
 		# unpack raw coordinates, krrrrrr-tching!
 		xDataLen = struct.calcsize(xFormat)
@@ -556,7 +750,7 @@ class Glyph(object):
 				"too much glyph data: %d excess bytes", len(data) - (xDataLen + yDataLen))
 		xCoordinates = struct.unpack(xFormat, data[:xDataLen])
 		yCoordinates = struct.unpack(yFormat, data[xDataLen:xDataLen+yDataLen])
-		return flags, xCoordinates, yCoordinates
+		return array.array("B", flags), xCoordinates, yCoordinates
 
 	def compileComponents(self, glyfTable):
 		data = b""
@@ -601,52 +795,13 @@ class Glyph(object):
 	def compileDeltasGreedy(self, flags, deltas):
 		# Implements greedy algorithm for packing coordinate deltas:
 		# uses shortest representation one coordinate at a time.
-		compressedflags = []
-		xPoints = []
-		yPoints = []
-		lastflag = None
-		repeat = 0
-		for flag,(x,y) in zip(flags, deltas):
-			# Oh, the horrors of TrueType
-			# do x
-			if x == 0:
-				flag = flag | flagXsame
-			elif -255 <= x <= 255:
-				flag = flag | flagXShort
-				if x > 0:
-					flag = flag | flagXsame
-				else:
-					x = -x
-				xPoints.append(bytechr(x))
-			else:
-				xPoints.append(struct.pack(">h", x))
-			# do y
-			if y == 0:
-				flag = flag | flagYsame
-			elif -255 <= y <= 255:
-				flag = flag | flagYShort
-				if y > 0:
-					flag = flag | flagYsame
-				else:
-					y = -y
-				yPoints.append(bytechr(y))
-			else:
-				yPoints.append(struct.pack(">h", y))
-			# handle repeating flags
-			if flag == lastflag and repeat != 255:
-				repeat = repeat + 1
-				if repeat == 1:
-					compressedflags.append(flag)
-				else:
-					compressedflags[-2] = flag | flagRepeat
-					compressedflags[-1] = repeat
-			else:
-				repeat = 0
-				compressedflags.append(flag)
-			lastflag = flag
-		compressedFlags = array.array("B", compressedflags).tostring()
-		compressedXs = bytesjoin(xPoints)
-		compressedYs = bytesjoin(yPoints)
+		xs, ys = _splitDeltas(deltas)
+		xFlags = _deltaFlags(xs, flagXShort, flagXsame)
+		yFlags = _deltaFlags(ys, flagYShort, flagYsame)
+		flags = [f | xf | yf for f, xf, yf in zip(flags, xFlags, yFlags)]
+		compressedFlags = _compileFlags(flags)
+		compressedXs = _encodeCoords(flags, xs, flagXShort, flagXsame, _xCoordFormats)
+		compressedYs = _encodeCoords(flags, ys, flagYShort, flagYsame, _yCoordFormats)
 		return (compressedFlags, compressedXs, compressedYs)
 
 	def compileDeltasOptimal(self, flags, deltas):
@@ -656,7 +811,8 @@ class Glyph(object):
 		bestTuple = None
 		bestCost = 0
 		repeat = 0
-		for flag,(x,y) in zip(flags, deltas):
+		xs, ys = _splitDeltas(deltas)
+		for flag,x,y in zip(flags, xs, ys):
 			# Oh, the horrors of TrueType
 			flag, coordBytes = flagBest(x, y, flag)
 			bestCost += 1 + coordBytes
@@ -677,10 +833,7 @@ class Glyph(object):
 			flags.append(flag)
 		flags.reverse()
 
-		compressedFlags = array.array("B")
-		compressedXs = array.array("B")
-		compressedYs = array.array("B")
-		coords = iter(deltas)
+		compressedFlags = bytearray()
 		ff = []
 		for flag in flags:
 			repeatCount, flag = flag >> 8, flag & 0xFF
@@ -690,18 +843,12 @@ class Glyph(object):
 				compressedFlags.append(repeatCount)
 			else:
 				assert(repeatCount == 0)
-			for i in range(1 + repeatCount):
-				x,y = next(coords)
-				flagEncodeCoords(flag, x, y, compressedXs, compressedYs)
-				ff.append(flag)
-		try:
-			next(coords)
+			ff.extend([flag] * (1 + repeatCount))
+		if len(ff) != len(xs):
 			raise Exception("internal error")
-		except StopIteration:
-			pass
-		compressedFlags = compressedFlags.tostring()
-		compressedXs = compressedXs.tostring()
-		compressedYs = compressedYs.tostring()
+		compressedFlags = bytes(compressedFlags)
+		compressedXs = _encodeCoords(ff, xs, flagXShort, flagXsame, _xCoordFormats)
+		compressedYs = _encodeCoords(ff, ys, flagYShort, flagYsame, _yCoordFormats)
 
 		return (compressedFlags, compressedXs, compressedYs)
 
@@ -759,7 +906,7 @@ class Glyph(object):
 
 				self.xMin, self.yMin, self.xMax, self.yMax = calcIntBounds(onCurveCoords)
 			else:
-				self.xMin, self.yMin, self.xMax, self.yMax = calcIntBounds(coords)
+				self.xMin, self.yMin, self.xMax, self.yMax = coords.calcIntBounds()
 		else:
 			self.xMin, self.yMin, self.xMax, self.yMax = (0, 0, 0, 0)
 
@@ -1155,12 +1302,28 @@ class GlyphComponent(object):
 		result = self.__eq__(other)
 		return result if result is NotImplemented else not result
 
+# GlyphCoordinates with at least this many values (twice the number of points)
+# are transformed with numpy, when it's available; for smaller arrays the
+# overhead of converting to numpy makes the pure-python loops faster.
+NUMPY_MIN_SIZE = 64
+
+
+def _numpyView(a):
+	"""Return a numpy array sharing the memory of the array.array 'a'."""
+	return numpy.frombuffer(a, dtype=numpy.float32 if a.typecode == 'f' else numpy.int16)
+
+
 class GlyphCoordinates(object):
 
 	def __init__(self, iterable=[], typecode="h"):
 		self._a = array.array(typecode)
 		self.extend(iterable)
 
+	@property
+	def array(self):
+		"""The flat array.array of the x and y values of the points."""
+		return self._a
+
 	def isFloat(self):
 		return self._a.typecode == 'f'
 
@@ -1179,9 +1342,31 @@ class GlyphCoordinates(object):
 				self._ensureFloat()
 		return p
 
+	def _useNumpy(self):
+		return haveNumpy and len(self._a) >= NUMPY_MIN_SIZE
+
+	def _toNumpy(self):
+		# Compute in double precision (or 64-bit integers), like the
+		# pure-python code does, and only round when storing the result.
+		return _numpyView(self._a).astype(
+				numpy.float64 if self.isFloat() else numpy.int64)
+
+	def _fromNumpy(self, values):
+		if values.dtype.kind == 'f':
+			if not self.isFloat():
+				self._a = array.array("f", [0]) * len(values)
+		else:
+			if self.isFloat():
+				self._a = array.array("h", [0]) * len(values)
+			if values.min() < -0x8000 or values.max() > 0x7FFF:
+				raise OverflowError("signed short integer is out of range")
+		_numpyView(self._a)[:] = values
+
 	@staticmethod
 	def zeros(count):
-		return GlyphCoordinates([(0,0)] * count)
+		c = GlyphCoordinates()
+		c._a.extend(array.array("h", [0]) * (2 * count))
+		return c
 
 	def copy(self):
 		c = GlyphCoordinates(typecode=self._a.typecode)
@@ -1221,19 +1406,49 @@ class GlyphCoordinates(object):
 		self._a.extend(tuple(p))
 
 	def extend(self, iterable):
+		if isinstance(iterable, GlyphCoordinates):
+			if iterable.isFloat():
+				self._ensureFloat()
+			other = iterable._a
+			if other.typecode != self._a.typecode:
+				other = other.tolist()
+			self._a.extend(other)
+			return
 		for p in iterable:
 			p = self._checkFloat(p)
 			self._a.extend(p)
 
+	def calcIntBounds(self):
+		"""Return the integer bounding rectangle of the points, like
+		arrayTools.calcIntBounds, computed on the flat array.
+		>>> GlyphCoordinates([(1, 5), (-2.5, 3), (4, 3.75)]).calcIntBounds()
+		(-2, 3, 4, 5)
+		"""
+		a = self._a
+		if not a:
+			return 0, 0, 0, 0
+		xs = a[0::2]
+		ys = a[1::2]
+		return tuple(round(v) for v in (min(xs), min(ys), max(xs), max(ys)))
+
 	def toInt(self):
 		if not self.isFloat():
 			return
+		if self._useNumpy():
+			# numpy.rint rounds half to even, like the round() of py23
+			# does, on Python 2 too
+			self._fromNumpy(numpy.rint(self._toNumpy()).astype(numpy.int64))
+			return
 		a = array.array("h")
 		for n in self._a:
 			a.append(int(round(n)))
 		self._a = a
 
 	def relativeToAbsolute(self):
+		if self._useNumpy():
+			values = self._toNumpy().reshape(-1, 2)
+			self._fromNumpy(numpy.cumsum(values, axis=0).ravel())
+			return
 		a = self._a
 		x,y = 0,0
 		for i in range(len(a) // 2):
@@ -1241,6 +1456,11 @@ class GlyphCoordinates(object):
 			a[2*i+1] = y = a[2*i+1] + y
 
 	def absoluteToRelative(self):
+		if self._useNumpy():
+			values = self._toNumpy()
+			values[2:] -= values[:-2].copy()
+			self._fromNumpy(values)
+			return
 		a = self._a
 		x,y = 0,0
 		for i in range(len(a) // 2):
@@ -1256,6 +1476,12 @@ class GlyphCoordinates(object):
 		>>> GlyphCoordinates([(1,2)]).translate((.5,0))
 		"""
 		(x,y) = self._checkFloat(p)
+		if self._useNumpy():
+			values = self._toNumpy()
+			values[0::2] += x
+			values[1::2] += y
+			self._fromNumpy(values)
+			return
 		a = self._a
 		for i in range(len(a) // 2):
 			a[2*i  ] += x
@@ -1266,6 +1492,12 @@ class GlyphCoordinates(object):
 		>>> GlyphCoordinates([(1,2)]).scale((.5,0))
 		"""
 		(x,y) = self._checkFloat(p)
+		if self._useNumpy():
+			values = self._toNumpy()
+			values[0::2] *= x
+			values[1::2] *= y
+			self._fromNumpy(values)
+			return
 		a = self._a
 		for i in range(len(a) // 2):
 			a[2*i  ] *= x
@@ -1275,6 +1507,14 @@ class GlyphCoordinates(object):
 		"""
 		>>> GlyphCoordinates([(1,2)]).transform(((.5,0),(.2,.5)))
 		"""
+		if self._useNumpy():
+			values = _numpyView(self._a).astype(numpy.float64).reshape(-1, 2)
+			values = values.dot(numpy.array(t, dtype=numpy.float64)).ravel()
+			if not self.isFloat() and (numpy.trunc(values) == values).all():
+				# like _checkFloat, keep integer coordinates if possible
+				values = values.astype(numpy.int64)
+			self._fromNumpy(values)
+			return
 		a = self._a
 		for i in range(len(a) // 2):
 			x = a[2*i  ]
@@ -1343,6 +1583,9 @@ class GlyphCoordinates(object):
 		GlyphCoordinates([(1, 2)])
 		"""
 		r = self.copy()
+		if r._useNumpy():
+			r._fromNumpy(-r._toNumpy())
+			return r
 		a = r._a
 		for i in range(len(a)):
 			a[i] = -a[i]
@@ -1359,6 +1602,9 @@ class GlyphCoordinates(object):
 		GlyphCoordinates([(1.5, 2.0)])
 		"""
 		r = self.copy()
+		if r._useNumpy():
+			r._fromNumpy(numpy.abs(r._toNumpy()))
+			return r
 		a = r._a
 		for i in range(len(a)):
 			a[i] = abs(a[i])
@@ -1398,6 +1644,10 @@ class GlyphCoordinates(object):
 			return self
 		if isinstance(other, GlyphCoordinates):
 			if other.isFloat(): self._ensureFloat()
+			if self._useNumpy():
+				assert len(self._a) == len(other._a)
+				self._fromNumpy(self._toNumpy() + other._toNumpy())
+				return self
 			other = other._a
 			a = self._a
 			assert len(a) == len(other)
@@ -1423,6 +1673,10 @@ class GlyphCoordinates(object):
 			return self
 		if isinstance(other, GlyphCoordinates):
 			if other.isFloat(): self._ensureFloat()
+			if self._useNumpy():
+				assert len(self._a) == len(other._a)
+				self._fromNumpy(self._toNumpy() - other._toNumpy())
+				return self
 			other = other._a
 			a = self._a
 			assert len(a) == len(other)
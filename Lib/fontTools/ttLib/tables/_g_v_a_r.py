@@ -11,6 +11,10 @@ import logging
 import struct
 import sys
 import fontTools.ttLib.tables.TupleVariation as tv
+try:
+	from collections.abc import MutableMapping
+except ImportError:
+	from UserDict import DictMixin as MutableMapping
 
 
 log = logging.getLogger(__name__)
@@ -44,6 +48,10 @@ GVAR_HEADER_SIZE = sstruct.calcsize(GVAR_HEADER_FORMAT)
 class table__g_v_a_r(DefaultTable.DefaultTable):
 	dependencies = ["fvar", "glyf"]
 
+	# when the font is loaded lazily, the variation data of the glyphs can
+	# be sliced from a memoryview of the table without copying
+	acceptsBuffer = True
+
 	def __init__(self, tag=None):
 		DefaultTable.DefaultTable.__init__(self, tag)
 		self.version, self.reserved = 1, 0
@@ -51,12 +59,20 @@ class table__g_v_a_r(DefaultTable.DefaultTable):
 
 	def compile(self, ttFont):
 		axisTags = [axis.axisTag for axis in ttFont["fvar"].axes]
-		sharedTuples =  tv.compileSharedTuples(
-			axisTags, itertools.chain(*self.variations.values()))
+		getRawData = None
+		if isinstance(self.variations, LazyGlyphVariations) and \
+				self.variations.hasRawData():
+			# The glyphs that were never accessed are copied verbatim: their
+			# data refers to the original shared tuples, which are kept.
+			sharedTuples = self.variations.sharedTuples
+			getRawData = self.variations.getRawData
+		else:
+			sharedTuples = tv.compileSharedTuples(
+				axisTags, itertools.chain(*self.variations.values()))
 		sharedTupleIndices = {coord:i for i, coord in enumerate(sharedTuples)}
 		sharedTupleSize = sum([len(c) for c in sharedTuples])
 		compiledGlyphs = self.compileGlyphs_(
-			ttFont, axisTags, sharedTupleIndices)
+			ttFont, axisTags, sharedTupleIndices, getRawData)
 		offset = 0
 		offsets = []
 		for glyph in compiledGlyphs:
@@ -81,9 +97,14 @@ class table__g_v_a_r(DefaultTable.DefaultTable):
 		result.extend(compiledGlyphs)
 		return bytesjoin(result)
 
-	def compileGlyphs_(self, ttFont, axisTags, sharedCoordIndices):
+	def compileGlyphs_(self, ttFont, axisTags, sharedCoordIndices, getRawData=None):
 		result = []
 		for glyphName in ttFont.getGlyphOrder():
+			if getRawData is not None:
+				data = getRawData(glyphName)
+				if data is not None:
+					result.append(data)
+					continue
 			glyph = ttFont["glyf"][glyphName]
 			pointCount = self.getNumPoints_(glyph)
 			variations = self.variations.get(glyphName, [])
@@ -92,6 +113,8 @@ class table__g_v_a_r(DefaultTable.DefaultTable):
 		return result
 
 	def decompile(self, data, ttFont):
+		if not ttFont.lazy:
+			data = ttLib._bufferToBytes(data)
 		axisTags = [axis.axisTag for axis in ttFont["fvar"].axes]
 		glyphs = ttFont.getGlyphOrder()
 		sstruct.unpack(GVAR_HEADER_FORMAT, data[0:GVAR_HEADER_SIZE], self)
@@ -100,8 +123,20 @@ class table__g_v_a_r(DefaultTable.DefaultTable):
 		offsets = self.decompileOffsets_(data[GVAR_HEADER_SIZE:], tableFormat=(self.flags & 1), glyphCount=self.glyphCount)
 		sharedCoords = tv.decompileSharedTuples(
 			axisTags, self.sharedTupleCount, data, self.offsetToSharedTuples)
-		self.variations = {}
 		offsetToData = self.offsetToGlyphVariationData
+		if ttFont.lazy:
+			# Don't decode any variation yet: the variations of each glyph
+			# are decoded from its slice of the table data on first access.
+			tupleSize = 2 * self.axisCount
+			start = self.offsetToSharedTuples
+			sharedTuples = [ttLib._bufferToBytes(
+				data[start + i * tupleSize : start + (i + 1) * tupleSize])
+				for i in range(self.sharedTupleCount)]
+			self.variations = LazyGlyphVariations(
+				data, offsetToData, offsets, glyphs, ttFont, axisTags,
+				sharedCoords, sharedTuples)
+			return
+		self.variations = {}
 		for i in range(self.glyphCount):
 			glyphName = glyphs[i]
 			glyph = ttFont["glyf"][glyphName]
@@ -207,6 +242,112 @@ class table__g_v_a_r(DefaultTable.DefaultTable):
 			return len(getattr(glyph, "coordinates", [])) + NUM_PHANTOM_POINTS
 
 
+class LazyGlyphVariations(MutableMapping):
+
+	"""Dictionary of glyph names to lists of TupleVariations, used by the
+	'gvar' table when the font is loaded with lazy=True. The variations of
+	a glyph are decoded on first access, from the table data between its
+	offsets; the number of points of the glyph comes from the 'glyf' table
+	of ttFont.
+
+	'sharedTuples' are the compiled shared tuples of the table, which the
+	data of the glyphs refers to.
+	"""
+
+	def __init__(self, data, offsetToData, offsets, glyphNames, ttFont,
+	             axisTags, sharedCoords, sharedTuples):
+		self._data = data
+		self._offsetToData = offsetToData
+		self._offsets = offsets
+		self._glyphNames = glyphNames
+		self._ttFont = ttFont
+		self._axisTags = axisTags
+		self._sharedCoords = sharedCoords
+		self.sharedTuples = sharedTuples
+		# glyphs whose variations have not been decoded yet, mapped to
+		# their index
+		self._pending = {glyphName: i for i, glyphName in enumerate(glyphNames)}
+		self._variations = {}
+
+	def _getRawData(self, index):
+		start = self._offsetToData + int(self._offsets[index])
+		end = self._offsetToData + int(self._offsets[index+1])
+		data = self._data[start:end]
+		if len(data) != end - start:
+			raise TTLibError("not enough 'gvar' table data")
+		return ttLib._bufferToBytes(data)
+
+	def hasRawData(self):
+		"""Return True if the variations of some glyphs were never
+		accessed."""
+		return bool(self._pending)
+
+	def getRawData(self, glyphName):
+		"""Return the original binary data of the variations of the glyph
+		if they were never accessed, else None.
+		"""
+		index = self._pending.get(glyphName)
+		if index is None:
+			return None
+		return self._getRawData(index)
+
+	def __getitem__(self, glyphName):
+		try:
+			return self._variations[glyphName]
+		except KeyError:
+			pass
+		index = self._pending[glyphName]
+		glyph = self._ttFont["glyf"][glyphName]
+		numPointsInGlyph = table__g_v_a_r.getNumPoints_(glyph)
+		variations = self._variations[glyphName] = decompileGlyph_(
+			numPointsInGlyph, self._sharedCoords, self._axisTags,
+			self._getRawData(index))
+		del self._pending[glyphName]
+		return variations
+
+	def __setitem__(self, glyphName, variations):
+		self._pending.pop(glyphName, None)
+		self._variations[glyphName] = variations
+
+	def __delitem__(self, glyphName):
+		if glyphName in self._variations:
+			del self._variations[glyphName]
+		else:
+			del self._pending[glyphName]
+
+	def __contains__(self, glyphName):
+		return glyphName in self._variations or glyphName in self._pending
+
+	has_key = __contains__
+
+	def __len__(self):
+		return len(self._variations) + len(self._pending)
+
+	def __iter__(self):
+		# original glyphs first, in glyph order, then the added ones
+		count = 0
+		for glyphName in self._glyphNames:
+			if glyphName in self:
+				count += 1
+				yield glyphName
+		if count < len(self):
+			glyphNames = set(self._glyphNames)
+			for glyphName in list(self._variations):
+				if glyphName not in glyphNames:
+					yield glyphName
+
+	def keys(self):
+		return list(self)
+
+	def __getstate__(self):
+		# Pickle or copy the variations of all the glyphs, decoded: the
+		# pending ones need the font, and the table data, which may be a
+		# slice of a memory-mapped font file.
+		for glyphName in list(self._pending):
+			self[glyphName]
+		return dict(self.__dict__, _data=b"", _ttFont=None)
+
+
 def compileGlyph_(variations, pointCount, axisTags, sharedCoordIndices):
 	tupleVariationCount, tuples, data = tv.compileTupleVariationStore(
 		variations, pointCount, axisTags, sharedCoordIndices)
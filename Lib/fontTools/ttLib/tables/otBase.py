@@ -34,6 +34,8 @@ class BaseTTXConverter(DefaultTable):
 	we use for OpenType tables, which is necessarily subtly different.
 	"""
 
+	acceptsBuffer = True
+
 	def decompile(self, data, font):
 		from . import otTables
 		reader = OTTableReader(data, tableTag=self.tableTag)
@@ -61,33 +63,24 @@ class BaseTTXConverter(DefaultTable):
 				pos's and offset are known.
 
 				If a lookup subtable overflows an offset, we have to start all over.
+				All the overflows found while assembling the data are fixed
+				together before the table is compiled again, so the number of
+				passes doesn't grow with the number of overflowing offsets.
 		"""
-		overflowRecord = None
+		from .otTables import fixOverFlows
 
 		while True:
-			try:
-				writer = OTTableWriter(tableTag=self.tableTag)
-				self.table.compile(writer, font)
-				return writer.getAllData()
-
-			except OTLOffsetOverflowError as e:
-
-				if overflowRecord == e.value:
-					raise # Oh well...
-
-				overflowRecord = e.value
-				log.info("Attempting to fix OTLOffsetOverflowError %s", e)
-				lastItem = overflowRecord
-
-				ok = 0
-				if overflowRecord.itemName is None:
-					from .otTables import fixLookupOverFlows
-					ok = fixLookupOverFlows(font, overflowRecord)
-				else:
-					from .otTables import fixSubTableOverFlows
-					ok = fixSubTableOverFlows(font, overflowRecord)
-				if not ok:
-					raise
+			writer = OTTableWriter(tableTag=self.tableTag)
+			self.table.compile(writer, font)
+			overflowRecords = []
+			data = writer.getAllData(overflowRecords)
+			if not overflowRecords:
+				return data
+
+			log.info("Attempting to fix %d OTLOffsetOverflowErrors",
+				len(overflowRecords))
+			if not fixOverFlows(font, overflowRecords):
+				raise OTLOffsetOverflowError(overflowRecords[0])
 
 	def toXML(self, writer, font):
 		self.table.toXML2(writer, font)
@@ -100,6 +93,16 @@ class BaseTTXConverter(DefaultTable):
 		self.table.fromXML(name, attrs, content, font)
 
 
+# precompiled readers for OTTableReader
+_unpackInt8 = struct.Struct(">b").unpack_from
+_unpackUInt8 = struct.Struct(">B").unpack_from
+_unpackShort = struct.Struct(">h").unpack_from
+_unpackUShort = struct.Struct(">H").unpack_from
+_unpackUInt24 = struct.Struct(">BH").unpack_from
+_unpackLong = struct.Struct(">l").unpack_from
+_unpackULong = struct.Struct(">L").unpack_from
+
+
 class OTTableReader(object):
 
 	"""Helper class to retrieve data from an OpenType table."""
@@ -130,15 +133,14 @@ class OTTableReader(object):
 
 	def readUShort(self):
 		pos = self.pos
-		newpos = pos + 2
-		value, = struct.unpack(">H", self.data[pos:newpos])
-		self.pos = newpos
+		value, = _unpackUShort(self.data, pos)
+		self.pos = pos + 2
 		return value
 
 	def readUShortArray(self, count):
 		pos = self.pos
 		newpos = pos + count * 2
-		value = array.array("H", self.data[pos:newpos])
+		value = array.array("H", bytes(self.data[pos:newpos]))
 		if sys.byteorder != "big":
 			value.byteswap()
 		self.pos = newpos
@@ -146,50 +148,44 @@ class OTTableReader(object):
 
 	def readInt8(self):
 		pos = self.pos
-		newpos = pos + 1
-		value, = struct.unpack(">b", self.data[pos:newpos])
-		self.pos = newpos
+		value, = _unpackInt8(self.data, pos)
+		self.pos = pos + 1
 		return value
 
 	def readShort(self):
 		pos = self.pos
-		newpos = pos + 2
-		value, = struct.unpack(">h", self.data[pos:newpos])
-		self.pos = newpos
+		value, = _unpackShort(self.data, pos)
+		self.pos = pos + 2
 		return value
 
 	def readLong(self):
 		pos = self.pos
-		newpos = pos + 4
-		value, = struct.unpack(">l", self.data[pos:newpos])
-		self.pos = newpos
+		value, = _unpackLong(self.data, pos)
+		self.pos = pos + 4
 		return value
 
 	def readUInt8(self):
 		pos = self.pos
-		newpos = pos + 1
-		value, = struct.unpack(">B", self.data[pos:newpos])
-		self.pos = newpos
+		value, = _unpackUInt8(self.data, pos)
+		self.pos = pos + 1
 		return value
 
 	def readUInt24(self):
 		pos = self.pos
-		newpos = pos + 3
-		value, = struct.unpack(">l", b'\0'+self.data[pos:newpos])
-		self.pos = newpos
-		return value
+		hi, lo = _unpackUInt24(self.data, pos)
+		self.pos = pos + 3
+		return (hi << 16) | lo
 
 	def readULong(self):
 		pos = self.pos
-		newpos = pos + 4
-		value, = struct.unpack(">L", self.data[pos:newpos])
-		self.pos = newpos
+		value, = _unpackULong(self.data, pos)
+		self.pos = pos + 4
 		return value
 
 	def readTag(self):
 		pos = self.pos
 		newpos = pos + 4
-		value = Tag(self.data[pos:newpos])
+		value = Tag(bytes(self.data[pos:newpos]))
 		assert len(value) == 4, value
 		self.pos = newpos
 		return value
@@ -248,8 +244,11 @@ class OTTableWriter(object):
 				l = l + len(item)
 		return l
 
-	def getData(self):
-		"""Assemble the data for this writer/table, without subtables."""
+	def getData(self, overflowRecords=None):
+		"""Assemble the data for this writer/table, without subtables.
+		If overflowRecords is a list, an OverflowErrorRecord is appended
+		to it for each offset that overflows, instead of raising
+		OTLOffsetOverflowError on the first one."""
 		items = list(self.items)  # make a shallow copy
 		pos = self.pos
 		numItems = len(items)
@@ -266,7 +265,10 @@ class OTTableWriter(object):
 						# provide data to fix overflow problem.
 						overflowErrorRecord = self.getOverflowErrorRecord(item)
 
-						raise OTLOffsetOverflowError(overflowErrorRecord)
+						if overflowRecords is None:
+							raise OTLOffsetOverflowError(overflowErrorRecord)
+						overflowRecords.append(overflowErrorRecord)
+						items[i] = packUShort(0)
 
 		return bytesjoin(items)
 
@@ -369,8 +371,10 @@ class OTTableWriter(object):
 
 		selfTables.append(self)
 
-	def getAllData(self):
-		"""Assemble all data, including all subtables."""
+	def getAllData(self, overflowRecords=None):
+		"""Assemble all data, including all subtables.  If overflowRecords
+		is a list, all the offset overflows are collected in it, rather
+		than raising OTLOffsetOverflowError on the first one."""
 		internedTables = {}
 		self._doneWriting(internedTables)
 		tables = []
@@ -392,11 +396,11 @@ class OTTableWriter(object):
 
 		data = []
 		for table in tables:
-			tableData = table.getData()
+			tableData = table.getData(overflowRecords)
 			data.append(tableData)
 
 		for table in extTables:
-			tableData = table.getData()
+			tableData = table.getData(overflowRecords)
 			data.append(tableData)
 
 		return bytesjoin(data)
@@ -538,6 +542,16 @@ class BaseTable(object):
 
 		raise AttributeError(attr)
 
+	def __getstate__(self):
+		# Pickle or copy the decompiled table, rather than its reader.
+		# Defining this also saves going through __getattr__ every time.
+		self.ensureDecompiled()
+		return self.__dict__
+
+	def __setstate__(self, state):
+		# Likewise, unpickling looks up __setstate__ on every table.
+		self.__dict__.update(state)
+
 	def ensureDecompiled(self):
 		reader = self.__dict__.get("reader")
 		if reader:
@@ -564,6 +578,11 @@ class BaseTable(object):
 	def getConverters(self):
 		return self.converters
 
+	def getReadConverters(self):
+		"""Return the converters used by decompile(), where runs of
+		fixed-size fields are merged into a single otConverters.FieldRun."""
+		return self.readConverters
+
 	def getConverterByName(self, name):
 		return self.convertersByName[name]
 
@@ -595,7 +614,10 @@ class BaseTable(object):
 		self.readFormat(reader)
 		table = {}
 		self.__rawTable = table  # for debugging
-		for conv in self.getConverters():
+		for conv in self.getReadConverters():
+			if conv.isFieldRun:
+				conv.readFields(reader, font, table)
+				continue
 			if conv.name == "SubTable":
 				conv = conv.getConverter(reader.tableTag,
 						table["LookupType"])
@@ -619,7 +641,7 @@ class BaseTable(object):
 				if conv.isPropagated:
 					reader[conv.name] = table[conv.name]
 
-		if hasattr(self, 'postRead'):
+		if hasattr(self.__class__, 'postRead'):
 			self.postRead(table, font)
 		else:
 			self.__dict__.update(table)
@@ -771,6 +793,9 @@ class FormatSwitchingBaseTable(BaseTable):
 	def getConverters(self):
 		return self.converters[self.Format]
 
+	def getReadConverters(self):
+		return self.readConverters[self.Format]
+
 	def getConverterByName(self, name):
 		return self.convertersByName[self.Format][name]
 
@@ -833,20 +858,31 @@ class ValueRecordFactory(object):
 			if valueFormat & mask:
 				format.append((name, isDevice, signed))
 		self.format = format
+		self.structFormat = "".join("h" if signed else "H" for _, _, signed in format)
+		self.struct = struct.Struct(">" + self.structFormat)
+		self.names = [name for name, _, _ in format]
+		self.hasDevice = any(isDevice for _, isDevice, _ in format)
 
 	def __len__(self):
 		return len(self.format)
 
 	def readValueRecord(self, reader, font):
+		if not self.format:
+			return None
+		values = self.struct.unpack_from(reader.data, reader.pos)
+		reader.pos += self.struct.size
+		return self.fromValues(values, reader, font)
+
+	def fromValues(self, values, reader, font):
+		"""Build a ValueRecord from its unpacked values."""
 		format = self.format
 		if not format:
 			return None
 		valueRecord = ValueRecord()
-		for name, isDevice, signed in format:
-			if signed:
-				value = reader.readShort()
-			else:
-				value = reader.readUShort()
+		if not self.hasDevice:
+			valueRecord.__dict__.update(zip(self.names, values))
+			return valueRecord
+		for (name, isDevice, signed), value in zip(format, values):
 			if isDevice:
 				if value:
 					from . import otTables
@@ -1,11 +1,13 @@
 from __future__ import print_function, division, absolute_import
 from fontTools.misc.py23 import *
+from fontTools.misc.py23 import Tag as _Tag  # shadowed by the Tag converter
 from fontTools.misc.textTools import safeEval
 from fontTools.misc.fixedTools import (
 	fixedToFloat as fi2fl, floatToFixed as fl2fi, ensureVersionIsLong as fi2ve,
 	versionToFixed as ve2fi)
 from .otBase import ValueRecordFactory, CountReference
 from functools import partial
+import struct
 import logging
 
 
@@ -60,6 +62,68 @@ def buildConverters(tableSpec, tableNamespace):
 	return converters, convertersByName
 
 
+def buildReadConverters(converters):
+	"""Given the converters of a table, return the list of converters
+	used to decompile it, where each run of consecutive fixed-size fields
+	that need no state from the fields before them is replaced by a single
+	FieldRun, which reads them with one precompiled struct."""
+	readConverters = []
+	run = []
+	for conv in converters:
+		if (conv.structFormat is not None and not conv.repeat and not conv.aux
+				and conv.name not in ("SubTable", "ExtSubTable", "FeatureParams")):
+			run.append(conv)
+			continue
+		if run:
+			readConverters.append(FieldRun(run))
+			run = []
+		readConverters.append(conv)
+	if run:
+		readConverters.append(FieldRun(run))
+	return readConverters
+
+
+class FieldRun(object):
+
+	"""Reads a run of fixed-size fields with a single struct.unpack_from()
+	call, and stores them in the table dict as the converters' read()
+	methods would."""
+
+	isFieldRun = True
+
+	def __init__(self, converters):
+		self.converters = converters
+		self.format = "".join(conv.structFormat for conv in converters)
+		st = struct.Struct(">" + self.format)
+		self.unpack = st.unpack_from
+		self.size = st.size
+		self.names = [conv.name for conv in converters]
+		# fields that need converting or propagating, in order, since
+		# sub-tables read from offsets see the propagated values before them
+		self.special = [(i, conv.name, conv.fromStructValue, conv.isPropagated)
+				for i, conv in enumerate(converters)
+				if conv.fromStructValue is not None or conv.isPropagated]
+
+	def readFields(self, reader, font, tableDict):
+		pos = reader.pos
+		values = self.unpack(reader.data, pos)
+		reader.pos = pos + self.size
+		self.fromValues(values, reader, font, tableDict)
+
+	def fromValues(self, values, reader, font, tableDict):
+		"""Store the unpacked values of the run's fields in tableDict."""
+		tableDict.update(zip(self.names, values))
+		for i, name, convert, isPropagated in self.special:
+			value = values[i]
+			if convert is not None:
+				value = tableDict[name] = convert(value, reader, font)
+			if isPropagated:
+				reader[name] = value
+
+	def __repr__(self):
+		return "FieldRun of " + repr(self.names)
+
+
 class _MissingItem(tuple):
 	__slots__ = ()
 
@@ -83,11 +147,23 @@ class _LazyList(UserList):
 			self.data[k] = item
 		return item
 
+	def __reduce__(self):
+		# Pickle or copy the items, rather than the reader.
+		return (list, (self[:],))
+
 class BaseConverter(object):
 
 	"""Base class for converter objects. Apart from the constructor, this
 	is an abstract class."""
 
+	isFieldRun = False
+
+	# Fixed-size values that read() unpacks from a single struct format
+	# character, optionally converting them with fromStructValue(value,
+	# reader, font), can be read in bulk by a FieldRun.
+	structFormat = None
+	fromStructValue = None
+
 	def __init__(self, name, repeat, aux, tableClass=None):
 		self.name = name
 		self.repeat = repeat
@@ -104,6 +180,14 @@ class BaseConverter(object):
 			recordSize = self.getRecordSize(reader)
 			if recordSize is NotImplemented:
 				lazy = False
+		if not lazy and self.structFormat is not None:
+			# read all the values with a single struct
+			pos = reader.pos
+			values = struct.unpack_from(">" + self.structFormat * count, reader.data, pos)
+			reader.pos = pos + self.staticSize * count
+			if self.fromStructValue is None:
+				return list(values)
+			return [self.fromStructValue(value, reader, font) for value in values]
 		if not lazy:
 			l = []
 			for i in range(count):
@@ -158,6 +242,7 @@ class IntValue(SimpleValue):
 
 class Long(IntValue):
 	staticSize = 4
+	structFormat = "l"
 	def read(self, reader, font, tableDict):
 		return reader.readLong()
 	def write(self, writer, font, tableDict, value, repeatIndex=None):
@@ -165,6 +250,7 @@ class Long(IntValue):
 
 class ULong(IntValue):
 	staticSize = 4
+	structFormat = "L"
 	def read(self, reader, font, tableDict):
 		return reader.readULong()
 	def write(self, writer, font, tableDict, value, repeatIndex=None):
@@ -172,6 +258,7 @@ class ULong(IntValue):
 
 class Short(IntValue):
 	staticSize = 2
+	structFormat = "h"
 	def read(self, reader, font, tableDict):
 		return reader.readShort()
 	def write(self, writer, font, tableDict, value, repeatIndex=None):
@@ -179,6 +266,7 @@ class Short(IntValue):
 
 class UShort(IntValue):
 	staticSize = 2
+	structFormat = "H"
 	def read(self, reader, font, tableDict):
 		return reader.readUShort()
 	def write(self, writer, font, tableDict, value, repeatIndex=None):
@@ -186,6 +274,7 @@ class UShort(IntValue):
 
 class Int8(IntValue):
 	staticSize = 1
+	structFormat = "b"
 	def read(self, reader, font, tableDict):
 		return reader.readInt8()
 	def write(self, writer, font, tableDict, value, repeatIndex=None):
@@ -193,6 +282,7 @@ class Int8(IntValue):
 
 class UInt8(IntValue):
 	staticSize = 1
+	structFormat = "B"
 	def read(self, reader, font, tableDict):
 		return reader.readUInt8()
 	def write(self, writer, font, tableDict, value, repeatIndex=None):
@@ -218,13 +308,17 @@ class ComputedULong(ComputedInt, ULong):
 
 class Tag(SimpleValue):
 	staticSize = 4
+	structFormat = "4s"
 	def read(self, reader, font, tableDict):
 		return reader.readTag()
+	def fromStructValue(self, value, reader, font):
+		return _Tag(value)
 	def write(self, writer, font, tableDict, value, repeatIndex=None):
 		writer.writeTag(value)
 
 class GlyphID(SimpleValue):
 	staticSize = 2
+	structFormat = "H"
 	def readArray(self, reader, font, tableDict, count):
 		glyphOrder = font.getGlyphOrder()
 		gids = reader.readUShortArray(count)
@@ -236,6 +330,8 @@ class GlyphID(SimpleValue):
 		return l
 	def read(self, reader, font, tableDict):
 		return font.getGlyphName(reader.readUShort())
+	def fromStructValue(self, value, reader, font):
+		return font.getGlyphName(value)
 	def write(self, writer, font, tableDict, value, repeatIndex=None):
 		writer.writeUShort(font.getGlyphID(value))
 
@@ -261,30 +357,41 @@ class FloatValue(SimpleValue):
 
 class DeciPoints(FloatValue):
 	staticSize = 2
+	structFormat = "H"
 	def read(self, reader, font, tableDict):
 		return reader.readUShort() / 10
+	def fromStructValue(self, value, reader, font):
+		return value / 10
 
 	def write(self, writer, font, tableDict, value, repeatIndex=None):
 		writer.writeUShort(int(round(value * 10)))
 
 class Fixed(FloatValue):
 	staticSize = 4
+	structFormat = "l"
 	def read(self, reader, font, tableDict):
 		return  fi2fl(reader.readLong(), 16)
+	def fromStructValue(self, value, reader, font):
+		return fi2fl(value, 16)
 	def write(self, writer, font, tableDict, value, repeatIndex=None):
 		writer.writeLong(fl2fi(value, 16))
 
 class F2Dot14(FloatValue):
 	staticSize = 2
+	structFormat = "h"
 	def read(self, reader, font, tableDict):
 		return  fi2fl(reader.readShort(), 14)
+	def fromStructValue(self, value, reader, font):
+		return fi2fl(value, 14)
 	def write(self, writer, font, tableDict, value, repeatIndex=None):
 		writer.writeShort(fl2fi(value, 14))
 
 class Version(BaseConverter):
 	staticSize = 4
+	structFormat = "l"
 	def read(self, reader, font, tableDict):
-		value = reader.readLong()
+		return self.fromStructValue(reader.readLong(), reader, font)
+	def fromStructValue(self, value, reader, font):
 		assert (value >> 16) == 1, "Unsupported version 0x%08x" % value
 		return value
 	def write(self, writer, font, tableDict, value, repeatIndex=None):
@@ -311,6 +418,64 @@ class Struct(BaseConverter):
 	def getRecordSize(self, reader):
 		return self.tableClass and self.tableClass.getRecordSize(reader)
 
+	def readArray(self, reader, font, tableDict, count):
+		parts = self.getRecordParts()
+		if parts is not None and not (font.lazy and count > 8):
+			return self.readRecords(reader, font, count, parts)
+		return BaseConverter.readArray(self, reader, font, tableDict, count)
+
+	def getRecordParts(self):
+		"""Return the read converters of tableClass if they are all
+		FieldRuns or ValueRecords, whose layout is the same for all the
+		records of an array, so that these can be read in bulk; or else
+		return None."""
+		try:
+			return self._recordParts
+		except AttributeError:
+			pass
+		parts = getattr(self.tableClass, "readConverters", None)
+		if (not isinstance(parts, list) or hasattr(self.tableClass, "postRead") or
+				not all(conv.isFieldRun or (type(conv) is ValueRecord and
+					not conv.repeat and not conv.aux) for conv in parts)):
+			parts = None
+		self._recordParts = parts
+		return parts
+
+	def readRecords(self, reader, font, count, parts):
+		"""Read an array of 'count' records with a single
+		struct.unpack_from() call."""
+		layout = []
+		formats = []
+		numValues = 0
+		for conv in parts:
+			if conv.isFieldRun:
+				factory = None
+				formats.append(conv.format)
+				size = len(conv.names)
+			else:
+				factory = reader[conv.which]
+				formats.append(factory.structFormat)
+				size = len(factory)
+			layout.append((numValues, numValues + size, conv, factory))
+			numValues += size
+		recordFormat = "".join(formats)
+		pos = reader.pos
+		values = struct.unpack_from(">" + recordFormat * count, reader.data, pos)
+		reader.pos = pos + struct.calcsize(">" + recordFormat) * count
+		tableClass = self.tableClass
+		records = []
+		for i in range(0, numValues * count, numValues):
+			table = {}
+			for start, end, conv, factory in layout:
+				if factory is None:
+					conv.fromValues(values[i+start:i+end], reader, font, table)
+				else:
+					table[conv.name] = factory.fromValues(values[i+start:i+end], reader, font)
+			record = tableClass()
+			record.__dict__.update(table)
+			records.append(record)
+		return records
+
 	def read(self, reader, font, tableDict):
 		table = self.tableClass()
 		table.decompile(reader, font)
@@ -382,6 +547,7 @@ class Table(Struct):
 
 	longOffset = False
 	staticSize = 2
+	structFormat = "H"
 
 	def readOffset(self, reader):
 		return reader.readUShort()
@@ -392,8 +558,14 @@ class Table(Struct):
 		else:
 			writer.writeUShort(0)
 
+	def readArray(self, reader, font, tableDict, count):
+		# offsets, not inline records
+		return BaseConverter.readArray(self, reader, font, tableDict, count)
+
 	def read(self, reader, font, tableDict):
-		offset = self.readOffset(reader)
+		return self.fromStructValue(self.readOffset(reader), reader, font)
+
+	def fromStructValue(self, offset, reader, font):
 		if offset == 0:
 			return None
 		table = self.tableClass()
@@ -421,6 +593,7 @@ class LTable(Table):
 
 	longOffset = True
 	staticSize = 4
+	structFormat = "L"
 
 	def readOffset(self, reader):
 		return reader.readULong()
@@ -464,6 +637,18 @@ class ValueFormat(IntValue):
 class ValueRecord(ValueFormat):
 	def getRecordSize(self, reader):
 		return 2 * len(reader[self.which])
+	def readArray(self, reader, font, tableDict, count):
+		if font.lazy and count > 8:
+			return BaseConverter.readArray(self, reader, font, tableDict, count)
+		factory = reader[self.which]
+		numValues = len(factory)
+		if not numValues:
+			return [None] * count
+		pos = reader.pos
+		values = struct.unpack_from(">" + factory.structFormat * count, reader.data, pos)
+		reader.pos = pos + 2 * numValues * count
+		return [factory.fromValues(values[i:i+numValues], reader, font)
+			for i in range(0, numValues * count, numValues)]
 	def read(self, reader, font, tableDict):
 		return reader[self.which].readValueRecord(reader, font)
 	def write(self, writer, font, tableDict, value, repeatIndex=None):
@@ -7,7 +7,7 @@ converter objects from otConverters.py.
 from __future__ import print_function, division, absolute_import
 from fontTools.misc.py23 import *
 from fontTools.misc.textTools import safeEval
-from .otBase import BaseTable, FormatSwitchingBaseTable
+from .otBase import BaseTable, FormatSwitchingBaseTable, OverflowErrorRecord
 import operator
 import logging
 
@@ -755,6 +755,9 @@ def fixLookupOverFlows(ttf, overflowRecord):
 		extSubTable = extSubTableClass()
 		extSubTable.Format = 1
 		extSubTable.ExtSubTable = subTable
+		if hasattr(subTable, 'DontShare'):
+			# don't retry that on the wrapper in fixSubTableOverFlows
+			extSubTable.DontShare = True
 		lookup.SubTable[si] = extSubTable
 	ok = 1
 	return ok
@@ -922,11 +925,21 @@ def fixSubTableOverFlows(ttf, overflowRecord):
 		subtable.DontShare = True
 		return True
 
+	if hasattr(subtable, 'ExtSubTable'):
+		subTableType = subtable.ExtSubTable.__class__.LookupType
+	else:
+		subTableType = subtable.__class__.LookupType
+
+	# Don't add a new subtable unless we know how to split this one.
+	try:
+		splitFunc = splitTable[overflowRecord.tableType][subTableType]
+	except KeyError:
+		return ok
+
 	if hasattr(subtable, 'ExtSubTable'):
 		# We split the subtable of the Extension table, and add a new Extension table
 		# to contain the new subtable.
 
-		subTableType = subtable.ExtSubTable.__class__.LookupType
 		extSubTable = subtable
 		subtable = extSubTable.ExtSubTable
 		newExtSubTableClass = lookupTypes[overflowRecord.tableType][extSubTable.__class__.LookupType]
@@ -938,7 +951,6 @@ def fixSubTableOverFlows(ttf, overflowRecord):
 		newSubTable = newSubTableClass()
 		newExtSubTable.ExtSubTable = newSubTable
 	else:
-		subTableType = subtable.__class__.LookupType
 		newSubTableClass = lookupTypes[overflowRecord.tableType][subTableType]
 		newSubTable = newSubTableClass()
 		lookup.SubTable.insert(subIndex + 1, newSubTable)
@@ -946,12 +958,79 @@ def fixSubTableOverFlows(ttf, overflowRecord):
 	if hasattr(lookup, 'SubTableCount'): # may not be defined yet.
 		lookup.SubTableCount = lookup.SubTableCount + 1
 
-	try:
-		splitFunc = splitTable[overflowRecord.tableType][subTableType]
-	except KeyError:
+	ok = splitFunc(subtable, newSubTable, overflowRecord)
+	return ok
+
+
+def splitPairPosInParts(ttf, overflowRecord, depth):
+	"""
+	splitPairPos cuts a PairPos subtable in half, no matter where it
+	overflowed.  Cut it, and then each of its halves, again and again,
+	'depth' times, so that one that's many times too large is fixed at once.
+	"""
+	ok = fixSubTableOverFlows(ttf, overflowRecord)
+	if not ok or depth <= 1:
 		return ok
+	lookup = ttf[overflowRecord.tableType].table.LookupList.Lookup[overflowRecord.LookupListIndex]
+	subIndex = overflowRecord.SubTableIndex
+	for index in (subIndex + 1, subIndex):
+		lookup.SubTable[index].DontShare = True # as the subtable it was split from
+		record = OverflowErrorRecord((overflowRecord.tableType,
+			overflowRecord.LookupListIndex, index, overflowRecord.itemName, None))
+		splitPairPosInParts(ttf, record, depth - 1)
+	return ok
+
+def fixOverFlows(ttf, overflowRecords):
+	"""
+	Fix all the overflows found in a single attempt to compile a GSUB/GPOS
+	table, so that it doesn't have to be compiled again for each of them:
+	each overflowing subtable is split (or stops sharing its subtables),
+	and all the lookups whose offsets overflowed are promoted to Extension
+	lookups together.  Return True if anything was fixed.
+	"""
+	ok = False
+	lookupRecords = {}
+	subTableRecords = {}
+	for overflowRecord in overflowRecords:
+		lookupIndex = overflowRecord.LookupListIndex
+		if lookupIndex is None:
+			continue # not within the LookupList; nothing we can do
+		if overflowRecord.itemName is None:
+			# key by the lookup that fixLookupOverFlows would promote
+			if overflowRecord.SubTableIndex is None:
+				lookupIndex = lookupIndex - 1
+			lookupRecords.setdefault(lookupIndex, overflowRecord)
+		else:
+			key = (lookupIndex, overflowRecord.SubTableIndex)
+			subTableRecords.setdefault(key, []).append(overflowRecord)
+
+	# Go backwards, so that the subtables added by the splits don't change
+	# the indices of the ones still to be fixed.
+	for key in sorted(subTableRecords, reverse=True):
+		# The first overflow within a subtable is the one to split it at.
+		records = subTableRecords[key]
+		overflowRecord = records[0]
+		lookup = ttf[overflowRecord.tableType].table.LookupList.Lookup[key[0]]
+		subtable = lookup.SubTable[key[1]]
+		if (isinstance(getattr(subtable, 'ExtSubTable', subtable), PairPos)
+				and hasattr(subtable, 'DontShare') and overflowRecord.itemIndex):
+			# The items from the first one that overflowed on don't fit;
+			# cut the subtable into enough halves that each of them does.
+			numItems = overflowRecord.itemIndex + sum(
+				1 for record in records if record.itemName == overflowRecord.itemName)
+			depth = 1
+			while numItems > overflowRecord.itemIndex << depth:
+				depth += 1
+			fixed = splitPairPosInParts(ttf, overflowRecord, depth)
+		else:
+			fixed = fixSubTableOverFlows(ttf, overflowRecord)
+		if fixed:
+			ok = True
+
+	for lookupIndex in sorted(lookupRecords):
+		if fixLookupOverFlows(ttf, lookupRecords[lookupIndex]):
+			ok = True
 
-	ok = splitFunc(subtable, newSubTable, overflowRecord)
 	return ok
 
 # End of OverFlow logic
@@ -1023,7 +1102,7 @@ def _buildClasses():
 		featureParamTypes['cv%02d' % i] = FeatureParamsCharacterVariants
 
 	# add converters to classes
-	from .otConverters import buildConverters
+	from .otConverters import buildConverters, buildReadConverters
 	for name, table in otData:
 		m = formatPat.match(name)
 		if m:
@@ -1034,13 +1113,16 @@ def _buildClasses():
 			if not hasattr(cls, "converters"):
 				cls.converters = {}
 				cls.convertersByName = {}
+				cls.readConverters = {}
 			converters, convertersByName = buildConverters(table[1:], namespace)
 			cls.converters[format] = converters
 			cls.convertersByName[format] = convertersByName
+			cls.readConverters[format] = buildReadConverters(converters)
 			# XXX Add staticSize?
 		else:
 			cls = namespace[name]
 			cls.converters, cls.convertersByName = buildConverters(table, namespace)
+			cls.readConverters = buildReadConverters(cls.converters)
 			# XXX Add staticSize?
 
 
@@ -24,6 +24,12 @@ usage: ttx [options] inputfile1 [... inputfileN]
     -q Quiet: No messages will be written to stdout about what
        is being done.
     -a allow virtual glyphs ID's on compile or decompile.
+    -j <number> Process the input files in parallel, in that many worker
+       processes (0 means as many as there are CPUs). A file that can't
+       be processed doesn't stop the others: the errors are reported
+       for each file, once they have all been processed. When compiling
+       a single TTX file, its tables are parsed and compiled in parallel
+       instead.
 
     Dump options:
     -l List table info: instead of dumping to a TTX file, list some
@@ -89,6 +95,7 @@ from fontTools.unicode import setUnicodeData
 from fontTools.misc.timeTools import timestampSinceEpoch
 from fontTools.misc.loggingTools import Timer
 from fontTools.misc.cliTools import makeOutputFileName
+from fontTools.misc import forkTools
 import os
 import sys
 import getopt
@@ -121,6 +128,7 @@ class Options(object):
 	recalcTimestamp = False
 	flavor = None
 	useZopfli = False
+	workers = 1
 
 	def __init__(self, rawOptions, numFiles):
 		self.onlyTables = []
@@ -147,6 +155,11 @@ class Options(object):
 				self.verbose = True
 			elif option == "-q":
 				self.quiet = True
+			elif option == "-j":
+				try:
+					self.workers = forkTools.parseWorkers(value)
+				except ValueError as e:
+					raise getopt.GetoptError(str(e))
 			# dump options
 			elif option == "-l":
 				self.listTables = True
@@ -269,14 +282,15 @@ def ttCompile(input, output, options):
 			recalcBBoxes=options.recalcBBoxes,
 			recalcTimestamp=options.recalcTimestamp,
 			allowVID=options.allowVID)
-	ttf.importXML(input)
+	workers = options.workers
+	ttf.importXML(input, workers=workers)
 
 	if not options.recalcTimestamp and 'head' in ttf:
 		# use TTX file modification time for head "modified" timestamp
 		mtime = os.path.getmtime(input)
 		ttf['head'].modified = timestampSinceEpoch(mtime)
 
-	ttf.save(output)
+	ttf.save(output, workers=workers)
 
 
 def guessFileType(fileName):
@@ -313,7 +327,7 @@ def guessFileType(fileName):
 
 
 def parseOptions(args):
-	rawOptions, files = getopt.getopt(args, "ld:o:fvqht:x:sim:z:baey:",
+	rawOptions, files = getopt.getopt(args, "ld:o:fvqhj:t:x:sim:z:baey:",
 			['unicodedata=', "recalc-timestamp", 'flavor=', 'version',
 			 'with-zopfli', 'newline='])
 
@@ -354,10 +368,58 @@ def parseOptions(args):
 
 
 def process(jobs, options):
+	if options.workers != 1 and len(jobs) > 1 and not options.listTables:
+		errors = processInParallel(jobs, options, options.workers)
+		if errors:
+			raise TTLibError("%d of %d files could not be processed" %
+					(len(errors), len(jobs)))
+		return
 	for action, input, output in jobs:
 		action(input, output, options)
 
 
+def processInParallel(jobs, options, workers=None):
+	"""Run the (action, input, output) jobs returned by parseOptions() in a
+	pool of 'workers' processes (by default, one per CPU). The jobs that
+	fail are logged, and don't stop the others: a list of (input, error
+	message) tuples is returned for them, in the order of 'jobs'.
+	"""
+	import multiprocessing
+	pool = multiprocessing.Pool(workers, initializer=_initWorker,
+			initargs=(getattr(options, "logLevel", logging.INFO),))
+	errors = []
+	try:
+		results = pool.imap(_processJob, [(job, options) for job in jobs])
+		for (action, input, output), error in zip(jobs, results):
+			if error is not None:
+				log.error('Failed to process "%s": %s', input, error)
+				errors.append((input, error))
+		pool.close()
+	finally:
+		pool.terminate()
+		pool.join()
+	return errors
+
+
+def _initWorker(logLevel):
+	# with the 'spawn' start method, the logging configuration isn't inherited
+	if not logging.getLogger("fontTools").handlers:
+		from fontTools import configLogger
+		configLogger(level=logLevel)
+
+
+def _processJob(args):
+	(action, input, output), options = args
+	# the processes of a pool can't start pools of their own
+	options.workers = 1
+	try:
+		action(input, output, options)
+	except Exception as e:
+		log.debug('Error while processing "%s"', input, exc_info=True)
+		return "%s: %s" % (type(e).__name__, e)
+	return None
+
+
 def waitForKeyPress():
 	"""Force the DOS Prompt window to stay open so the user gets
 	a chance to see what's wrong."""
@@ -1,6 +1,13 @@
 from __future__ import print_function, division, absolute_import
 from fontTools.misc.py23 import *
 
+try:
+	# use unicodedata backport to python2, if available:
+	# https://github.com/mikekap/unicodedata2
+	import unicodedata2 as unicodedata
+except ImportError:
+	import unicodedata
+
 def _makeunicodes(f):
 	import re
 	lines = iter(f.readlines())
@@ -30,12 +37,6 @@ class _UnicodeCustom(object):
 class _UnicodeBuiltin(object):
 
 	def __getitem__(self, charCode):
-		try:
-			# use unicodedata backport to python2, if available:
-			# https://github.com/mikekap/unicodedata2
-			import unicodedata2 as unicodedata
-		except ImportError: 
-			import unicodedata
 		try:
 			return unicodedata.name(unichr(charCode))
 		except ValueError:
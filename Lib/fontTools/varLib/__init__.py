@@ -21,6 +21,7 @@ API *will* change in near future.
 from __future__ import print_function, division, absolute_import
 from __future__ import unicode_literals
 from fontTools.misc.py23 import *
+from fontTools.misc import forkTools
 from fontTools.ttLib import TTFont, newTable
 from fontTools.ttLib.tables._n_a_m_e import NameRecord
 from fontTools.ttLib.tables._f_v_a_r import Axis, NamedInstance
@@ -30,6 +31,7 @@ from fontTools.ttLib.tables import otTables as ot
 from fontTools.varLib import builder, designspace, models
 from fontTools.varLib.merger import VariationMerger
 from collections import OrderedDict
+import array
 import warnings
 import os.path
 import logging
@@ -160,7 +162,61 @@ def _SetCoordinates(font, glyphName, coord):
 	font["hmtx"].metrics[glyphName] = horizontalAdvanceWidth, leftSideBearing
 
 
-def _add_gvar(font, model, master_ttfs):
+def _getGlyphDeltas(model, master_ttfs, glyphNames):
+	"""Return the (glyphName, start, end) tuples of the glyphs in glyphNames
+	whose masters are compatible, the names of the others, and the deltas
+	of each master in model order, as lists in which the coordinates of
+	the glyphs are laid end to end, each at [start:end]."""
+	glyphs = []
+	incompatible = []
+	allValues = [[] for m in master_ttfs]
+	for glyph in glyphNames:
+
+		allData = [_GetCoordinates(m, glyph) for m in master_ttfs]
+		allCoords = [d[0] for d in allData]
+		allControls = [d[1] for d in allData]
+		control = allControls[0]
+		if (any(c != control for c in allControls)):
+			incompatible.append(glyph)
+			continue
+		del allControls
+
+		start = len(allValues[0])
+		for values,coord in zip(allValues, allCoords):
+			values.extend(coord.array)
+		glyphs.append((glyph, start, len(allValues[0])))
+
+	return glyphs, incompatible, model.getDeltasBatch(allValues)
+
+def _getGlyphDeltasInParallel(model, master_ttfs, glyphOrder, workers):
+	"""Return the results of _getGlyphDeltas for consecutive ranges of the
+	glyphs in glyphOrder, computed by a pool of 'workers' processes, forked
+	from this one; or None where 'fork' is not available."""
+	if forkTools.getForkContext() is None:
+		log.debug("'fork' is not available; computing gvar deltas serially")
+		return None
+	# Load the tables the workers need here, so that they don't read the
+	# master files, whose position the forked processes would share.
+	for m in master_ttfs:
+		m["glyf"]
+		m["hmtx"]
+	# several ranges per worker, to even out the time they take
+	size = max(1, -(-len(glyphOrder) // (workers * 4)))
+	ranges = [glyphOrder[i:i+size] for i in range(0, len(glyphOrder), size)]
+	pool = forkTools.getForkPool(min(workers, len(ranges)), model, master_ttfs)
+	try:
+		return pool.map(_getGlyphDeltasInWorker, ranges)
+	finally:
+		pool.terminate()
+		pool.join()
+
+def _getGlyphDeltasInWorker(glyphNames):
+	model, master_ttfs = forkTools.getWorkerArgs()
+	glyphs, incompatible, deltas = _getGlyphDeltas(model, master_ttfs, glyphNames)
+	# arrays of doubles are pickled much more compactly than lists
+	return glyphs, incompatible, [array.array("d", d) for d in deltas]
+
+def _add_gvar(font, model, master_ttfs, workers=None):
 
 	log.info("Generating gvar")
 	assert "gvar" not in font
@@ -169,36 +225,39 @@ def _add_gvar(font, model, master_ttfs):
 	gvar.reserved = 0
 	gvar.variations = {}
 
-	for glyph in font.getGlyphOrder():
+	glyphOrder = font.getGlyphOrder()
+	results = None
+	if workers is not None and workers > 1 and len(glyphOrder) > 1:
+		results = _getGlyphDeltasInParallel(model, master_ttfs, glyphOrder, workers)
+	if results is None:
+		results = [_getGlyphDeltas(model, master_ttfs, glyphOrder)]
 
-		allData = [_GetCoordinates(m, glyph) for m in master_ttfs]
-		allCoords = [d[0] for d in allData]
-		allControls = [d[1] for d in allData]
-		control = allControls[0]
-		if (any(c != control for c in allControls)):
+	supports = model.supports
+	for glyphs, incompatible, deltas in results:
+		for glyph in incompatible:
 			warnings.warn("glyph %s has incompatible masters; skipping" % glyph)
-			continue
-		del allControls
+		assert len(deltas) == len(supports)
 
 		# Update gvar
-		gvar.variations[glyph] = []
-		deltas = model.getDeltas(allCoords)
-		supports = model.supports
-		assert len(deltas) == len(supports)
-		for i,(delta,support) in enumerate(zip(deltas[1:], supports[1:])):
-			var = TupleVariation(support, delta)
-			gvar.variations[glyph].append(var)
+		for glyph,start,end in glyphs:
+			gvar.variations[glyph] = []
+			for i,(delta,support) in enumerate(zip(deltas[1:], supports[1:])):
+				delta = list(zip(delta[start:end:2], delta[start+1:end:2]))
+				var = TupleVariation(support, delta)
+				gvar.variations[glyph].append(var)
 
 def _add_HVAR(font, model, master_ttfs, axisTags):
 
 	log.info("Generating HVAR")
 
-	hAdvanceDeltas = {}
+	glyphOrder = font.getGlyphOrder()
 	metricses = [m["hmtx"].metrics for m in master_ttfs]
-	for glyph in font.getGlyphOrder():
-		hAdvances = [metrics[glyph][0] for metrics in metricses]
+	allHAdvances = [[metrics[glyph][0] for glyph in glyphOrder] for metrics in metricses]
+	deltas = model.getDeltasBatch(allHAdvances)[1:]
+	hAdvanceDeltas = {}
+	for glyph,glyphDeltas in zip(glyphOrder, zip(*deltas)):
 		# TODO move round somewhere else?
-		hAdvanceDeltas[glyph] = tuple(round(d) for d in model.getDeltas(hAdvances)[1:])
+		hAdvanceDeltas[glyph] = tuple(round(d) for d in glyphDeltas)
 
 	# We only support the direct mapping right now.
 
@@ -258,7 +317,7 @@ def _merge_OTL(font, model, master_fonts, axisTags, base_idx):
 	GDEF.VarStore = store
 
 
-def build(designspace_filename, master_finder=lambda s:s, axisMap=None):
+def build(designspace_filename, master_finder=lambda s:s, axisMap=None, workers=None):
 	"""
 	Build variation font from a designspace file.
 
@@ -268,6 +327,11 @@ def build(designspace_filename, master_finder=lambda s:s, axisMap=None):
 
 	If axisMap is set, it should be an ordered dictionary mapping axis-id to
 	(axis-tag, axis-name).
+
+	If workers is greater than 1, the glyphs of the masters are decoded,
+	and the gvar deltas computed, by that many worker processes, each
+	taking ranges of the glyph order. The result is the same as when
+	building serially. See fontTools.misc.forkTools.
 	"""
 
 	ds = designspace.load(designspace_filename)
@@ -378,7 +442,7 @@ def build(designspace_filename, master_finder=lambda s:s, axisMap=None):
 
 	log.info("Building variations tables")
 	if 'glyf' in gx:
-		_add_gvar(gx, model, master_fonts)
+		_add_gvar(gx, model, master_fonts, workers=workers)
 	_add_HVAR(gx, model, master_fonts, axisTags)
 	_merge_OTL(gx, model, master_fonts, axisTags, base_idx)
 
@@ -391,7 +455,14 @@ def main(args=None):
 
 	parser = ArgumentParser(prog='varLib')
 	parser.add_argument('designspace')
+	parser.add_argument('-j', dest='workers', default='1',
+		help="build the glyph variations, and compile the variable font, "
+		"in that many worker processes (0 means as many as there are CPUs)")
 	options = parser.parse_args(args)
+	try:
+		workers = forkTools.parseWorkers(options.workers)
+	except ValueError as e:
+		parser.error(str(e))
 
 	# TODO: allow user to configure logging via command-line options
 	configLogger(level="INFO")
@@ -400,10 +471,10 @@ def main(args=None):
 	finder = lambda s: s.replace('master_ufo', 'master_ttf_interpolatable').replace('.ufo', '.ttf')
 	outfile = os.path.splitext(designspace_filename)[0] + '-VF.ttf'
 
-	gx, model, master_ttfs = build(designspace_filename, finder)
+	gx, model, master_ttfs = build(designspace_filename, finder, workers=workers)
 
 	log.info("Saving variation font %s", outfile)
-	gx.save(outfile)
+	gx.save(outfile, workers=workers)
 
 
 if __name__ == "__main__":
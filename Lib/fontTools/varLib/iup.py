@@ -0,0 +1,134 @@
+"""Interpolation of untouched points ("IUP").
+
+The gvar table only stores deltas for some points of a glyph (the
+"touched" ones); the deltas of the other points of each contour are
+inferred from those of the touched points before and after them, as
+described in the "Inferred deltas for un-referenced point numbers"
+section of the gvar spec.
+"""
+from __future__ import print_function, division, absolute_import
+from fontTools.misc.py23 import *
+
+haveNumpy = False
+try:
+	import numpy
+	haveNumpy = True
+except ImportError:
+	pass
+
+__all__ = ['iupContour', 'iupDelta', 'iupDeltaArray']
+
+
+def _iupValue(x, x1, x2, d1, d2):
+	"""The delta of a point at x, between reference points at x1 and x2
+	with deltas d1 and d2, along one axis."""
+	if x1 == x2:
+		return d1 if d1 == d2 else 0
+	if x1 > x2:
+		x1, x2, d1, d2 = x2, x1, d2, d1
+	if x <= x1:
+		return d1
+	if x >= x2:
+		return d2
+	scale = (d2 - d1) / (x2 - x1)
+	return d1 + (x - x1) * scale
+
+def iupContour(deltas, coords):
+	"""For the deltas of the points of one contour, with None for the
+	untouched points, and the original coordinates of the points, returns
+	the list of the deltas of all the points.
+	>>> iupContour([(10, 0), None, (20, 0), None], [(0, 0), (5, 0), (10, 0), (20, 0)])
+	[(10, 0), (15.0, 0), (20, 0), (20, 0)]
+	>>> iupContour([None, (5, 5), None], [(0, 0), (1, 1), (2, 2)])
+	[(5, 5), (5, 5), (5, 5)]
+	>>> iupContour([None, None], [(0, 0), (1, 1)])
+	[(0, 0), (0, 0)]
+	"""
+	n = len(deltas)
+	touched = [i for i,d in enumerate(deltas) if d is not None]
+	if not touched:
+		return [(0, 0)] * n
+	if len(touched) == 1:
+		return [deltas[touched[0]]] * n
+	out = list(deltas)
+	for k,i1 in enumerate(touched):
+		i2 = touched[(k + 1) % len(touched)]
+		(x1, y1), (x2, y2) = coords[i1], coords[i2]
+		(dx1, dy1), (dx2, dy2) = deltas[i1], deltas[i2]
+		i = (i1 + 1) % n
+		while i != i2:
+			x, y = coords[i]
+			out[i] = (_iupValue(x, x1, x2, dx1, dx2),
+			          _iupValue(y, y1, y2, dy1, dy2))
+			i = (i + 1) % n
+	return out
+
+def iupDelta(deltas, coords, ends):
+	"""For the deltas of the points of a glyph, with None for the
+	untouched points, the original coordinates of the points, and the
+	index of the last point of each contour, returns the list of the
+	deltas of all the points.
+	>>> iupDelta([(1, 1), None, None, (2, 2), None], [(0, 0), (1, 1), (2, 2), (3, 3), (4, 4)], [2, 4])
+	[(1, 1), (1, 1), (1, 1), (2, 2), (2, 2)]
+	"""
+	assert sorted(ends) == ends and len(coords) == (ends[-1] + 1 if ends else 0) == len(deltas)
+	out = []
+	start = 0
+	for end in ends:
+		end += 1
+		out.extend(iupContour(deltas[start:end], coords[start:end]))
+		start = end
+	return out
+
+def iupDeltaArray(deltas, touched, coords, ends):
+	"""Like iupDelta, for the deltas of several variations of a glyph at
+	once, with numpy. 'deltas' is a (variations, points, 2) array, in
+	which the deltas of the untouched points are ignored, 'touched' the
+	(variations, points) boolean array of the touched points, and
+	'coords' the (points, 2) array of the original coordinates. Returns
+	the array of the deltas of all the points. The values are the same as
+	those iupDelta computes.
+	"""
+	numVariations, n = touched.shape
+	ends = numpy.asarray(ends, dtype=int)
+	starts = numpy.concatenate(([0], ends[:-1] + 1))
+	# the contour of each point, and its first and last points
+	contours = numpy.repeat(numpy.arange(len(ends)), ends - starts + 1)
+	pointStarts = starts[contours]
+	pointEnds = ends[contours]
+
+	# the nearest touched points before and after each point, wrapping
+	# around to the last and first touched points of its contour
+	indices = numpy.arange(n)
+	prev = numpy.maximum.accumulate(numpy.where(touched, indices, -1), axis=1)
+	next = numpy.minimum.accumulate(
+		numpy.where(touched, indices, n)[:, ::-1], axis=1)[:, ::-1]
+	last = prev[:, ends][:, contours]
+	first = next[:, starts][:, contours]
+	# the contours without any touched point don't move; the indices of
+	# their reference points, which may be out of range, are only clamped
+	untouchedContour = last < pointStarts
+	prev = numpy.where(prev >= pointStarts, prev, numpy.maximum(last, 0))
+	next = numpy.where(next <= pointEnds, next, numpy.minimum(first, n - 1))
+
+	rows = numpy.arange(numVariations)[:, None]
+	x = coords[None, :, :]
+	x1 = coords[prev]
+	x2 = coords[next]
+	d1 = deltas[rows, prev]
+	d2 = deltas[rows, next]
+	swap = x1 > x2
+	x1, x2 = numpy.where(swap, x2, x1), numpy.where(swap, x1, x2)
+	d1, d2 = numpy.where(swap, d2, d1), numpy.where(swap, d1, d2)
+	with numpy.errstate(divide='ignore', invalid='ignore'):
+		scale = (d2 - d1) / (x2 - x1)
+		out = d1 + (x - x1) * scale
+	out = numpy.where(x <= x1, d1, numpy.where(x >= x2, d2, out))
+	out = numpy.where(x1 == x2, numpy.where(d1 == d2, d1, 0), out)
+	out[untouchedContour] = 0
+	return numpy.where(touched[:, :, None], deltas, out)
+
+
+if __name__ == "__main__":
+	import doctest, sys
+	sys.exit(doctest.testmod().failed)
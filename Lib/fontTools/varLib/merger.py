@@ -8,6 +8,7 @@ from fontTools.ttLib.tables import otTables as ot
 from fontTools.ttLib.tables import otBase as otBase
 from fontTools.ttLib.tables.DefaultTable import DefaultTable
 from fontTools.varLib import builder
+from fontTools.varLib.varStore import VarStoreInstancer
 from functools import reduce
 
 
@@ -571,6 +572,91 @@ def merge(merger, self, lst):
 			setattr(self, name, value)
 
 
+#
+# MutatorMerger
+#
+
+class MutatorMerger(Merger):
+	"""A merger that takes a variable font, and instantiates its OpenType
+	Layout tables in place: the deltas of the variation indices of their
+	device tables, at location, are added to the values they vary, and
+	the device tables are removed."""
+
+	def __init__(self, font, location):
+		Merger.__init__(self, font)
+		self.location = location
+		store = None
+		if 'GDEF' in font:
+			gdef = font['GDEF'].table
+			if gdef.Version >= 0x00010003:
+				store = gdef.VarStore
+		self.instancer = VarStoreInstancer(store, font['fvar'].axes, location)
+
+	def instantiate(self):
+		font = self.font
+		for tag in ('GPOS', 'GDEF'):
+			if tag in font:
+				self.mergeThings(font[tag], [font[tag]])
+
+	def getDelta(self, deviceTable):
+		"""The rounded delta of deviceTable, if it is a variation index,
+		or None if it is a regular device table."""
+		if deviceTable.DeltaFormat != 0x8000:
+			return None
+		varidx = (deviceTable.StartSize << 16) + deviceTable.EndSize
+		return int(round(self.instancer[varidx]))
+
+@MutatorMerger.merger(ot.Anchor)
+def merge(merger, self, lst):
+	if self.Format != 3:
+		return
+
+	for v in "XY":
+		tableName = v+'DeviceTable'
+		dev = getattr(self, tableName, None)
+		if dev is None:
+			continue
+		delta = merger.getDelta(dev)
+		if delta is None:
+			continue
+		attr = v+'Coordinate'
+		setattr(self, attr, getattr(self, attr) + delta)
+		setattr(self, tableName, None)
+
+	if self.XDeviceTable is None and self.YDeviceTable is None:
+		self.Format = 1
+		del self.XDeviceTable, self.YDeviceTable
+
+@MutatorMerger.merger(otBase.ValueRecord)
+def merge(merger, self, lst):
+	for name, tableName in [('XAdvance','XAdvDevice'),
+				('YAdvance','YAdvDevice'),
+				('XPlacement','XPlaDevice'),
+				('YPlacement','YPlaDevice')]:
+
+		dev = getattr(self, tableName, None)
+		if dev is None:
+			continue
+		delta = merger.getDelta(dev)
+		if delta is None:
+			continue
+		setattr(self, name, getattr(self, name, 0) + delta)
+		# The ValueFormat of the subtable still has the bit of the
+		# device table, which is written as a NULL offset.
+		setattr(self, tableName, None)
+
+@MutatorMerger.merger(ot.CaretValue)
+def merge(merger, self, lst):
+	if self.Format != 3 or self.DeviceTable is None:
+		return
+	delta = merger.getDelta(self.DeviceTable)
+	if delta is None:
+		return
+	self.Coordinate += delta
+	self.Format = 1
+	del self.DeviceTable
+
+
 #
 # VariationMerger
 #
@@ -2,7 +2,14 @@
 from __future__ import print_function, division, absolute_import
 from fontTools.misc.py23 import *
 
-__all__ = ['normalizeLocation', 'supportScalar', 'VariationModel']
+haveNumpy = False
+try:
+	import numpy
+	haveNumpy = True
+except ImportError:
+	pass
+
+__all__ = ['normalizeLocation', 'piecewiseLinearMap', 'supportScalar', 'VariationModel']
 
 def normalizeLocation(location, axes):
 	"""Normalizes location based on axis min/default/max values from axes.
@@ -56,6 +63,37 @@ def normalizeLocation(location, axes):
 		out[tag] = v
 	return out
 
+def piecewiseLinearMap(v, mapping):
+	"""Maps v through the piecewise linear function whose points are
+	the items of the dict mapping, like an "avar" segment map does.
+	Values beyond the first and last points are shifted like them.
+	>>> mapping = {-1.0: -1.0, 0: 0, 0.5: 0.25, 1.0: 1.0}
+	>>> piecewiseLinearMap(0.5, mapping)
+	0.25
+	>>> piecewiseLinearMap(0.75, mapping)
+	0.625
+	>>> piecewiseLinearMap(-0.5, mapping)
+	-0.5
+	>>> piecewiseLinearMap(0.5, {})
+	0.5
+	"""
+	if not mapping:
+		return v
+	if v in mapping:
+		return mapping[v]
+	keys = sorted(mapping.keys())
+	k = keys[0]
+	if v < k:
+		return v + mapping[k] - k
+	k = keys[-1]
+	if v > k:
+		return v + mapping[k] - k
+	a = max(k for k in keys if k < v)
+	b = min(k for k in keys if k > v)
+	va = mapping[a]
+	vb = mapping[b]
+	return va + (vb - va) * (v - a) / (b - a)
+
 def supportScalar(location, support):
 	"""Returns the scalar multiplier at location, for a master
 	with support.
@@ -141,6 +179,7 @@ class VariationModel(object):
 		self.reverseMapping = [locations.index(l) for l in self.locations] # Reverse of above
 
 		self._computeMasterSupports(axisPoints)
+		self._scalarsCache = {}
 
 	@staticmethod
 	def getMasterLocationsSortKeyFunc(locations, axisOrder=[]):
@@ -253,12 +292,63 @@ class VariationModel(object):
 			out.append(delta)
 		return out
 
+	def getDeltasBatch(self, masterValues):
+		"""Like getDeltas, for masterValues holding, for each master, a
+		sequence of numbers, all of the same length: eg. the coordinates
+		of all the points of a glyph, or the advance widths of all the
+		glyphs of a font. Returns the list of deltas of each master, in
+		our master order. The deltas are computed with numpy, when it's
+		available, with the same arithmetic as getDeltas.
+		>>> model = VariationModel([{}, {'wght':1}, {'wght':-1}])
+		>>> model.getDeltasBatch([[100, 200], [150, 300], [50, 120]])
+		[[100.0, 200.0], [-50.0, -80.0], [50.0, 100.0]]
+		"""
+		if haveNumpy:
+			return self._getDeltasArray(masterValues).tolist()
+		assert len(masterValues) == len(self.deltaWeights)
+		mapping = self.reverseMapping
+		out = []
+		for i,weights in enumerate(self.deltaWeights):
+			delta = [float(v) for v in masterValues[mapping[i]]]
+			for j,weight in weights.items():
+				delta = [d - o * weight for d,o in zip(delta, out[j])]
+			out.append(delta)
+		return out
+
+	def _getDeltasArray(self, masterValues):
+		assert len(masterValues) == len(self.deltaWeights)
+		mapping = self.reverseMapping
+		count = len(masterValues[0])
+		assert all(len(values) == count for values in masterValues)
+		# fromiter converts lists of numbers several times faster than array
+		out = numpy.empty((len(mapping), count), dtype=numpy.float64)
+		for i,m in enumerate(mapping):
+			out[i] = numpy.fromiter(masterValues[m], numpy.float64, count)
+		for i,weights in enumerate(self.deltaWeights):
+			delta = out[i]
+			for j,weight in weights.items():
+				delta -= out[j] * weight
+		return out
+
+	def getScalars(self, loc):
+		"""Returns the scalar multipliers of the master supports at loc.
+		They are remembered for each location the model is interpolated at.
+		>>> model = VariationModel([{}, {'wght':1}, {'wght':-1}])
+		>>> model.getScalars({'wght':.5})
+		[1.0, 0.0, 0.5]
+		"""
+		key = tuple(sorted(loc.items()))
+		scalars = self._scalarsCache.get(key)
+		if scalars is None:
+			scalars = [supportScalar(loc, support) for support in self.supports]
+			self._scalarsCache[key] = scalars
+		return scalars
+
 	def interpolateFromDeltas(self, loc, deltas):
 		v = None
-		supports = self.supports
-		assert len(deltas) == len(supports)
-		for i,(delta,support) in enumerate(zip(deltas, supports)):
-			scalar = supportScalar(loc, support)
+		scalars = self.getScalars(loc)
+		assert len(deltas) == len(scalars)
+		for i,(delta,scalar) in enumerate(zip(deltas, scalars)):
 			if not scalar: continue
 			contribution = delta * scalar
 			if i == 0:
@@ -271,6 +361,29 @@ class VariationModel(object):
 		deltas = self.getDeltas(masterValues)
 		return self.interpolateFromDeltas(loc, deltas)
 
+	def interpolateFromMastersBatch(self, loc, masterValues):
+		"""Like interpolateFromMasters, for masterValues holding, for each
+		master, a sequence of numbers, as for getDeltasBatch. Returns the
+		list of the values at loc.
+		>>> model = VariationModel([{}, {'wght':1}, {'wght':-1}])
+		>>> model.interpolateFromMastersBatch({'wght':.5}, [[100, 200], [150, 300], [50, 120]])
+		[125.0, 250.0]
+		"""
+		scalars = self.getScalars(loc)
+		if haveNumpy:
+			deltas = self._getDeltasArray(masterValues)
+			v = numpy.zeros(deltas.shape[1])
+			for delta,scalar in zip(deltas, scalars):
+				if scalar:
+					v += delta * scalar
+			return v.tolist()
+		deltas = self.getDeltasBatch(masterValues)
+		v = [0.] * len(deltas[0])
+		for delta,scalar in zip(deltas, scalars):
+			if scalar:
+				v = [a + d * scalar for a,d in zip(v, delta)]
+		return v
+
 
 if __name__ == "__main__":
 	import doctest, sys
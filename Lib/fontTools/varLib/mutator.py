@@ -1,60 +1,593 @@
 """
 Instantiate a variation font.  Run, eg:
 
-$ python mutator.py ./NotoSansArabic-GX.ttf wght=140 wdth=85
+$ fonttools varLib.mutator ./NotoSansArabic-GX.ttf wght=140 wdth=85
+
+The instance is saved as NotoSansArabic-GX-instance.ttf, or the file given
+with -o. Several instances can be made at once, sharing the work of reading
+the variable font, with -l, and all its named instances with
+--named-instances:
+
+$ fonttools varLib.mutator ./NotoSansArabic-GX.ttf -l wght=140 -l wght=170,wdth=85
+
+The instances are then saved as NotoSansArabic-GX-wght140.ttf, and so on.
 """
 from __future__ import print_function, division, absolute_import
 from fontTools.misc.py23 import *
+from fontTools.misc import forkTools
 from fontTools.ttLib import TTFont
-from fontTools.ttLib.tables._g_l_y_f import GlyphCoordinates
 from fontTools.varLib import _GetCoordinates, _SetCoordinates
-from fontTools.varLib.models import VariationModel, supportScalar, normalizeLocation
+from fontTools.varLib.iup import iupDelta, iupDeltaArray
+from fontTools.varLib.merger import MutatorMerger
+from fontTools.varLib.models import supportScalar, normalizeLocation, piecewiseLinearMap
+from fontTools.varLib.varStore import VarStoreInstancer
+import array
+import itertools
+import operator
+import copy
 import os.path
+import logging
 
-def main(args=None):
+haveNumpy = False
+try:
+	import numpy
+	haveNumpy = True
+except ImportError:
+	pass
 
-	if args is None:
-		import sys
-		args = sys.argv[1:]
+log = logging.getLogger("fontTools.varLib.mutator")
 
-	varfilename = args[0]
-	locargs = args[1:]
-	outfile = os.path.splitext(varfilename)[0] + '-instance.ttf'
+# The font-wide metrics MVAR varies: value tag -> (table tag, attribute)
+MVAR_ENTRIES = {
+	'hasc': ('OS/2', 'sTypoAscender'),
+	'hdsc': ('OS/2', 'sTypoDescender'),
+	'hlgp': ('OS/2', 'sTypoLineGap'),
+	'hcla': ('OS/2', 'usWinAscent'),
+	'hcld': ('OS/2', 'usWinDescent'),
+	'vasc': ('vhea', 'ascent'),
+	'vdsc': ('vhea', 'descent'),
+	'vlgp': ('vhea', 'lineGap'),
+	'hcrs': ('hhea', 'caretSlopeRise'),
+	'hcrn': ('hhea', 'caretSlopeRun'),
+	'hcof': ('hhea', 'caretOffset'),
+	'vcrs': ('vhea', 'caretSlopeRise'),
+	'vcrn': ('vhea', 'caretSlopeRun'),
+	'vcof': ('vhea', 'caretOffset'),
+	'xhgt': ('OS/2', 'sxHeight'),
+	'cpht': ('OS/2', 'sCapHeight'),
+	'sbxs': ('OS/2', 'ySubscriptXSize'),
+	'sbys': ('OS/2', 'ySubscriptYSize'),
+	'sbxo': ('OS/2', 'ySubscriptXOffset'),
+	'sbyo': ('OS/2', 'ySubscriptYOffset'),
+	'spxs': ('OS/2', 'ySuperscriptXSize'),
+	'spys': ('OS/2', 'ySuperscriptYSize'),
+	'spxo': ('OS/2', 'ySuperscriptXOffset'),
+	'spyo': ('OS/2', 'ySuperscriptYOffset'),
+	'strs': ('OS/2', 'yStrikeoutSize'),
+	'stro': ('OS/2', 'yStrikeoutPosition'),
+	'unds': ('post', 'underlineThickness'),
+	'undo': ('post', 'underlinePosition'),
+}
 
-	loc = {}
-	for arg in locargs:
-		tag,val = arg.split('=')
-		assert len(tag) <= 4
-		loc[tag.ljust(4)] = float(val)
-	print("Location:", loc)
+# The tables describing the variations, that an instance doesn't have
+VARIATION_TABLES = ('fvar', 'avar', 'gvar', 'cvar', 'HVAR', 'VVAR', 'MVAR', 'STAT')
 
-	print("Loading GX font")
-	varfont = TTFont(varfilename)
 
-	fvar = varfont['fvar']
-	axes = {a.axisTag:(a.minValue,a.defaultValue,a.maxValue) for a in fvar.axes}
-	# TODO Round to F2Dot14?
-	loc = normalizeLocation(loc, axes)
-	# Location is normalized now
-	print("Normalized location:", loc)
-
-	gvar = varfont['gvar']
-	for glyphname,variations in gvar.variations.items():
-		coordinates,_ = _GetCoordinates(varfont, glyphname)
-		for var in variations:
-			scalar = supportScalar(loc, var.axes)
-			if not scalar: continue
-			# TODO Do IUP / handle None items
-			coordinates += GlyphCoordinates(var.coordinates) * scalar
-		_SetCoordinates(varfont, glyphname, coordinates)
-
-	print("Removing GX tables")
-	for tag in ('fvar','avar','gvar'):
+def normalizeVariableFontLocation(varfont, location):
+	"""Normalizes a location in the user coordinates of the axes of the
+	'fvar' table of varfont, and maps it through its 'avar' table, if
+	any."""
+	axes = {a.axisTag:(a.minValue,a.defaultValue,a.maxValue)
+	        for a in varfont['fvar'].axes}
+	loc = normalizeLocation(location, axes)
+	if 'avar' in varfont:
+		for axisTag,mapping in varfont['avar'].segments.items():
+			loc[axisTag] = piecewiseLinearMap(loc[axisTag], mapping)
+	return loc
+
+def _getContourEnds(glyph, control, numPoints):
+	"""The index of the last point of each contour, for IUP: the four
+	phantom points, and the component offsets of composite glyphs, are
+	each a contour of their own."""
+	if glyph.isComposite():
+		return list(range(numPoints))
+	return list(control[0]) + list(range(numPoints - 4, numPoints))
+
+def _iupGlyphVariations(coords, ends, variations):
+	"""Returns the deltas of all the points of a glyph at the original
+	coordinates 'coords', for each of its TupleVariations, interpolating
+	the deltas of the untouched points."""
+	points = None
+	result = []
+	for var in variations:
+		deltas = var.coordinates
+		if None in deltas:
+			if points is None:
+				values = coords.array
+				points = list(zip(values[0::2], values[1::2]))
+			deltas = iupDelta(deltas, points, ends)
+		result.append(deltas)
+	return result
+
+def _addGlyphDeltas(numPoints, variationDeltas, scalars):
+	"""Returns the sum of the deltas of the variations of a glyph of
+	numPoints points, times their scalars, rounded, as a flat list of x
+	and y values, like GlyphCoordinates.array."""
+	xs = [0.] * numPoints
+	ys = [0.] * numPoints
+	for scalar,deltas in zip(scalars, variationDeltas):
+		if not scalar:
+			continue
+		for i,(x,y) in enumerate(deltas):
+			xs[i] += x * scalar
+			ys[i] += y * scalar
+	return [int(round(v)) for xy in zip(xs, ys) for v in xy]
+
+class _GlyphVariations(object):
+	"""The tuple variations of the glyphs of a variable font, ready to be
+	applied at any number of locations: the original coordinates of the
+	glyphs are read, and the deltas of the untouched points of the
+	variations interpolated ("IUP"), once.
+
+	'variations' maps the names of the glyphs to the TupleVariations to
+	apply to them; by default, all those of the 'gvar' table of varfont.
+
+	With numpy, the variations of all the glyphs are laid end to end, as
+	the contours of one glyph, whose untouched points are interpolated
+	together; at each location, their deltas are added to those of the
+	points of their glyph in the same order, and come out the same as
+	without numpy.
+	"""
+
+	def __init__(self, varfont, variations=None):
+		glyf = varfont['glyf']
+		if variations is None:
+			variations = varfont['gvar'].variations
+		# The glyphs share a few regions, mostly those of the masters: the
+		# scalar of each is computed once per location.
+		self.regions = []
+		regionIndices = {}
+		self.glyphNames = []
+		self.glyphRegions = []
+		glyphs = []
+		for glyphName,glyphVariations in variations.items():
+			if not glyphVariations:
+				continue
+			regions = []
+			for var in glyphVariations:
+				region = tuple(sorted(var.axes.items()))
+				index = regionIndices.get(region)
+				if index is None:
+					index = regionIndices[region] = len(self.regions)
+					self.regions.append(var.axes)
+				regions.append(index)
+			coordinates,control = _GetCoordinates(varfont, glyphName)
+			ends = _getContourEnds(glyf[glyphName], control, len(coordinates))
+			self.glyphNames.append(glyphName)
+			self.glyphRegions.append(regions)
+			glyphs.append((coordinates, ends, glyphVariations))
+		self.coordinates = [coordinates for coordinates,_,_ in glyphs]
+
+		# The bounds, and so the side bearings, of the composite glyphs are
+		# those of their components: these are mutated first.
+		def sortKey(i):
+			glyph = glyf[self.glyphNames[i]]
+			if glyph.isComposite():
+				return glyph.getCompositeMaxpValues(glyf)[2]
+			return 0
+		self.order = sorted(range(len(glyphs)), key=sortKey)
+
+		if haveNumpy:
+			self._initArrays(glyphs)
+		else:
+			self.deltas = [_iupGlyphVariations(*glyph) for glyph in glyphs]
+
+	def _initArrays(self, glyphs):
+		# the points of the glyphs, and of their variations, laid end to end
+		allCoords = array.array('d')
+		glyphStarts = []
+		pointStarts = []
+		pointCounts = []
+		regions = []
+		ranks = []
+		deltas = []
+		sparse = []
+		numPoints = 0
+		for (coords,ends,variations),glyphRegions in zip(glyphs, self.glyphRegions):
+			glyphStarts.append(len(allCoords) // 2)
+			allCoords.fromlist(coords.array.tolist())
+			n = len(coords)
+			for rank,(region,var) in enumerate(zip(glyphRegions, variations)):
+				pointStarts.append(glyphStarts[-1])
+				pointCounts.append(n)
+				regions.append(region)
+				ranks.append(rank)
+				coordinates = var.coordinates
+				if None in coordinates:
+					sparse.append((numPoints, ends, coordinates))
+					coordinates = [(0, 0) if d is None else d for d in coordinates]
+				deltas.append(coordinates)
+				numPoints += n
+		glyphStarts.append(len(allCoords) // 2)
+		self._glyphStarts = glyphStarts
+		if not numPoints:
+			self._deltas = None
+			return
+
+		pointCounts = numpy.array(pointCounts)
+		# the index in allCoords of each of the points of the variations
+		indices = numpy.arange(numPoints) + numpy.repeat(
+			numpy.array(pointStarts) - (numpy.cumsum(pointCounts) - pointCounts),
+			pointCounts)
+		allCoords = numpy.frombuffer(allCoords, dtype=numpy.float64).reshape(-1, 2)
+		deltas = numpy.fromiter(
+			itertools.chain.from_iterable(itertools.chain.from_iterable(deltas)),
+			numpy.float64, 2 * numPoints).reshape(-1, 2)
+		if sparse:
+			# only the sparse variations are interpolated
+			allEnds = []
+			touched = []
+			sparseIndices = []
+			start = 0
+			for offset,ends,coordinates in sparse:
+				allEnds.extend([e + start for e in ends])
+				touched.extend([d is not None for d in coordinates])
+				sparseIndices.append(numpy.arange(offset, offset + len(coordinates)))
+				start += len(coordinates)
+			sparseIndices = numpy.concatenate(sparseIndices)
+			deltas[sparseIndices] = iupDeltaArray(
+				deltas[sparseIndices][None], numpy.array(touched, dtype=bool)[None],
+				allCoords[indices[sparseIndices]], allEnds)[0]
+		# The variations of a glyph are added in order; the points of those
+		# of a given rank are all distinct, and are sorted together.
+		ranks = numpy.repeat(numpy.array(ranks), pointCounts)
+		order = numpy.argsort(ranks, kind='mergesort')
+		self._rankStarts = numpy.searchsorted(
+			ranks[order], numpy.arange(ranks.max() + 2)).tolist()
+		self._deltas = deltas[order]
+		self._indices = indices[order]
+		self._pointRegions = numpy.repeat(numpy.array(regions), pointCounts)[order]
+
+	def _getDeltasArray(self, scalars):
+		glyphStarts = self._glyphStarts
+		if self._deltas is None:
+			return [[]] * (len(glyphStarts) - 1)
+		deltas = self._deltas * numpy.array(scalars)[self._pointRegions][:, None]
+		out = numpy.zeros((glyphStarts[-1], 2))
+		rankStarts = self._rankStarts
+		for start,end in zip(rankStarts, rankStarts[1:]):
+			out[self._indices[start:end]] += deltas[start:end]
+		# rounded half to even, like _addGlyphDeltas does with py23's round()
+		out = numpy.rint(out).astype(int).ravel().tolist()
+		return [out[2 * start:2 * end]
+		        for start,end in zip(glyphStarts, glyphStarts[1:])]
+
+	def getDeltas(self, location):
+		"""Returns the rounded deltas of the points of each glyph at the
+		normalized location, as flat lists of x and y values, like
+		GlyphCoordinates.array; or None for the glyphs none of whose
+		variations apply there."""
+		scalars = [supportScalar(location, axes) for axes in self.regions]
+		applied = [any(scalars[i] for i in regions)
+		           for regions in self.glyphRegions]
+		if haveNumpy:
+			allDeltas = self._getDeltasArray(scalars)
+		else:
+			allDeltas = [
+				_addGlyphDeltas(len(coordinates), deltas,
+				                [scalars[i] for i in regions]) if apply else None
+				for coordinates,deltas,regions,apply in zip(
+					self.coordinates, self.deltas, self.glyphRegions, applied)]
+		return [deltas if apply else None
+		        for deltas,apply in zip(allDeltas, applied)]
+
+	def instantiate(self, font, location):
+		"""Applies the deltas at the normalized location to the glyphs, and
+		their advance widths and side bearings, of font: the variable font,
+		or a copy of it."""
+		allDeltas = self.getDeltas(location)
+		for i in self.order:
+			deltas = allDeltas[i]
+			if deltas is None:
+				continue
+			coordinates = self.coordinates[i].copy()
+			values = coordinates.array
+			values[:] = array.array(values.typecode,
+			                        map(operator.add, values, deltas))
+			_SetCoordinates(font, self.glyphNames[i], coordinates)
+
+def _instantiateGvar(varfont, location, glyphVariations=None):
+	if glyphVariations is None:
+		# Only the variations that apply at location are read.
+		scalars = {}
+		applied = {}
+		for glyphName,variations in varfont['gvar'].variations.items():
+			for var in variations:
+				region = tuple(sorted(var.axes.items()))
+				scalar = scalars.get(region)
+				if scalar is None:
+					scalar = scalars[region] = supportScalar(location, var.axes)
+				if scalar:
+					applied.setdefault(glyphName, []).append(var)
+		glyphVariations = _GlyphVariations(varfont, applied)
+	glyphVariations.instantiate(varfont, location)
+
+def _instantiateCvar(varfont, location):
+	cvt = varfont['cvt ']
+	deltas = [0.] * len(cvt.values)
+	for var in varfont['cvar'].variations:
+		scalar = supportScalar(location, var.axes)
+		if not scalar:
+			continue
+		for i,delta in enumerate(var.coordinates):
+			if delta is not None:
+				deltas[i] += delta * scalar
+	for i,delta in enumerate(deltas):
+		cvt[i] += int(round(delta))
+
+def _instantiateHVAR(varfont, location):
+	# The advance widths are those of the phantom points of gvar, when
+	# the font has one; they only come from HVAR for the other fonts.
+	hvar = varfont['HVAR'].table
+	instancer = VarStoreInstancer(hvar.VarStore, varfont['fvar'].axes, location)
+	metrics = varfont['hmtx'].metrics
+	for glyphID,glyphName in enumerate(varfont.getGlyphOrder()):
+		if hvar.AdvWidthMap is not None:
+			varidx = hvar.AdvWidthMap.mapping[min(glyphID, len(hvar.AdvWidthMap.mapping) - 1)]
+		else:
+			varidx = glyphID
+		delta = int(round(instancer[varidx]))
+		if delta:
+			advanceWidth,lsb = metrics[glyphName]
+			metrics[glyphName] = max(0, advanceWidth + delta), lsb
+
+def _instantiateMVAR(varfont, location):
+	mvar = varfont['MVAR'].table
+	instancer = VarStoreInstancer(mvar.VarStore, varfont['fvar'].axes, location)
+	for rec in mvar.ValueRecord:
+		if rec.ValueTag not in MVAR_ENTRIES:
+			continue
+		tableTag,attr = MVAR_ENTRIES[rec.ValueTag]
+		if tableTag not in varfont or not hasattr(varfont[tableTag], attr):
+			continue
+		delta = int(round(instancer[rec.VarIdx]))
+		if delta:
+			setattr(varfont[tableTag], attr, getattr(varfont[tableTag], attr) + delta)
+
+def _instantiateOTL(varfont, location):
+	MutatorMerger(varfont, location).instantiate()
+	gdef = varfont['GDEF'].table
+	if gdef.Version >= 0x00010003:
+		del gdef.VarStore
+		if getattr(gdef, 'MarkGlyphSetsDef', None) is None:
+			gdef.Version = 0x00010000
+			if hasattr(gdef, 'MarkGlyphSetsDef'):
+				del gdef.MarkGlyphSetsDef
+		else:
+			gdef.Version = 0x00010002
+
+def _loadVariableFont(varfont):
+	# All the tables are loaded, so that the copies of varfont don't need
+	# its reader, which may hold the font file (with lazy or mmap).
+	if varfont.reader is not None:
+		for tag in varfont.keys():
+			varfont[tag]
+
+def _copyVariableFont(varfont):
+	# The copy shares the variation tables, which it only reads before
+	# removing them, with varfont; they are loaded in varfont first, so
+	# that they are only decoded once for all its copies. It has no reader.
+	_loadVariableFont(varfont)
+	memo = {id(varfont.reader): None}
+	for tag in VARIATION_TABLES:
+		if tag in varfont:
+			table = varfont[tag]
+			memo[id(table)] = table
+	return copy.deepcopy(varfont, memo)
+
+def _instantiateVariableFont(varfont, location, glyphVariations=None):
+	loc = normalizeVariableFontLocation(varfont, location)
+	log.info("Normalized location: %s", loc)
+
+	if 'gvar' in varfont:
+		log.info("Mutating glyf/gvar tables")
+		_instantiateGvar(varfont, loc, glyphVariations)
+	elif 'HVAR' in varfont:
+		log.info("Mutating hmtx/HVAR tables")
+		_instantiateHVAR(varfont, loc)
+	if 'cvar' in varfont:
+		log.info("Mutating cvt/cvar tables")
+		_instantiateCvar(varfont, loc)
+	if 'MVAR' in varfont:
+		log.info("Mutating MVAR table")
+		_instantiateMVAR(varfont, loc)
+	if 'GDEF' in varfont:
+		log.info("Mutating GDEF/GPOS tables")
+		_instantiateOTL(varfont, loc)
+
+	log.info("Removing variable tables")
+	for tag in VARIATION_TABLES:
 		if tag in varfont:
 			del varfont[tag]
 
-	print("Saving instance font", outfile)
-	varfont.save(outfile)
+	return varfont
+
+def instantiateVariableFont(varfont, location, inplace=False):
+	"""Returns the instance of the variable font varfont at location, a
+	dict of axis tags to coordinates in the user space of the 'fvar' axes
+	(the default of the axes missing from it is used).
+
+	The outlines and the advance widths are interpolated from 'gvar', with
+	the deltas of the points it doesn't store inferred ("IUP"), the 'cvt '
+	values from 'cvar', the font-wide metrics from 'MVAR', the advance
+	widths of fonts without 'gvar' from 'HVAR', and the GPOS and GDEF
+	values from the GDEF variation store. The scalar of each region of
+	the variations is computed once. The tables describing the variations
+	are removed.
+
+	If inplace is True, varfont itself is modified and returned; else it
+	is left unchanged, and a copy is. The variation tables of varfont are
+	then decoded once for all the instances made from it; to make many,
+	instantiateVariableFonts is faster still.
+	"""
+	if not inplace:
+		varfont = _copyVariableFont(varfont)
+	return _instantiateVariableFont(varfont, location)
+
+def instantiateVariableFonts(varfont, locations, workers=None):
+	"""Yields the instances of the variable font varfont at each of the
+	'locations' list in turn, like instantiateVariableFont does, leaving
+	varfont unchanged. The variation tables are decoded, the original
+	coordinates of the glyphs read, and the deltas of the untouched points
+	of their variations interpolated, once for all the instances.
+
+	If 'workers' is greater than 1, the instances are made, and compiled,
+	by a pool of as many processes, forked from this one, and are yielded
+	as fonts loaded from the compiled data. See fontTools.misc.forkTools.
+	"""
+	_loadVariableFont(varfont)
+	glyphVariations = None
+	if 'gvar' in varfont:
+		log.info("Reading glyf/gvar tables")
+		glyphVariations = _GlyphVariations(varfont)
+	pool = None
+	if workers is not None and workers > 1 and len(locations) > 1:
+		pool = _getInstancePool(varfont, glyphVariations,
+		                        min(workers, len(locations)))
+	if pool is None:
+		for location in locations:
+			yield _instantiateVariableFont(_copyVariableFont(varfont), location,
+			                               glyphVariations)
+		return
+	try:
+		for data in pool.imap(_makeInstanceInWorker, locations):
+			yield TTFont(BytesIO(data))
+	finally:
+		pool.terminate()
+		pool.join()
+
+def _getInstancePool(varfont, glyphVariations, workers):
+	"""Returns a pool of 'workers' processes, forked from this one, that
+	make instances of varfont; or None where 'fork' is not available."""
+	# varfont is loaded, so the forked processes don't read the font file
+	pool = forkTools.getForkPool(workers, varfont, glyphVariations)
+	if pool is None:
+		log.debug("'fork' is not available; making the instances serially")
+	return pool
+
+def _makeInstanceInWorker(location):
+	varfont, glyphVariations = forkTools.getWorkerArgs()
+	font = _instantiateVariableFont(_copyVariableFont(varfont), location,
+	                                glyphVariations)
+	buf = BytesIO()
+	font.save(buf)
+	return buf.getvalue()
+
+
+def _getNamedInstances(varfont):
+	"""Returns the (location, name) of each named instance of the 'fvar'
+	table of varfont; the name is the subfamily name of the instance, if
+	the 'name' table has it, without spaces, or else None."""
+	instances = []
+	for instance in varfont['fvar'].instances:
+		name = None
+		if 'name' in varfont:
+			name = varfont['name'].getDebugName(instance.subfamilyNameID)
+		if name is not None:
+			name = name.replace(' ', '')
+		instances.append((dict(instance.coordinates), name))
+	return instances
+
+def _getLocationName(location):
+	"""Returns a name for the instance at location, eg. 'wdth85-wght700'."""
+	return '-'.join('%s%g' % (tag.strip(), location[tag])
+	                for tag in sorted(location))
+
+def main(args=None):
+	from argparse import ArgumentParser
+	from fontTools import configLogger
+
+	parser = ArgumentParser(prog='varLib.mutator')
+	parser.add_argument('input', metavar='INPUT.ttf',
+		help="the variable font")
+	parser.add_argument('locargs', metavar='AXIS=LOC', nargs='*',
+		help="the coordinate of an axis of the instance, eg. wght=700")
+	parser.add_argument('-o', dest='output', metavar='OUTPUT.ttf',
+		help="the output file, without -l or --named-instances "
+		"(default: INPUT-instance.ttf)")
+	parser.add_argument('-l', dest='locations', metavar='AXIS=LOC[,AXIS=LOC...]',
+		action='append', default=[],
+		help="the location of an instance, eg. wght=700,wdth=85; can be "
+		"repeated, to make several instances at once")
+	parser.add_argument('--named-instances', dest='namedInstances',
+		action='store_true',
+		help="make all the named instances of the variable font")
+	parser.add_argument('-d', dest='outputDir', metavar='DIR',
+		help="the directory of the output files, when making several "
+		"instances or named instances (default: that of INPUT.ttf); they "
+		"are named INPUT-NAME.ttf, after the subfamily names of the named "
+		"instances and the locations of the others")
+	parser.add_argument('-j', dest='workers', default='1',
+		help="make the instances in that many worker processes (0 means "
+		"as many as there are CPUs)")
+	options = parser.parse_args(args)
+	try:
+		workers = forkTools.parseWorkers(options.workers)
+	except ValueError as e:
+		parser.error(str(e))
+
+	def parseLocation(locargs):
+		loc = {}
+		for arg in locargs:
+			try:
+				tag,val = arg.split('=')
+				loc[tag.ljust(4)] = float(val)
+			except ValueError:
+				parser.error("invalid location argument: %r" % arg)
+		return loc
+
+	# TODO: allow user to configure logging via command-line options
+	configLogger(level="INFO")
+
+	varfilename = options.input
+
+	if not (options.locations or options.namedInstances):
+		outfile = options.output or os.path.splitext(varfilename)[0] + '-instance.ttf'
+		loc = parseLocation(options.locargs)
+		log.info("Location: %s", loc)
+
+		log.info("Loading variable font")
+		varfont = TTFont(varfilename)
+
+		instantiateVariableFont(varfont, loc, inplace=True)
+
+		log.info("Saving instance font %s", outfile)
+		varfont.save(outfile)
+		return
+
+	if options.output:
+		parser.error("-o can not be used with -l or --named-instances; see -d")
+	locations = []
+	if options.locargs:
+		locations.append(parseLocation(options.locargs))
+	for arg in options.locations:
+		locations.append(parseLocation(arg.split(',')))
+	names = [_getLocationName(loc) for loc in locations]
+
+	log.info("Loading variable font")
+	varfont = TTFont(varfilename)
+
+	if options.namedInstances:
+		for loc,name in _getNamedInstances(varfont):
+			locations.append(loc)
+			names.append(name or _getLocationName(loc))
+	outputDir = options.outputDir or os.path.dirname(varfilename)
+	basename = os.path.splitext(os.path.basename(varfilename))[0]
+	fonts = instantiateVariableFonts(varfont, locations, workers=workers)
+	for loc,name,font in zip(locations, names, fonts):
+		outfile = os.path.join(outputDir, '%s-%s.ttf' % (basename, name))
+		log.info("Saving instance font %s at %s", outfile, loc)
+		font.save(outfile)
 
 
 if __name__ == "__main__":
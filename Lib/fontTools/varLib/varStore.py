@@ -0,0 +1,70 @@
+"""Evaluation of the deltas of an OpenType item variation store."""
+from __future__ import print_function, division, absolute_import
+from fontTools.misc.py23 import *
+from fontTools.varLib.models import supportScalar
+
+
+def _getRegionSupport(region, fvarAxes):
+	"""The support of a VarRegion, as a dict of the tags of the axes it
+	depends on to (start, peak, end) tuples, like VariationModel uses."""
+	support = {}
+	for axis,regionAxis in zip(fvarAxes, region.VarRegionAxis):
+		if regionAxis.PeakCoord == 0:
+			continue
+		support[axis.axisTag] = (regionAxis.StartCoord,
+		                         regionAxis.PeakCoord,
+		                         regionAxis.EndCoord)
+	return support
+
+
+class VarStoreInstancer(object):
+	"""Evaluates the deltas of the items of a VarStore at a location.
+
+	The scalar of each region, and the scalars of the regions of each
+	VarData, are computed the first time they are needed, and remembered
+	until the location is changed with setLocation. 'varstore' may be
+	None, for which all the deltas are 0.
+	"""
+
+	def __init__(self, varstore, fvarAxes, location={}):
+		self.fvarAxes = fvarAxes
+		assert varstore is None or varstore.Format == 1
+		self._varData = varstore.VarData if varstore else []
+		self._regions = varstore.VarRegionList.Region if varstore else []
+		self.setLocation(location)
+
+	def setLocation(self, location):
+		"""Sets the normalized location at which the deltas are evaluated."""
+		self.location = dict(location)
+		self._regionScalars = {}
+		self._varDataScalars = {}
+
+	def _getScalar(self, regionIdx):
+		scalar = self._regionScalars.get(regionIdx)
+		if scalar is None:
+			support = _getRegionSupport(self._regions[regionIdx], self.fvarAxes)
+			scalar = supportScalar(self.location, support)
+			self._regionScalars[regionIdx] = scalar
+		return scalar
+
+	def _getVarDataScalars(self, major):
+		scalars = self._varDataScalars.get(major)
+		if scalars is None:
+			scalars = [self._getScalar(regionIdx)
+			           for regionIdx in self._varData[major].VarRegionIndex]
+			self._varDataScalars[major] = scalars
+		return scalars
+
+	def __getitem__(self, varidx):
+		"""The delta of the item of variation index 'varidx', which holds
+		the VarData index in its high 16 bits, and the item index in its
+		low 16 bits, as a float."""
+		major, minor = varidx >> 16, varidx & 0xFFFF
+		if not self._varData:
+			return 0.
+		scalars = self._getVarDataScalars(major)
+		delta = 0.
+		for d,scalar in zip(self._varData[major].Item[minor], scalars):
+			if scalar:
+				delta += d * scalar
+		return delta
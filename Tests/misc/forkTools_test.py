@@ -0,0 +1,34 @@
+from __future__ import print_function, division, absolute_import
+from fontTools.misc.py23 import *
+from fontTools.misc import forkTools
+import multiprocessing
+import pytest
+
+
+def _getArg(i):
+    values, = forkTools.getWorkerArgs()
+    return values[i]
+
+
+def test_getForkPool():
+    if forkTools.getForkContext() is None:
+        pytest.skip("'fork' is not available")
+    values = [object.__repr__(object()) for i in range(4)]
+    pool = forkTools.getForkPool(2, values)
+    try:
+        assert pool.map(_getArg, range(4)) == values
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1", 1), ("4", 4), (3, 3), ("0", multiprocessing.cpu_count())])
+def test_parseWorkers(value, expected):
+    assert forkTools.parseWorkers(value) == expected
+
+
+@pytest.mark.parametrize("value", ["-1", "many", ""])
+def test_parseWorkers_invalid(value):
+    with pytest.raises(ValueError):
+        forkTools.parseWorkers(value)
@@ -0,0 +1,68 @@
+from __future__ import print_function, division, absolute_import
+from fontTools.misc.py23 import *
+from fontTools.misc.psCharStrings import (
+    T2CharString, SimpleT2Decompiler, T2OutlineExtractor)
+from fontTools.pens.recordingPen import RecordingPen
+import unittest
+
+
+def compiled(program):
+    charString = T2CharString(program=program)
+    charString.compile()
+    return charString
+
+
+class T2DecompileTest(unittest.TestCase):
+
+    # the operands take all the encodings: one, two and three byte ints,
+    # and 16.16 fixed; the hint mask is as long as the hints counted
+    program = [
+        -107, 107, 108, -108, 1131, -1131, 'hstemhm',
+        1132, -1132, 32767, -32768, 'vstemhm',
+        'hintmask', b'\xf0',
+        0.5, -2.25, 'rmoveto',
+        10, 20, -30, 'rlineto',
+        'cntrmask', b'\xa0',
+        'endchar']
+
+    def test_decompile(self):
+        charString = compiled(self.program)
+        charString.decompile()
+        self.assertEqual(charString.program, self.program)
+
+    def test_decompile_tokens(self):
+        # the token by token decoding of the operands, which Type 1
+        # charstrings and subclasses with another encoding go through
+        class TokenT2CharString(T2CharString):
+            operandEncoding = T2CharString.operandEncoding[:]
+        charString = TokenT2CharString(bytecode=compiled(self.program).bytecode)
+        charString.decompile()
+        self.assertEqual(charString.program, self.program)
+
+    def test_decompile_subrs(self):
+        subrs = [compiled([10, 20, 'rlineto', 'return']),
+                 compiled([1, 2, 3, 4, 'hstemhm', -107, 'callsubr', 'return'])]
+        charString = compiled([-106, 'callsubr', 'hintmask', b'\xc0', 'endchar'])
+        SimpleT2Decompiler(subrs, []).execute(charString)
+        self.assertEqual(charString.program,
+                         [-106, 'callsubr', 'hintmask', b'\xc0', 'endchar'])
+        self.assertEqual(subrs[0].program, [10, 20, 'rlineto', 'return'])
+
+    def test_draw_twice(self):
+        # from bytecode, then from the program it decompiled to
+        charString = compiled([100, 10, 20, 'rmoveto', 30, 'hlineto', 40,
+                               'vlineto', 'endchar'])
+        pens = [RecordingPen(), RecordingPen()]
+        for pen in pens:
+            extractor = T2OutlineExtractor(pen, [], [], 300, 500)
+            extractor.execute(charString)
+            self.assertEqual(extractor.width, 400)
+        self.assertEqual(pens[0].value, pens[1].value)
+        self.assertEqual(pens[0].value, [
+            ('moveTo', ((10, 20),)), ('lineTo', ((40, 20),)),
+            ('lineTo', ((40, 60),)), ('closePath', ())])
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(unittest.main())
@@ -4,11 +4,17 @@ from __future__ import print_function, division, absolute_import, unicode_litera
 from fontTools.misc.py23 import *
 import os
 import unittest
-from fontTools.ttLib import TTFont
-from fontTools.misc.xmlReader import XMLReader, ProgressPrinter, BUFSIZE
+from fontTools.ttLib import TTFont, newTable
+from fontTools.misc.xmlReader import (
+	XMLReader, ProgressPrinter, BUFSIZE, TTXParseError, _iterTableElements)
+import shutil
 import tempfile
 
 
+DATA_DIR = os.path.join(
+	os.path.dirname(os.path.dirname(__file__)), "subset", "data")
+
+
 class TestXMLReader(unittest.TestCase):
 
 	def test_decode_utf8(self):
@@ -143,6 +149,100 @@ class TestXMLReader(unittest.TestCase):
 		os.remove(tmp.name)
 
 
+class ParallelXMLReaderTest(unittest.TestCase):
+
+	@staticmethod
+	def dump(font):
+		buf = BytesIO()
+		font.saveXML(buf)
+		return buf.getvalue()
+
+	def assertImportsEqual(self, path):
+		expected = TTFont()
+		expected.importXML(path)
+		font = TTFont()
+		font.importXML(path, workers=3)
+		self.assertEqual(sorted(expected.keys()), sorted(font.keys()))
+		self.assertEqual(self.dump(expected), self.dump(font))
+
+	def test_iterTableElements(self):
+		data = (b'<?xml version="1.0" encoding="UTF-8"?>\n'
+			b'<ttFont sfntVersion="OTTO">\n'
+			b'  <head/>\n'
+			b'  <glyf>\n'
+			b'    <TTGlyph name="a"/><TTGlyph name="b">\n'
+			b'      <contour/>\n'
+			b'    </TTGlyph>\n'
+			b'  </glyf>\n'
+			b'  <post src="font.post.ttx"/></ttFont>\n')
+		elements = list(_iterTableElements(data, chunkSize=16))
+		self.assertEqual(["head", "glyf", "post"], [e.name for e in elements])
+		self.assertEqual(b'<head/>', elements[0].getData(data))
+		self.assertEqual(
+			[data.index(b'<TTGlyph name="a"/>'), data.index(b'<TTGlyph name="b">')],
+			elements[1].children)
+		self.assertEqual(data[data.index(b"<glyf>"):data.index(b"\n  <post")],
+			elements[1].getData(data))
+		self.assertEqual([
+			b'<glyf>\n    <TTGlyph name="a"/></glyf>',
+			b'<glyf>\n    <TTGlyph name="b">\n      <contour/>\n    </TTGlyph>\n  </glyf>'],
+			elements[1].split(data, 2))
+		self.assertEqual({"src": "font.post.ttx"}, elements[2].attrs)
+		self.assertEqual(b'<post src="font.post.ttx"/>', elements[2].getData(data))
+
+	def test_iterTableElements_illegal_root(self):
+		with self.assertRaises(TTXParseError):
+			list(_iterTableElements(b'<cmap><tableVersion version="0"/></cmap>'))
+
+	def test_read_workers(self):
+		for name in ("Lobster.subset.ttx", "TestTTF-Regular.ttx", "TestGVAR.ttx"):
+			self.assertImportsEqual(os.path.join(DATA_DIR, name))
+
+	def test_read_workers_split_tables(self):
+		font = TTFont()
+		font.importXML(os.path.join(DATA_DIR, "TestGVAR.ttx"))
+		tmpdir = tempfile.mkdtemp()
+		try:
+			path = os.path.join(tmpdir, "TestGVAR.ttx")
+			font.saveXML(path, splitTables=True)
+			self.assertImportsEqual(path)
+		finally:
+			shutil.rmtree(tmpdir)
+
+	def test_read_workers_glyf_parts(self):
+		glyphs = ["g%d" % i for i in range(200)]
+		lines = ['<ttFont>', '  <GlyphOrder>']
+		lines.extend('    <GlyphID name="%s"/>' % g for g in glyphs)
+		lines.extend(['  </GlyphOrder>', '  <glyf>'])
+		for i, g in enumerate(glyphs):
+			lines.extend([
+				'    <TTGlyph name="%s" xMin="0" yMin="0" xMax="%d" yMax="10">' % (g, i),
+				'      <contour>',
+				'        <pt x="0" y="0" on="1"/>',
+				'        <pt x="%d" y="10" on="1"/>' % i,
+				'      </contour>',
+				'      <instructions/>',
+				'    </TTGlyph>'])
+		lines.extend(['  </glyf>', '</ttFont>'])
+		data = tobytes("\n".join(lines))
+		expected = TTFont()
+		expected.importXML(BytesIO(data))
+		font = TTFont()
+		font.importXML(BytesIO(data), workers=3)
+		self.assertEqual(set(glyphs), set(font["glyf"].glyphs))
+		for g in glyphs:
+			self.assertEqual(expected["glyf"][g].compile(expected["glyf"]),
+				font["glyf"][g].compile(font["glyf"]))
+
+	def test_glyf_mergeXMLParts(self):
+		glyf = newTable("glyf")
+		part1 = newTable("glyf")
+		part1.glyphs = {"a": 1, "b": 2}
+		part2 = newTable("glyf")
+		part2.glyphs = {"c": 3}
+		glyf.mergeXMLParts([part1, part2])
+		self.assertEqual({"a": 1, "b": 2, "c": 3}, glyf.glyphs)
+
 
 if __name__ == '__main__':
 	import sys
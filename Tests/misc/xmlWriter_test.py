@@ -122,6 +122,56 @@ class TestXMLWriter(unittest.TestCase):
 				header + linesep + b"hello" + linesep + b"world" + linesep,
 				writer.file.getvalue())
 
+	def test_stringifyattrs_escaped(self):
+		writer = XMLWriter(BytesIO())
+		self.assertEqual(' a="-1" b="0.5" c="True"',
+				 writer.stringifyattrs(a=-1, b=.5, c=True))
+		self.assertEqual(' a="x&amp;&lt;y&gt;&quot;z&#13;" b="uni00E9.alt"',
+				 writer.stringifyattrs([("a", 'x&<y>"z\r'), ("b", "uni00E9.alt")]))
+
+	def writeSample(self, writer):
+		writer.begintag("glyphs", count=3)
+		writer.newline()
+		for i in range(3):
+			writer.simpletag("glyph", name="g&%d" % i, id=i)
+			writer.comment(u"\u00e9")
+			writer.newline()
+		writer.write8bit(b"\xff")
+		writer.writecdata("<cdata>")
+		writer.newline()
+		writer.endtag("glyphs")
+		writer.newline()
+
+	def test_buffered(self):
+		expected = XMLWriter(BytesIO())
+		self.writeSample(expected)
+		writer = XMLWriter(BytesIO(), buffered=True)
+		self.writeSample(writer)
+		self.assertEqual(HEADER, writer.file.getvalue())
+		writer.flush()
+		self.assertEqual(expected.file.getvalue(), writer.file.getvalue())
+		writer.flush()
+		self.assertEqual(expected.file.getvalue(), writer.file.getvalue())
+
+	def test_buffered_unicode_file(self):
+		expected = XMLWriter(StringIO())
+		self.writeSample(expected)
+		writer = XMLWriter(StringIO(), buffered=True)
+		self.writeSample(writer)
+		writer.flush()
+		self.assertEqual(expected.file.getvalue(), writer.file.getvalue())
+
+	def test_buffered_flush_lines(self):
+		f = BytesIO()
+		writer = XMLWriter(f, buffered=True)
+		for i in range(2500):
+			writer.simpletag("line", n=i)
+			writer.newline()
+		data = f.getvalue()
+		self.assertEqual(2001, data.count(b"\n"))
+		writer.close()
+		self.assertTrue(f.closed)
+
 
 if __name__ == '__main__':
 	import sys
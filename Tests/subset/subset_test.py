@@ -3,6 +3,8 @@ from fontTools.misc.py23 import *
 from fontTools import subset
 from fontTools.ttLib import TTFont, newTable
 from fontTools.misc.loggingTools import CapturingLogHandler
+from fontTools.feaLib.builder import addOpenTypeFeaturesFromString
+from fontTools.pens.recordingPen import RecordingPen
 import difflib
 import logging
 import os
@@ -254,6 +256,51 @@ class SubsetTest(unittest.TestCase):
         self.expect_ttx(subsetfont, self.getpath(
             "expect_no_hinting_desubroutinize_CFF.ttx"), ["CFF "])
 
+    def test_subroutinize_CFF(self):
+        for name in ["Lobster.subset.ttx", "TestCID-Regular.ttx"]:
+            _, fontpath = self.compile_font(self.getpath(name), ".otf")
+            desubroutinizedpath = self.temp_path(".otf")
+            subset.main([fontpath, "--desubroutinize", "--notdef-outline",
+                         "--output-file=%s" % desubroutinizedpath, "*"])
+            subsetpath = self.temp_path(".otf")
+            subset.main([fontpath, "--subroutinize", "--notdef-outline",
+                         "--output-file=%s" % subsetpath, "*"])
+            desubroutinized = TTFont(desubroutinizedpath)
+            subsetfont = TTFont(subsetpath)
+            self.assertLess(len(subsetfont.getTableData("CFF ")),
+                            len(desubroutinized.getTableData("CFF ")))
+            glyphSets = [desubroutinized.getGlyphSet(), subsetfont.getGlyphSet()]
+            self.assertEqual(sorted(glyphSets[0].keys()), sorted(glyphSets[1].keys()))
+            for glyphName in glyphSets[0].keys():
+                pens = [RecordingPen(), RecordingPen()]
+                for glyphSet, pen in zip(glyphSets, pens):
+                    glyphSet[glyphName].draw(pen)
+                self.assertEqual(pens[0].value, pens[1].value)
+
+    def test_mark_used_subrs(self):
+        from fontTools.misc.psCharStrings import T2CharString
+        from fontTools.cffLib import SubrsIndex, GlobalSubrsIndex
+        def charString(program):
+            return T2CharString(program=[
+                int(t) if t.lstrip("-").isdigit() else t for t in program.split()])
+        def index(cls, programs):
+            subrs = cls()
+            for program in programs:
+                subrs.append(charString(program))
+            return subrs
+        # the bias is 107 for fewer than 1240 subroutines
+        subrs = index(SubrsIndex, ["-106 callsubr return", "10 rlineto return",
+                                   "-107 callgsubr return", "return"])
+        gsubrs = index(GlobalSubrsIndex, ["20 hlineto return",
+                                          "-107 callgsubr return"])
+        visited = set()
+        for program in ["-107 callsubr endchar", "-106 callgsubr endchar"]:
+            subset._mark_used_subrs(charString(program), subrs, gsubrs, visited)
+        self.assertEqual(subrs._used, set([0, 1]))
+        self.assertEqual(gsubrs._used, set([0, 1]))
+        self.assertEqual(subrs[0].subr_calls(), ((-106,), ()))
+        self.assertEqual(gsubrs[1].subr_calls(), ((), (-107,)))
+
     def test_no_hinting_TTF(self):
         _, fontpath = self.compile_font(self.getpath("TestTTF-Regular.ttx"), ".ttf")
         subsetpath = self.temp_path(".ttf")
@@ -303,6 +350,243 @@ class SubsetTest(unittest.TestCase):
         subset.main([fontpath, "--recalc-timestamp", "--output-file=%s" % subsetpath, "*"])
         self.assertLess(modified, TTFont(subsetpath)['head'].modified)
 
+    def subset_session_expected(self, fontpath, **kwargs):
+        options = subset.Options()
+        font = subset.load_font(fontpath, options, lazy=False)
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(**kwargs)
+        subsetter.subset(font)
+        buf = BytesIO()
+        font.save(buf)
+        return buf.getvalue()
+
+    def test_subsetter_session(self):
+        requests = [
+            dict(unicodes=[0x41, 0x42, 0x49, 0x4A]),
+            dict(text="IJ0"),
+            dict(unicodes=[0x30]),
+            dict(glyphs=["a", "b"], unicodes=[0x49]),
+            dict(unicodes=[0x41, 0x42, 0x49, 0x4A]),
+        ]
+        for name, suffix in [("Lobster.subset.ttx", ".otf"),
+                             ("TestTTF-Regular.ttx", ".ttf"),
+                             ("TestCID-Regular.ttx", ".otf"),
+                             ("TestGVAR.ttx", ".ttf")]:
+            _, fontpath = self.compile_font(self.getpath(name), suffix)
+            font = subset.load_font(fontpath, subset.Options())
+            original = BytesIO()
+            font.save(original)
+            session = subset.SubsetterSession(font)
+            for kwargs in requests:
+                kwargs = dict(kwargs)
+                if "glyphs" in kwargs:
+                    kwargs["glyphs"] = [g for g in kwargs["glyphs"]
+                                        if g in font.getGlyphOrder()]
+                buf = BytesIO()
+                session.subset(**kwargs).save(buf)
+                self.assertEqual(buf.getvalue(),
+                                 self.subset_session_expected(fontpath, **kwargs))
+            buf = BytesIO()
+            font.save(buf)
+            self.assertEqual(buf.getvalue(), original.getvalue())
+
+    def test_subsetter_session_lookup_closures(self):
+        _, fontpath = self.compile_font(self.getpath("Lobster.subset.ttx"), ".otf")
+        session = subset.SubsetterSession(TTFont(fontpath))
+        session.subset(text="IJ")
+        closures = dict(session._lookup_closures._closures)
+        self.assertTrue(closures)
+        font = session.subset(text="JI")
+        self.assertEqual(session._lookup_closures._closures, closures)
+        self.assertIn("IJ", font.getGlyphOrder())
+        font = session.subset(text="I")
+        self.assertNotIn("IJ", font.getGlyphOrder())
+
+    def test_subsetter_session_missing_unicodes(self):
+        _, fontpath = self.compile_font(self.getpath("TestTTF-Regular.ttx"), ".ttf")
+        options = subset.Options()
+        options.ignore_missing_unicodes = False
+        session = subset.SubsetterSession(TTFont(fontpath), options)
+        for i in range(2):
+            with self.assertRaises(subset.Subsetter.MissingUnicodesSubsettingError):
+                session.subset(unicodes=[0x41, 0x10FFFF])
+
+    def test_subsetter_session_file(self):
+        _, fontpath = self.compile_font(self.getpath("TestTTF-Regular.ttx"), ".ttf")
+        expected = self.subset_session_expected(fontpath, text="abc")
+        session = subset.SubsetterSession(fontpath)
+        buf = BytesIO()
+        session.subset(text="abc").save(buf)
+        self.assertEqual(buf.getvalue(), expected)
+
+        options = subset.Options()
+        font = TTFont(fontpath, lazy=True, mmap=True,
+                      recalcBBoxes=options.recalc_bounds,
+                      recalcTimestamp=options.recalc_timestamp)
+        session = subset.SubsetterSession(font, options)
+        font.close()
+        del font
+        self.assertIs(type(session._base["glyf"].glyphs._data), bytes)
+        buf = BytesIO()
+        session.subset(text="abc").save(buf)
+        self.assertEqual(buf.getvalue(), expected)
+
+    def test_subsetter_session_subset_many(self):
+        _, fontpath = self.compile_font(self.getpath("Lobster.subset.ttx"), ".otf")
+        options = subset.Options()
+        options.ignore_missing_unicodes = False
+        session = subset.SubsetterSession(fontpath, options)
+        requests = [dict(text="AB"), dict(text="IJ"), dict(unicodes=[0x30]),
+                    dict(glyphs=["A.salt"])]
+        expected = []
+        for request in requests:
+            buf = BytesIO()
+            subset.save_font(session.subset(**request), buf, options)
+            expected.append(buf.getvalue())
+        self.assertEqual(session.subset_many(requests), expected)
+        self.assertEqual(session.subset_many(requests, workers=2), expected)
+        with self.assertRaises(subset.Subsetter.MissingUnicodesSubsettingError):
+            session.subset_many(requests + [dict(unicodes=[0x10FFFF])],
+                                workers=2)
+
+    @staticmethod
+    def closure_font(glyphs, features=None, gsub_xml=None):
+        font = TTFont()
+        font.setGlyphOrder(glyphs)
+        if features is not None:
+            addOpenTypeFeaturesFromString(font, features)
+        if gsub_xml is not None:
+            font.importXML(BytesIO(tobytes(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<ttFont>%s</ttFont>' % gsub_xml)))
+        buf = BytesIO()
+        font.save(buf)
+        buf.seek(0)
+        font = TTFont(buf)
+        font.setGlyphOrder(glyphs)
+        return font
+
+    def test_closure_glyphs_revisit_lookups(self):
+        # each lookup only applies to the glyphs added by the next one, so
+        # the closure needs several passes
+        features = """
+            lookup L { sub b by a; } L;
+            feature calt {
+                lookup C1 { sub e b' lookup L; } C1;
+                lookup C2 { sub c by b; } C2;
+                lookup C3 { sub d by c; } C3;
+            } calt;
+            """
+        for glyphs, expected in [
+                (["d", "e"], [".notdef", "a", "b", "c", "d", "e"]),
+                (["d"], [".notdef", "b", "c", "d"])]:
+            font = self.closure_font(
+                [".notdef", "a", "b", "c", "d", "e"], features=features)
+            subsetter = subset.Subsetter(subset.Options(layout_features=["*"]))
+            subsetter.populate(glyphs=glyphs)
+            subsetter.subset(font)
+            self.assertEqual(font.getGlyphOrder(), expected)
+
+    def test_closure_glyphs_revisit_class0(self):
+        # the rule of lookup 0 matches 'b' followed by any glyph not in its
+        # ClassDef, e.g. the 'd' that lookup 1 adds
+        font = self.closure_font([".notdef", "a", "b", "c", "d"], gsub_xml="""
+          <GSUB>
+            <Version value="0x00010000"/>
+            <ScriptList>
+              <ScriptRecord index="0">
+                <ScriptTag value="DFLT"/>
+                <Script>
+                  <DefaultLangSys>
+                    <ReqFeatureIndex value="65535"/>
+                    <FeatureIndex index="0" value="0"/>
+                  </DefaultLangSys>
+                </Script>
+              </ScriptRecord>
+            </ScriptList>
+            <FeatureList>
+              <FeatureRecord index="0">
+                <FeatureTag value="calt"/>
+                <Feature>
+                  <LookupListIndex index="0" value="0"/>
+                  <LookupListIndex index="1" value="1"/>
+                </Feature>
+              </FeatureRecord>
+            </FeatureList>
+            <LookupList>
+              <Lookup index="0">
+                <LookupType value="5"/>
+                <LookupFlag value="0"/>
+                <ContextSubst index="0" Format="2">
+                  <Coverage>
+                    <Glyph value="b"/>
+                  </Coverage>
+                  <ClassDef>
+                    <ClassDef glyph=".notdef" class="2"/>
+                    <ClassDef glyph="b" class="1"/>
+                    <ClassDef glyph="c" class="2"/>
+                  </ClassDef>
+                  <SubClassSet index="0" empty="1"/>
+                  <SubClassSet index="1">
+                    <SubClassRule index="0">
+                      <Class index="0" value="0"/>
+                      <SubstLookupRecord index="0">
+                        <SequenceIndex value="0"/>
+                        <LookupListIndex value="2"/>
+                      </SubstLookupRecord>
+                    </SubClassRule>
+                  </SubClassSet>
+                </ContextSubst>
+              </Lookup>
+              <Lookup index="1">
+                <LookupType value="1"/>
+                <LookupFlag value="0"/>
+                <SingleSubst index="0">
+                  <Substitution in="c" out="d"/>
+                </SingleSubst>
+              </Lookup>
+              <Lookup index="2">
+                <LookupType value="1"/>
+                <LookupFlag value="0"/>
+                <SingleSubst index="0">
+                  <Substitution in="b" out="a"/>
+                </SingleSubst>
+              </Lookup>
+            </LookupList>
+          </GSUB>
+          """)
+        subsetter = subset.Subsetter(subset.Options(layout_features=["*"]))
+        subsetter.populate(glyphs=["b", "c"])
+        subsetter.subset(font)
+        self.assertEqual(font.getGlyphOrder(),
+                         [".notdef", "a", "b", "c", "d"])
+
+    def test_glyph_id_sets(self):
+        from fontTools.ttLib.tables import otTables
+        glyph_ids = subset._GlyphIdMap([".notdef", "a", "b", "c", "d", "e"])
+        # use the bitmasks of the tables from their first intersection on
+        glyph_ids.min_intersections = 1
+        glyph_ids.min_glyphs = 0
+        coverage = otTables.Coverage()
+        coverage.glyphs = ["a", "c", "d"]
+        classDef = otTables.ClassDef()
+        classDef.classDefs = {"a": 1, "b": 2, "c": 1, "e": 3}
+        for names in (["a", "d"], ["b", "e"], ["a", "c", "d", "e"],
+                      ["b", "x"], []):
+            glyphs = subset._GlyphSet(names, glyph_ids)
+            self.assertEqual(coverage.intersect(glyphs),
+                             coverage.intersect(set(names)))
+            self.assertEqual(coverage.intersect_glyphs(glyphs),
+                             coverage.intersect_glyphs(set(names)))
+            self.assertEqual(classDef.intersect(glyphs),
+                             classDef.intersect(set(names)))
+            for klass in range(4):
+                self.assertEqual(classDef.intersect_class(glyphs, klass),
+                                 classDef.intersect_class(set(names), klass))
+        self.assertEqual(glyph_ids.names(glyph_ids.mask(["e", "b"])[0]),
+                         ["b", "e"])
+        self.assertEqual(glyph_ids.mask(["b", "x"]), (4, set(["x"])))
+
 
 if __name__ == "__main__":
     sys.exit(unittest.main())
@@ -1,8 +1,79 @@
 from __future__ import print_function, division, absolute_import
 from fontTools.misc.py23 import *
-from fontTools.ttLib.sfnt import calcChecksum
+from fontTools.misc.py23 import PY3
+from fontTools.misc.xmlWriter import XMLWriter
+from fontTools.ttLib import TTFont, TTLibError
+from fontTools.ttLib.sfnt import SFNTReader, calcChecksum
+import os
+import pytest
 
 
 def test_calcChecksum():
     assert calcChecksum(b"abcd") == 1633837924
     assert calcChecksum(b"abcdxyz") == 3655064932
+
+
+def test_calcChecksum_memoryview():
+    assert calcChecksum(memoryview(b"abcdxyz")) == 3655064932
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "subset", "data")
+
+FONTS = {
+    "Lobster.subset.ttx": ["CFF ", "GPOS", "GSUB", "name"],
+    "TestTTF-Regular.ttx": ["glyf", "cmap", "hmtx", "name"],
+}
+
+
+@pytest.fixture(params=sorted(FONTS))
+def fontfile(request, tmpdir):
+    font = TTFont()
+    font.importXML(os.path.join(DATA_DIR, request.param))
+    path = str(tmpdir / os.path.splitext(request.param)[0] + ".otf")
+    font.save(path)
+    return path, FONTS[request.param]
+
+
+def _dumpTables(font, tags):
+    result = {}
+    for tag in tags:
+        writer = XMLWriter(BytesIO())
+        font[tag].toXML(writer, font)
+        result[tag] = writer.file.getvalue()
+    return result
+
+
+def test_mmap_reader(fontfile):
+    path, tags = fontfile
+    with open(path, "rb") as f:
+        reader = SFNTReader(f, mmap=True)
+        for tag in tags:
+            data = reader[tag]
+            if PY3:
+                assert isinstance(data, memoryview)
+            assert bytes(data) == SFNTReader(f)[tag]
+        del data
+        reader.close()
+        assert f.closed
+
+
+def test_mmap_font(fontfile, tmpdir):
+    path, tags = fontfile
+    font = TTFont(path)
+    expected = _dumpTables(font, tags)
+    font.close()
+
+    font = TTFont(path, mmap=True, checkChecksums=2)
+    assert _dumpTables(font, tags) == expected
+
+    savedPath = str(tmpdir / "saved.otf")
+    font.save(savedPath)
+    font.close()
+    font = TTFont(savedPath)
+    assert _dumpTables(font, tags) == expected
+    font.close()
+
+    font = TTFont(path, mmap=True)
+    with pytest.raises(TTLibError):
+        font.save(path)
+    font.close()
@@ -4,8 +4,11 @@ from __future__ import print_function, division, absolute_import
 from __future__ import unicode_literals
 from fontTools.misc.py23 import *
 from fontTools.ttLib import TTFont, newTable
+from fontTools.cffLib import Index, IndexCompiler, packOffsets, unpackOffsets
+from fontTools.pens.recordingPen import RecordingPen
 import re
 import os
+import struct
 import unittest
 
 
@@ -45,6 +48,54 @@ class CFFTableTest(unittest.TestCase):
         cffData = cffTable.compile(font)
         self.assertEqual(cffData, self.cffData)
 
+    def test_subroutinize(self):
+        def drawGlyphs(cffTable):
+            topDict = cffTable.cff.topDictIndex[0]
+            glyphs = {}
+            for glyphName in topDict.charset:
+                pen = RecordingPen()
+                topDict.CharStrings[glyphName].draw(pen)
+                glyphs[glyphName] = pen.value
+            return glyphs
+        font = TTFont(sfntVersion='OTTO')
+        cffTable = font['CFF '] = newTable('CFF ')
+        cffTable.decompile(self.cffData, font)
+        glyphs = drawGlyphs(cffTable)
+        cffTable.subroutinize = True
+        cffData = cffTable.compile(font)
+        self.assertLess(len(cffData), len(self.cffData))
+        cffTable = newTable('CFF ')
+        cffTable.decompile(cffData, font)
+        self.assertTrue(cffTable.cff.GlobalSubrs)
+        self.assertEqual(drawGlyphs(cffTable), glyphs)
+
+
+class CFFIndexTest(unittest.TestCase):
+
+    def test_packOffsets(self):
+        for offSize, offsets in [(1, [1, 2, 0xFF]),
+                                 (2, [1, 0x100, 0xFFFF]),
+                                 (3, [1, 0x10000, 0xFFFFFF]),
+                                 (4, [1, 0x1000000, 0xFFFFFFFF])]:
+            data = packOffsets(offsets, offSize)
+            self.assertEqual(data, b"".join(
+                struct.pack(">L", offset)[4-offSize:] for offset in offsets))
+            self.assertEqual(list(unpackOffsets(data, offSize)), offsets)
+
+    def test_read_index(self):
+        for itemSize in (1, 100, 1000, 100000):
+            index = Index()
+            index.items = [bytechr(i % 256) * itemSize for i in range(300)]
+            buf = BytesIO()
+            IndexCompiler(index.items, None, None).toFile(buf)
+            buf.write(b"tail")
+            buf.seek(0)
+            index = Index(buf)
+            self.assertEqual(buf.read(), b"tail")
+            self.assertEqual(len(index), 300)
+            self.assertEqual(index[299], bytechr(299 % 256) * itemSize)
+            self.assertEqual(index[0], b"\0" * itemSize)
+
 
 if __name__ == "__main__":
     import sys
@@ -512,11 +512,20 @@ class TupleVariationTest(unittest.TestCase):
 		# words, zeroes
 		self.assertEqual("40 66 66 80", compileDeltaValues([0x6666, 0]))
 		self.assertEqual("40 66 66 81", compileDeltaValues([0x6666, 0, 0]))
+		# words, bytes: a single byte at the end is encoded as part of the words run
+		self.assertEqual("41 66 66 00 02", compileDeltaValues([0x6666, 2]))
+		self.assertEqual("40 66 66 01 02 02", compileDeltaValues([0x6666, 2, 2]))
 		# bytes or words from floats
 		self.assertEqual("00 01", compileDeltaValues([1.1]))
 		self.assertEqual("00 02", compileDeltaValues([1.9]))
 		self.assertEqual("40 66 66", compileDeltaValues([0x6666 + 0.1]))
 		self.assertEqual("40 66 66", compileDeltaValues([0x6665 + 0.9]))
+		# floats are rounded before the runs are found: the values that round
+		# to zero, or into the range of bytes, are encoded as such
+		self.assertEqual("81", compileDeltaValues([0.3, 0.3]))
+		self.assertEqual("80 00 0A 81 00 0A", compileDeltaValues([0.4, 10, 0.2, -0.1, 10]))
+		self.assertEqual("01 80 05", compileDeltaValues([-128.4, 5]))
+		self.assertEqual("41 00 80 00 01", compileDeltaValues([127.6, 1]))
 
 	def test_decompileDeltas(self):
 		decompileDeltas = TupleVariation.decompileDeltas_
@@ -541,6 +550,25 @@ class TupleVariationTest(unittest.TestCase):
 			random.shuffle(deltas)
 			self.assertListEqual(deltas, decompile(compile(deltas)))
 
+	def test_compileDeltas_roundTrip(self):
+		# the deltas of all the points, of some of them, and floats
+		rng = random.Random(0)
+		for i in range(50):
+			numPoints = rng.randint(1, 300)
+			deltas = [(rng.choice([0, rng.randint(-128, 127), rng.randint(-32768, 32767)]),
+			           rng.choice([0, rng.randint(-128, 127), rng.uniform(-500, 500)]))
+			          for _ in range(numPoints)]
+			points = set(rng.sample(range(numPoints), rng.randint(1, numPoints)))
+			var = TupleVariation({}, deltas)
+			data = var.compileDeltas(points)
+			decompile = TupleVariation.decompileDeltas_
+			deltasX, pos = decompile(len(points), data, 0)
+			deltasY, pos = decompile(len(points), data, pos)
+			self.assertEqual(len(data), pos)
+			self.assertListEqual(
+				[(int(round(x)), int(round(y))) for x, y in [deltas[p] for p in sorted(points)]],
+				list(zip(deltasX, deltasY)))
+
 	def test_compileSharedTuples(self):
 		# Below, the peak coordinate {"wght": 1.0, "wdth": 0.7} appears
 		# three times; {"wght": 1.0, "wdth": 0.8} appears twice.
@@ -1,6 +1,11 @@
 from __future__ import print_function, division, absolute_import
 from fontTools.misc.py23 import *
-from fontTools.ttLib.tables._g_l_y_f import GlyphCoordinates
+from fontTools.ttLib import TTFont
+from fontTools.ttLib.tables import _g_l_y_f, ttProgram
+from fontTools.ttLib.tables._g_l_y_f import (
+    Glyph, GlyphCoordinates, LazyGlyphDict)
+import array
+import os
 import sys
 import pytest
 
@@ -135,3 +140,249 @@ class GlyphCoordinatesTest(object):
         g /= (.5,1.5)
         g /= 2
         assert g == GlyphCoordinates([(1.0, 1.0)])
+
+    def test_extend(self):
+        g = GlyphCoordinates([(1,2)])
+        g.extend(GlyphCoordinates([(3,4)]))
+        assert not g.isFloat()
+        g.extend(GlyphCoordinates([(.5,6)]))
+        assert g == GlyphCoordinates([(1,2),(3,4),(.5,6)])
+        g = GlyphCoordinates([(1.5,2)])
+        g.extend(GlyphCoordinates([(3,4)]))
+        assert g == GlyphCoordinates([(1.5,2),(3,4)])
+
+    def test_calcIntBounds(self):
+        assert GlyphCoordinates().calcIntBounds() == (0, 0, 0, 0)
+        g = GlyphCoordinates([(1,5),(-2.5,3),(4,3.75)])
+        assert g.calcIntBounds() == (-2, 3, 4, 5)
+
+    @pytest.mark.parametrize("count", [1, _g_l_y_f.NUMPY_MIN_SIZE])
+    def test_toInt_half(self, count):
+        # halves are rounded to even, by small and large glyphs alike, as
+        # py23's round() does on Python 2 and 3
+        g = GlyphCoordinates([(0.5, 1.5), (2.5, -0.5), (-1.5, -2.5)] * count)
+        g.toInt()
+        assert list(g) == [(0, 2), (2, 0), (-2, -2)] * count
+
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "data")
+
+
+class LazyGlyfTest(object):
+
+    @pytest.fixture
+    def fontfile(self):
+        font = TTFont()
+        font.importXML(os.path.join(DATA_DIR, "TestTTF-Regular.ttx"))
+        buf = BytesIO()
+        font.save(buf)
+        buf.seek(0)
+        return buf
+
+    def test_decompile_lazy(self, fontfile):
+        glyf = TTFont(fontfile, lazy=True)["glyf"]
+        assert isinstance(glyf.glyphs, LazyGlyphDict)
+        assert not glyf.glyphs._glyphs
+        assert list(glyf.keys()) == glyf.glyphOrder
+        assert len(glyf) == len(glyf.glyphOrder)
+        assert "A" not in glyf
+        glyph = glyf["period"]
+        assert glyph.numberOfContours > 0
+        assert list(glyf.glyphs._glyphs) == ["period"]
+        assert glyf.glyphs.getRawData("period") is None
+        assert glyf.glyphs.getRawData("ellipsis")
+
+    def test_compile_lazy(self, fontfile):
+        expected = TTFont(fontfile, lazy=False).getTableData("glyf")
+        fontfile.seek(0)
+        font = TTFont(fontfile, lazy=True)
+        glyf = font["glyf"]
+        glyf["period"].coordinates.translate((0, 0))
+        assert font.getTableData("glyf") == expected
+        # the glyphs are expanded to recalculate their bounding boxes
+        assert len(glyf.glyphs._glyphs) == len(glyf.glyphOrder)
+        fontfile.seek(0)
+        font = TTFont(fontfile, lazy=True, recalcBBoxes=False)
+        glyf = font["glyf"]
+        glyf["period"].coordinates.translate((0, 0))
+        assert font.getTableData("glyf") == expected
+        assert list(glyf.glyphs._glyphs) == ["period"]
+
+    def test_compile_lazy_recalcBBoxes(self, fontfile):
+        # the bounding box of a composite glyph is recalculated when one of
+        # its components is modified, even if it wasn't accessed itself
+        expected = TTFont(fontfile, lazy=False)
+        expected["glyf"]["period"].coordinates.translate((0, 100))
+        buf = BytesIO()
+        expected.save(buf)
+        buf.seek(0)
+        expected = TTFont(buf)["glyf"]["ellipsis"]
+        assert (expected.yMin, expected.yMax) == (100, 222)
+        fontfile.seek(0)
+        font = TTFont(fontfile, lazy=True)
+        font["glyf"]["period"].coordinates.translate((0, 100))
+        buf = BytesIO()
+        font.save(buf)
+        buf.seek(0)
+        ellipsis = TTFont(buf)["glyf"]["ellipsis"]
+        assert (ellipsis.yMin, ellipsis.yMax) == (100, 222)
+
+    def test_compile_lazy_recalcBBoxes_simple(self, fontfile):
+        # a wrong bounding box of a glyph that wasn't accessed is recalculated
+        font = TTFont(fontfile, lazy=False, recalcBBoxes=False)
+        yMax = font["glyf"]["period"].yMax
+        font["glyf"]["period"].yMax += 100
+        buf = BytesIO()
+        font.save(buf)
+        data = buf.getvalue()
+        font = TTFont(BytesIO(data), lazy=True, recalcBBoxes=False)
+        assert font["glyf"]["period"].yMax == yMax + 100
+        font = TTFont(BytesIO(data), lazy=True)
+        font["glyf"]["ellipsis"]
+        buf = BytesIO()
+        font.save(buf)
+        buf.seek(0)
+        assert TTFont(buf)["glyf"]["period"].yMax == yMax
+
+    def test_setitem_delitem_lazy(self, fontfile):
+        glyf = TTFont(fontfile, lazy=True)["glyf"]
+        del glyf["ellipsis"]
+        assert "ellipsis" not in glyf
+        with pytest.raises(KeyError):
+            glyf["ellipsis"]
+        glyf["new"] = Glyph()
+        assert glyf.keys()[-1] == "new"
+        assert len(glyf) == len(glyf.glyphOrder)
+
+
+class GlyphCoordinatesCodecTest(object):
+
+    @staticmethod
+    def simpleGlyph(deltas, flags):
+        glyph = Glyph()
+        glyph.numberOfContours = 1
+        glyph.endPtsOfContours = [len(deltas) - 1]
+        glyph.program = ttProgram.Program()
+        glyph.program.fromBytecode(b"")
+        glyph.flags = array.array("B", flags)
+        glyph.coordinates = GlyphCoordinates(deltas)
+        glyph.coordinates.relativeToAbsolute()
+        return glyph
+
+    def test_compileDeltasGreedy(self):
+        deltas = [(0, 0), (10, -10), (300, 0), (-5, 5)]
+        glyph = Glyph()
+        result = glyph.compileDeltasGreedy([1, 1, 1, 0], deltas)
+        assert result == (
+            b"\x31\x17\x21\x26", b"\x0a\x01\x2c\x05", b"\x0a\x05")
+        assert result == glyph.compileDeltasGreedy(
+            [1, 1, 1, 0], GlyphCoordinates(deltas))
+
+    @pytest.mark.parametrize("count, expected", [
+        (1, b"\x31"),
+        (2, b"\x31\x31"),
+        (3, b"\x39\x02"),
+        (256, b"\x39\xff"),
+        (257, b"\x39\xff\x31"),
+        (300, b"\x39\xff\x39\x2b"),
+    ])
+    def test_compile_flag_repeats(self, count, expected):
+        flags, xs, ys = Glyph().compileDeltasGreedy(
+            [1] * count, [(0, 0)] * count)
+        assert flags == expected
+        assert xs == ys == b""
+
+    @pytest.mark.parametrize("method", ["Greedy", "Optimal"])
+    def test_roundtrip(self, method):
+        deltas = [((i * 37) % 700 - 350, (i * 53) % 1000 - 500 if i % 5 else 0)
+                  for i in range(300)]
+        deltas[100:140] = [(1, 1)] * 40
+        flags = [i % 3 == 0 for i in range(300)]
+        glyph = self.simpleGlyph(deltas, flags)
+        compile = getattr(glyph, "compileDeltas" + method)
+        packed = compile(glyph.flags, GlyphCoordinates(deltas))
+        data = b"\x01\x2b\0\0" + bytesjoin(packed)
+        decoded = Glyph()
+        decoded.numberOfContours = 1
+        decoded.decompileCoordinates(data)
+        assert decoded.endPtsOfContours == [299]
+        assert decoded.flags == glyph.flags
+        assert decoded.coordinates == glyph.coordinates
+
+    def test_compile_decompile_font(self):
+        font = TTFont()
+        font.importXML(os.path.join(DATA_DIR, "TestTTF-Regular.ttx"))
+        glyf = font["glyf"]
+        for glyphName in glyf.keys():
+            glyph = glyf[glyphName]
+            if glyph.numberOfContours <= 0:
+                continue
+            decoded = Glyph(glyph.compile(glyf))
+            decoded.expand(glyf)
+            assert decoded.coordinates == glyph.coordinates
+            assert decoded.flags == glyph.flags
+            assert decoded.endPtsOfContours == glyph.endPtsOfContours
+
+
+@pytest.mark.skipif(not _g_l_y_f.haveNumpy, reason="numpy not installed")
+class GlyphCoordinatesNumpyTest(object):
+
+    INTS = [(i * 37 % 1000 - 500, i * 91 % 700 - 350) for i in range(50)]
+    FLOATS = [(x + .25 * (i % 3), y - .5) for i, (x, y) in enumerate(INTS)]
+
+    @staticmethod
+    def compare(func, *args):
+        coords = [GlyphCoordinates(a) for a in args]
+        expected = func(*coords)
+        try:
+            _g_l_y_f.haveNumpy = False
+            coords = [GlyphCoordinates(a) for a in args]
+            assert func(*coords)._a == expected._a
+        finally:
+            _g_l_y_f.haveNumpy = True
+        return expected
+
+    @pytest.mark.parametrize("points", [INTS, FLOATS])
+    def test_operations(self, points):
+        def translate(g):
+            g.translate((3, -.5))
+            return g
+        def scale(g):
+            g.scale((2, 3))
+            return g
+        def transform(g):
+            g.transform(((.5, .1), (.2, .9)))
+            return g
+        def transform_int(g):
+            g.transform(((0, 1), (-1, 0)))
+            return g
+        def relativeToAbsolute(g):
+            g.relativeToAbsolute()
+            return g
+        def absoluteToRelative(g):
+            g.absoluteToRelative()
+            return g
+        def toInt(g):
+            g.toInt()
+            return g
+        for func in (translate, scale, transform, transform_int,
+                     relativeToAbsolute, absoluteToRelative, toInt,
+                     lambda g: -g, abs, lambda g: g * 1.5, lambda g: g / 3):
+            self.compare(func, points)
+        self.compare(lambda g, h: g + h, points, self.FLOATS)
+        self.compare(lambda g, h: g - h, points, self.INTS)
+
+    def test_toInt_half(self):
+        halves = [(i + .5, -i - .5) for i in range(_g_l_y_f.NUMPY_MIN_SIZE)]
+        g = self.compare(lambda g: g.toInt() or g, halves)
+        assert list(g) == [(round(x), round(y)) for x, y in halves]
+
+    def test_keep_int(self):
+        g = self.compare(lambda g: g * (2, 1.0), self.INTS)
+        assert not g.isFloat()
+
+    def test_overflow(self):
+        g = GlyphCoordinates([(32000, 0)] * 50)
+        with pytest.raises(OverflowError):
+            g.translate((1000, 0))
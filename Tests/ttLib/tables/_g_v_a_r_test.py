@@ -2,13 +2,24 @@ from __future__ import print_function, division, absolute_import, unicode_litera
 from fontTools.misc.py23 import *
 from fontTools.misc.testTools import FakeFont, getXML, parseXML
 from fontTools.misc.textTools import deHexStr, hexStr
-from fontTools.ttLib import TTLibError, getTableClass, getTableModule, newTable
+from fontTools.ttLib import (
+	TTFont, TTLibError, getTableClass, getTableModule, newTable)
+import copy
+import os
+import pickle
+import shutil
+import tempfile
 import unittest
 from fontTools.ttLib.tables.TupleVariation import TupleVariation
+from fontTools.ttLib.tables._g_v_a_r import LazyGlyphVariations
 
 
 gvarClass = getTableClass("gvar")
 
+DATA_DIR = os.path.join(
+	os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+	"subset", "data")
+
 
 GVAR_DATA = deHexStr(
     "0001 0000 "      #   0: majorVersion=1 minorVersion=0
@@ -173,6 +184,75 @@ class GVARTableTest(unittest.TestCase):
 		self.assertEqual(gvar.variations,
 		                 {".notdef": [], "space": [], "I": []})
 
+	def test_decompile_lazy(self):
+		font, gvar = self.makeFont({})
+		font.lazy = True
+		gvar.decompile(GVAR_DATA, font)
+		variations = gvar.variations
+		self.assertIsInstance(variations, LazyGlyphVariations)
+		self.assertEqual(variations.keys(), [".notdef", "space", "I"])
+		self.assertEqual(len(variations), 3)
+		self.assertFalse(variations._variations)
+		self.assertEqual(variations["I"], GVAR_VARIATIONS["I"])
+		self.assertEqual(list(variations._variations), ["I"])
+		self.assertIsNone(variations.getRawData("I"))
+		self.assertEqual(variations.getRawData("space"), GVAR_DATA[28:52])
+		self.assertEqual(dict(variations), GVAR_VARIATIONS)
+
+	def test_compile_lazy(self):
+		font, gvar = self.makeFont({})
+		font.lazy = True
+		gvar.decompile(GVAR_DATA, font)
+		self.assertEqual(gvar.variations["I"], GVAR_VARIATIONS["I"])
+		self.assertEqual(hexStr(gvar.compile(font)), hexStr(GVAR_DATA))
+		self.assertEqual(list(gvar.variations._variations), ["I"])
+		# the variations that were decoded are compiled again
+		del gvar.variations["I"][1]
+		expectedFont, expected = self.makeFont(
+			dict(GVAR_VARIATIONS, I=GVAR_VARIATIONS["I"][:1]))
+		self.assertEqual(hexStr(gvar.compile(font)),
+		                 hexStr(expected.compile(expectedFont)))
+
+	def test_compile_lazy_sharedTuples(self):
+		font = TTFont()
+		font.importXML(os.path.join(DATA_DIR, "TestGVAR.ttx"))
+		buf = BytesIO()
+		font.save(buf)
+		data = buf.getvalue()
+		expected = TTFont(BytesIO(data))["gvar"].variations
+		font = TTFont(BytesIO(data), lazy=True)
+		gvar = font["gvar"]
+		self.assertTrue(gvar.variations.sharedTuples)
+		self.assertEqual(gvar.compile(font), font.reader["gvar"])
+		# the glyphs that are decoded, and changed, refer to the original
+		# shared tuples, as the others do
+		gvar.variations["zero"][0].coordinates[0] = (1, 2)
+		expected["zero"][0].coordinates[0] = (1, 2)
+		buf = BytesIO()
+		font.save(buf)
+		buf.seek(0)
+		self.assertEqual(dict(TTFont(buf)["gvar"].variations), expected)
+
+	def test_pickle_lazy(self):
+		font = TTFont()
+		font.importXML(os.path.join(DATA_DIR, "TestGVAR.ttx"))
+		tempdir = tempfile.mkdtemp()
+		try:
+			path = os.path.join(tempdir, "TestGVAR.ttf")
+			font.save(path)
+			expected = dict(TTFont(path)["gvar"].variations)
+			for options in ({"lazy": True}, {"lazy": True, "mmap": True}):
+				font = TTFont(path, **options)
+				gvar = font["gvar"]
+				gvar.variations["zero"]
+				for copied in (pickle.loads(pickle.dumps(gvar, 2)),
+				               copy.deepcopy(gvar)):
+					self.assertEqual(dict(copied.variations), expected)
+					self.assertFalse(copied.variations.hasRawData())
+				font.close()
+		finally:
+			shutil.rmtree(tempdir)
+
 	def test_fromXML(self):
 		font, gvar = self.makeFont({})
 		for name, attrs, content in parseXML(GVAR_XML):
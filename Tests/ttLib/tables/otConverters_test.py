@@ -6,6 +6,7 @@ from fontTools.misc.textTools import deHexStr
 import fontTools.ttLib.tables.otConverters as otConverters
 from fontTools.ttLib import newTable
 from fontTools.ttLib.tables.otBase import OTTableReader, OTTableWriter
+from fontTools.ttLib.tables import otTables
 import unittest
 
 
@@ -71,6 +72,42 @@ class NameIDTest(unittest.TestCase):
             ' value="666"/>  <!-- missing from name table -->')
 
 
+class FieldRunTest(unittest.TestCase):
+    font = FakeFont(".notdef A B C".split())
+
+    def test_buildReadConverters(self):
+        convs = otTables.PairPos.readConverters[2]
+        self.assertEqual([c.names if c.isFieldRun else c.name for c in convs],
+                         [["Coverage"], "ValueFormat1", "ValueFormat2",
+                          ["ClassDef1", "ClassDef2", "Class1Count",
+                           "Class2Count"],
+                          "Class1Record"])
+        self.assertEqual(convs[3].format, "HHHH")
+
+    def test_readFields(self):
+        run = otConverters.FieldRun([
+            otConverters.GlyphID("Glyph", 0, None, None),
+            otConverters.Fixed("Value", 0, None, None),
+            otConverters.Tag("Tag", 0, None, None)])
+        reader = OTTableReader(deHexStr("0002 00018000 6B65726E"))
+        table = {}
+        run.readFields(reader, self.font, table)
+        self.assertEqual(table, {"Glyph": "B", "Value": 1.5, "Tag": "kern"})
+        self.assertEqual(reader.pos, 10)
+
+    def test_readRecords(self):
+        # MarkArray: two MarkRecords with Class and Anchor offsets, plus
+        # a single AnchorFormat1 they both point to.
+        data = deHexStr("0002 0001 000A 0000 000A 0001 FFFE 0003")
+        markArray = otTables.MarkArray()
+        markArray.decompile(OTTableReader(data), self.font)
+        self.assertEqual([r.Class for r in markArray.MarkRecord], [1, 0])
+        for record in markArray.MarkRecord:
+            self.assertEqual(record.MarkAnchor.Format, 1)
+            self.assertEqual(record.MarkAnchor.XCoordinate, -2)
+            self.assertEqual(record.MarkAnchor.YCoordinate, 3)
+
+
 if __name__ == "__main__":
     import sys
     sys.exit(unittest.main())
@@ -2,6 +2,9 @@ from __future__ import print_function, division, absolute_import
 from fontTools.misc.py23 import *
 from fontTools.misc.testTools import parseXML, FakeFont
 from fontTools.misc.xmlWriter import XMLWriter
+from fontTools.ttLib import TTFont, newTable
+from fontTools.ttLib.tables import otBase
+from fontTools.otlLib import builder
 import fontTools.ttLib.tables.otTables as otTables
 import unittest
 
@@ -367,6 +370,72 @@ class AlternateSubstTest(unittest.TestCase):
         })
 
 
+class OverflowTest(unittest.TestCase):
+
+    @staticmethod
+    def makeFont(pairPosSizes, numSecond=20):
+        font = TTFont()
+        font.setGlyphOrder([".notdef"] + ["g%d" % i for i in range(2000)])
+        glyphMap = font.getReverseGlyphMap()
+        lookups = []
+        for l, numFirst in enumerate(pairPosSizes):
+            pairs = {}
+            for i in range(numFirst):
+                for j in range(numSecond):
+                    v = -(i + j + l) % 90 - 1
+                    value = builder.buildValue({"XPlacement": v, "YPlacement": v,
+                                                "XAdvance": v, "YAdvance": v})
+                    pairs[("g%d" % (i + l), "g%d" % ((i * 7 + j) % 2000))] = (value, None)
+            lookups.append(builder.buildLookup(
+                builder.buildPairPosGlyphs(pairs, glyphMap)))
+        gpos = otTables.GPOS()
+        gpos.Version = 0x00010000
+        gpos.ScriptList = otTables.ScriptList()
+        gpos.ScriptList.ScriptRecord = []
+        gpos.FeatureList = otTables.FeatureList()
+        gpos.FeatureList.FeatureRecord = []
+        gpos.LookupList = otTables.LookupList()
+        gpos.LookupList.Lookup = lookups
+        font["GPOS"] = newTable("GPOS")
+        font["GPOS"].table = gpos
+        return font
+
+    def compile(self, font):
+        passes = []
+        getAllData = otBase.OTTableWriter.getAllData
+        def countingGetAllData(writer, *args):
+            passes.append(writer)
+            return getAllData(writer, *args)
+        otBase.OTTableWriter.getAllData = countingGetAllData
+        try:
+            data = font["GPOS"].compile(font)
+        finally:
+            otBase.OTTableWriter.getAllData = getAllData
+        gpos = newTable("GPOS")
+        gpos.decompile(data, font)
+        return gpos.table.LookupList.Lookup, len(passes)
+
+    def test_lookup_overflows_fixed_at_once(self):
+        lookups, passes = self.compile(self.makeFont([120] * 6))
+        self.assertEqual(passes, 2)
+        self.assertEqual([l.LookupType for l in lookups], [2, 2, 9, 9, 9, 2])
+        self.assertEqual([len(l.SubTable) for l in lookups], [1] * 6)
+
+    def test_pairpos_split_in_parts(self):
+        lookups, passes = self.compile(self.makeFont([700]))
+        # first try not sharing subtables, then split in four at once,
+        # then move the four to an Extension lookup
+        self.assertEqual(passes, 4)
+        self.assertEqual(len(lookups), 1)
+        self.assertEqual(lookups[0].LookupType, 9)
+        subtables = [st.ExtSubTable for st in lookups[0].SubTable]
+        self.assertEqual(len(subtables), 4)
+        self.assertEqual(sum(len(st.PairSet) for st in subtables), 700)
+        self.assertEqual(
+            [g for st in subtables for g in st.Coverage.glyphs],
+            ["g%d" % i for i in range(700)])
+
+
 if __name__ == "__main__":
     import sys
     sys.exit(unittest.main())
@@ -0,0 +1,128 @@
+from __future__ import print_function, division, absolute_import
+from fontTools.misc.py23 import *
+from fontTools.ttLib import TTFont
+import multiprocessing
+import os
+import pytest
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "subset", "data")
+
+haveFork = (
+    "fork" in multiprocessing.get_all_start_methods()
+    if hasattr(multiprocessing, "get_all_start_methods")
+    else hasattr(os, "fork"))
+
+
+@pytest.fixture(params=["Lobster.subset.ttx", "TestTTF-Regular.ttx", "TestGVAR.ttx"])
+def fontfile(request):
+    font = TTFont()
+    font.importXML(os.path.join(DATA_DIR, request.param))
+    buf = BytesIO()
+    font.save(buf)
+    buf.seek(0)
+    return buf
+
+
+def _loadFont(fontfile, **kwargs):
+    fontfile.seek(0)
+    font = TTFont(fontfile, recalcTimestamp=False, **kwargs)
+    for tag in font.keys():
+        font[tag]
+    return font
+
+
+@pytest.mark.parametrize("reorderTables", [True, None])
+def test_save_workers(fontfile, reorderTables):
+    expected = BytesIO()
+    _loadFont(fontfile).save(expected, reorderTables=reorderTables)
+    result = BytesIO()
+    _loadFont(fontfile).save(result, reorderTables=reorderTables, workers=3)
+    assert result.getvalue() == expected.getvalue()
+
+
+@pytest.mark.skipif(not haveFork, reason="'fork' start method not available")
+def test_compileTablesInParallel(fontfile):
+    font = _loadFont(fontfile)
+    tags = [tag for tag in font.keys() if tag != "GlyphOrder"]
+    tableCache = font._compileTablesInParallel(tags, 2)
+    assert "cmap" in tableCache
+    assert "head" in tableCache
+    for tag, data in tableCache.items():
+        assert data == font.getTableData(tag)
+
+
+def test_compileTablesInParallel_lazy(fontfile):
+    font = TTFont(fontfile, lazy=True)
+    font["name"]
+    assert font._compileTablesInParallel(["name"], 2) is None
+
+
+def test_save_copyUnchanged(fontfile):
+    expected = BytesIO()
+    font = _loadFont(fontfile)
+    font["name"].names[0].string = "Modified"
+    font.save(expected)
+
+    result = BytesIO()
+    font = _loadFont(fontfile, copyUnchanged=True)
+    font["name"].names[0].string = "Modified"
+    compiled = font._save(result)
+    assert result.getvalue() == expected.getvalue()
+    assert "name" in compiled
+    assert "cmap" not in compiled
+    assert "post" not in compiled
+    for tag in ("glyf", "loca", "maxp", "head", "hhea", "hmtx", "OS/2"):
+        if tag in font:
+            assert tag in compiled
+
+
+@pytest.fixture
+def lobster():
+    font = TTFont()
+    font.importXML(os.path.join(DATA_DIR, "Lobster.subset.ttx"))
+    buf = BytesIO()
+    font.save(buf)
+    buf.seek(0)
+    return buf
+
+
+def test_save_copyUnchanged_modified(lobster):
+    font = _loadFont(lobster, copyUnchanged=True)
+    assert "GSUB" not in font._save(BytesIO())
+    font["GSUB"].table.LookupList.Lookup[0].LookupFlag ^= 1
+    assert "GSUB" in font._save(BytesIO())
+
+
+def test_save_copyUnchanged_glyphOrder(lobster):
+    font = _loadFont(lobster, copyUnchanged=True)
+    glyphOrder = list(font.getGlyphOrder())
+    glyphOrder[1], glyphOrder[2] = glyphOrder[2], glyphOrder[1]
+    font.setGlyphOrder(glyphOrder)
+    assert "GSUB" in font._save(BytesIO())
+
+
+def test_save_copyUnchanged_lazy(lobster):
+    font = TTFont(lobster, lazy=True, copyUnchanged=True)
+    font["GSUB"]
+    font["name"].names[0].string = "Modified"
+    assert set(font._save(BytesIO())) == {"head", "name"}
+
+
+def test_save_copyUnchanged_lazy_notDecompiled(lobster):
+    font = TTFont(lobster, lazy=True, copyUnchanged=True)
+    # taking the fingerprint doesn't decompile the lazy subtables
+    lookupList = font["GSUB"].table.LookupList
+    assert "reader" in lookupList.__dict__
+    assert "GSUB" not in font._save(BytesIO())
+    assert "reader" in lookupList.__dict__
+    lookupList.Lookup[0].LookupFlag ^= 1
+    assert "GSUB" in font._save(BytesIO())
+
+
+def test_save_copyUnchanged_related(fontfile):
+    font = _loadFont(fontfile, copyUnchanged=True)
+    # the tables that are always compiled aren't fingerprinted
+    for tag in ("glyf", "loca", "maxp", "head", "hhea", "hmtx"):
+        assert tag not in font._fingerprints
+    assert "cmap" in font._fingerprints
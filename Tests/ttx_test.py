@@ -0,0 +1,85 @@
+from __future__ import print_function, division, absolute_import
+from fontTools.misc.py23 import *
+from fontTools.ttLib import TTFont, TTLibError
+from fontTools import ttx
+import getopt
+import multiprocessing
+import os
+import pytest
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "subset", "data")
+
+
+@pytest.fixture
+def fontfiles(tmpdir):
+    paths = []
+    for name in ("Lobster.subset", "TestTTF-Regular"):
+        font = TTFont()
+        font.importXML(os.path.join(DATA_DIR, name + ".ttx"))
+        path = str(tmpdir.join(name + ".ttf"))
+        font.save(path)
+        paths.append(path)
+    bad = str(tmpdir.join("bad.ttf"))
+    with open(bad, "wb") as f:
+        f.write(b"\0\1\0\0\0\5garbage")
+    return paths, bad
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1", 1), ("4", 4), ("0", multiprocessing.cpu_count())])
+def test_parseOptions_workers(fontfiles, value, expected):
+    paths, _ = fontfiles
+    jobs, options = ttx.parseOptions(["-j", value, "-f"] + paths)
+    assert options.workers == expected
+    assert len(jobs) == 2
+
+
+@pytest.mark.parametrize("value", ["-1", "many"])
+def test_parseOptions_workers_invalid(fontfiles, value):
+    paths, _ = fontfiles
+    with pytest.raises(getopt.GetoptError):
+        ttx.parseOptions(["-j", value] + paths)
+
+
+def test_processInParallel(fontfiles, tmpdir):
+    paths, bad = fontfiles
+    outdir = tmpdir.mkdir("out")
+    jobs, options = ttx.parseOptions(["-q", "-d", str(outdir), "-j", "2", bad] + paths)
+    errors = ttx.processInParallel(jobs, options, 2)
+    assert [input for input, _ in errors] == [bad]
+
+    jobs, options = ttx.parseOptions(["-q", "-f", "-d", str(tmpdir)] + paths)
+    ttx.process(jobs, options)
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0] + ".ttx"
+        with open(str(outdir.join(name))) as f:
+            result = f.read()
+        with open(str(tmpdir.join(name))) as f:
+            expected = f.read()
+        assert result == expected
+
+
+def test_process_errors(fontfiles, tmpdir):
+    paths, bad = fontfiles
+    jobs, options = ttx.parseOptions(["-q", "-d", str(tmpdir), "-j", "2", bad] + paths)
+    with pytest.raises(TTLibError) as excinfo:
+        ttx.process(jobs, options)
+    assert "1 of 3 files" in str(excinfo.value)
+    for path in paths:
+        assert os.path.getsize(os.path.splitext(path)[0] + ".ttx")
+
+
+def test_ttCompile_workers(tmpdir):
+    font = TTFont()
+    font.importXML(os.path.join(DATA_DIR, "TestGVAR.ttx"))
+    ttxPath = str(tmpdir.join("TestGVAR.ttx"))
+    font.saveXML(ttxPath)
+    outputs = []
+    for workers in ("1", "2"):
+        output = str(tmpdir.join("TestGVAR-%s.ttf" % workers))
+        jobs, options = ttx.parseOptions(["-q", "-j", workers, "-o", output, ttxPath])
+        ttx.process(jobs, options)
+        with open(output, "rb") as f:
+            outputs.append(f.read())
+    assert outputs[0] == outputs[1]
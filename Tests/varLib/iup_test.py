@@ -0,0 +1,67 @@
+from __future__ import print_function, division, absolute_import
+from fontTools.misc.py23 import *
+from fontTools.varLib import iup
+from fontTools.varLib.iup import iupContour, iupDelta
+import random
+import pytest
+
+
+def test_iupContour():
+    coords = [(0, 0), (10, 0), (20, 0), (20, 20), (10, 20), (0, 20)]
+    # the deltas of the points between two touched points are interpolated,
+    # those of the points beyond them are the nearest delta
+    deltas = [(0, 0), None, (10, 4), None, None, (2, 6)]
+    assert iupContour(deltas, coords) == [
+        (0, 0), (5.0, 0), (10, 4), (10, 6), (6.0, 6), (2, 6)]
+    # the reference points have the same coordinate: their delta if they
+    # have the same one, else no delta
+    coords = [(0, 0), (5, 5), (0, 10), (5, 15)]
+    assert iupContour([(3, 1), None, (3, 2), None], coords) == [
+        (3, 1), (3, 1.5), (3, 2), (3, 2)]
+    assert iupContour([(3, 1), None, (4, 2), None], coords) == [
+        (3, 1), (0, 1.5), (4, 2), (0, 2)]
+
+
+def test_iupDelta():
+    coords = [(0, 0), (10, 0), (10, 10), (0, 10), (100, 0), (200, 0)]
+    deltas = [(0, 0), None, (10, 10), None, None, (5, 5)]
+    assert iupDelta(deltas, coords, [3, 4, 5]) == [
+        (0, 0), (10, 0), (10, 10), (0, 10), (0, 0), (5, 5)]
+
+
+def _randomGlyph(rng):
+    ends = []
+    numPoints = 0
+    for _ in range(rng.randint(1, 5)):
+        numPoints += rng.randint(1, 10)
+        ends.append(numPoints - 1)
+    coords = [(rng.randint(-10, 10), rng.randint(-10, 10))
+              for _ in range(numPoints)]
+    variations = []
+    for _ in range(rng.randint(1, 5)):
+        variations.append(
+            [(rng.randint(-20, 20), rng.choice([-3, 0.5, 7]))
+             if rng.random() < .4 else None for _ in range(numPoints)])
+    return coords, ends, variations
+
+
+@pytest.mark.skipif(not iup.haveNumpy, reason="numpy not installed")
+def test_iupDeltaArray():
+    import numpy
+    rng = random.Random(0)
+    for _ in range(500):
+        coords, ends, variations = _randomGlyph(rng)
+        touched = numpy.array([[d is not None for d in deltas]
+                               for deltas in variations])
+        deltas = numpy.array([[(0, 0) if d is None else d for d in deltas]
+                              for deltas in variations], dtype=float)
+        result = iup.iupDeltaArray(
+            deltas, touched, numpy.array(coords, dtype=float), ends)
+        expected = [iupDelta(deltas, coords, ends) for deltas in variations]
+        assert result.tolist() == [[[float(v) for v in p] for p in deltas]
+                                   for deltas in expected]
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(pytest.main(sys.argv))
@@ -1,7 +1,8 @@
 from __future__ import print_function, division, absolute_import
 from fontTools.misc.py23 import *
+from fontTools.varLib import models
 from fontTools.varLib.models import (
-    normalizeLocation, supportScalar, VariationModel)
+    normalizeLocation, piecewiseLinearMap, supportScalar, VariationModel)
 
 
 def test_normalizeLocation():
@@ -28,6 +29,16 @@ def test_normalizeLocation():
     assert normalizeLocation({"wght": 1001}, axes) == {'wght': 0}
 
 
+def test_piecewiseLinearMap():
+    mapping = {-1.0: -1.0, 0: 0, 0.3: 0.5, 1.0: 1.0}
+    assert piecewiseLinearMap(0.3, mapping) == 0.5
+    assert piecewiseLinearMap(0.15, mapping) == 0.25
+    assert piecewiseLinearMap(0.65, mapping) == 0.75
+    assert piecewiseLinearMap(-0.5, mapping) == -0.5
+    assert piecewiseLinearMap(0.5, {}) == 0.5
+    assert piecewiseLinearMap(2, {0: 1, 1: 3}) == 4
+
+
 def test_supportScalar():
     assert supportScalar({}, {}) == 1.0
     assert supportScalar({'wght':.2}, {}) == 1.0
@@ -75,3 +86,24 @@ def test_VariationModel():
          5: 0.6666666666666667,
          6: 0.16666666666666669,
          7: 0.6666666666666667}]
+
+
+def test_VariationModel_getDeltasBatch(monkeypatch):
+    locations = [{}, {'wght': 1}, {'wght': -1}, {'wdth': 1},
+                 {'wght': 1, 'wdth': 1}, {'wght': .5}]
+    model = VariationModel(locations)
+    masterValues = [[100, 200, -50], [150, 330, -60], [40, 120, -50],
+                    [110, 260, 0], [170, 400, 20], [125, 250.5, -55]]
+    expected = [model.getDeltas([values[i] for values in masterValues])
+                for i in range(3)]
+    expected = [list(deltas) for deltas in zip(*expected)]
+    loc = {'wght': .7, 'wdth': .3}
+    assert model.getScalars(loc) is model.getScalars(dict(loc))
+    interpolated = [model.interpolateFromMasters(loc, [v[i] for v in masterValues])
+                    for i in range(3)]
+
+    assert model.getDeltasBatch(masterValues) == expected
+    assert model.interpolateFromMastersBatch(loc, masterValues) == interpolated
+    monkeypatch.setattr(models, "haveNumpy", False)
+    assert model.getDeltasBatch(masterValues) == expected
+    assert model.interpolateFromMastersBatch(loc, masterValues) == interpolated
@@ -0,0 +1,247 @@
+from __future__ import print_function, division, absolute_import
+from __future__ import unicode_literals
+from fontTools.misc.py23 import *
+from fontTools.feaLib.builder import addOpenTypeFeaturesFromString
+from fontTools.ttLib import TTFont
+from fontTools.ttLib.tables._f_v_a_r import NamedInstance
+from fontTools.ttLib.tables._g_l_y_f import GlyphCoordinates
+from fontTools.varLib import build, mutator
+from fontTools.varLib.mutator import (
+    instantiateVariableFont, instantiateVariableFonts)
+import os
+import shutil
+import tempfile
+import unittest
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "subset", "data")
+
+DESIGNSPACE = """<?xml version="1.0"?>
+<designspace format="3">
+    <sources>
+        <source filename="Regular.ttf" name="master_0">
+            <info copy="1"/>
+            <location><dimension name="weight" xvalue="400"/></location>
+        </source>
+        <source filename="Light.ttf" name="master_1">
+            <location><dimension name="weight" xvalue="100"/></location>
+        </source>
+        <source filename="Bold.ttf" name="master_2">
+            <location><dimension name="weight" xvalue="900"/></location>
+        </source>
+    </sources>
+</designspace>
+"""
+
+MASTERS = [("Regular", 400, 1), ("Light", 100, .9), ("Bold", 900, 1.2)]
+
+
+def loadTTX(name):
+    font = TTFont()
+    font.importXML(os.path.join(DATA_DIR, name))
+    buf = BytesIO()
+    font.save(buf)
+    buf.seek(0)
+    return TTFont(buf)
+
+
+class InstantiateVariableFontTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tempdir = tempfile.mkdtemp()
+        cls.masters = {}
+        for name, weight, scale in MASTERS:
+            font = loadTTX("TestTTF-Regular.ttx")
+            glyf = font["glyf"]
+            for glyphName in font.getGlyphOrder():
+                glyph = glyf[glyphName]
+                if glyph.numberOfContours > 0:
+                    glyph.coordinates = GlyphCoordinates(
+                        [(int(x * scale), y + i % 3) for i, (x, y)
+                         in enumerate(glyph.coordinates)])
+            addOpenTypeFeaturesFromString(
+                font, "feature kern { pos A B %d; } kern;" % (-50 * scale))
+            path = os.path.join(cls.tempdir, name + ".ttf")
+            font.save(path)
+            cls.masters[weight] = TTFont(path)
+        designspace = os.path.join(cls.tempdir, "Test.designspace")
+        with open(designspace, "w") as f:
+            f.write(DESIGNSPACE)
+        cls.varfont, _, _ = build(designspace)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tempdir)
+
+    def assertGlyphsEqual(self, font, expected):
+        for glyphName in expected.getGlyphOrder():
+            glyph = font["glyf"][glyphName]
+            expectedGlyph = expected["glyf"][glyphName]
+            if glyph.numberOfContours > 0:
+                self.assertEqual(list(glyph.coordinates),
+                                 list(expectedGlyph.coordinates))
+            self.assertEqual(font["hmtx"][glyphName],
+                             expected["hmtx"][glyphName])
+
+    @staticmethod
+    def getKerning(font):
+        lookup = font["GPOS"].table.LookupList.Lookup[0]
+        return lookup.SubTable[0].PairSet[0].PairValueRecord[0].Value1
+
+    def test_masters(self):
+        for weight, master in self.masters.items():
+            font = instantiateVariableFont(self.varfont, {"wght": weight})
+            self.assertGlyphsEqual(font, master)
+            self.assertEqual(self.getKerning(font).XAdvance,
+                             self.getKerning(master).XAdvance)
+            self.assertIsNone(self.getKerning(font).XAdvDevice)
+            self.assertNotIn("VarStore", vars(font["GDEF"].table))
+            for tag in ("fvar", "gvar", "HVAR"):
+                self.assertNotIn(tag, font)
+            # the instance can be compiled
+            font.save(BytesIO())
+        # the variable font is left unchanged
+        self.assertIn("gvar", self.varfont)
+        self.assertIsNotNone(self.getKerning(self.varfont).XAdvDevice)
+
+    def copyVariableFont(self):
+        buf = BytesIO()
+        self.varfont.save(buf)
+        buf.seek(0)
+        return TTFont(buf)
+
+    def test_inplace(self):
+        varfont = self.copyVariableFont()
+        font = instantiateVariableFont(varfont, {"wght": 650}, inplace=True)
+        self.assertIs(font, varfont)
+        self.assertNotIn("gvar", font)
+        self.assertEqual(self.getKerning(font).XAdvance, -55)
+
+    def saveVariableFont(self):
+        path = os.path.join(self.tempdir, "TestVF-lazy.ttf")
+        if not os.path.exists(path):
+            self.varfont.save(path)
+        return path
+
+    def test_lazy(self):
+        # the copies don't need the reader, which holds the font file
+        path = self.saveVariableFont()
+        expected = instantiateVariableFont(self.varfont, {"wght": 650})
+        for options in ({"lazy": True}, {"mmap": True},
+                        {"lazy": True, "mmap": True}):
+            varfont = TTFont(path, **options)
+            font = instantiateVariableFont(varfont, {"wght": 650})
+            self.assertInstancesEqual(font, expected)
+            self.assertIsNone(font.reader)
+            font.save(BytesIO())
+            self.assertIn("gvar", varfont)
+            varfont.close()
+
+    def test_sparse_deltas(self):
+        varfont = self.copyVariableFont()
+        # only keep the deltas of every other point of the outlines
+        numPoints = len(varfont["glyf"][".notdef"].coordinates)
+        for var in varfont["gvar"].variations[".notdef"]:
+            var.coordinates[1:numPoints:2] = [None] * (numPoints // 2)
+        dense = instantiateVariableFont(self.varfont, {"wght": 250})
+        expected = list(dense["glyf"][".notdef"].coordinates)
+        results = []
+        # the interpolated deltas are the same with numpy, if available
+        for useNumpy in sorted(set([False, mutator.haveNumpy])):
+            mutator.haveNumpy, haveNumpy = useNumpy, mutator.haveNumpy
+            try:
+                font = instantiateVariableFont(varfont, {"wght": 250})
+            finally:
+                mutator.haveNumpy = haveNumpy
+            results.append(list(font["glyf"][".notdef"].coordinates))
+        self.assertEqual(results[0], results[-1])
+        # the points with deltas are where they are in the dense instance,
+        # the others are not
+        self.assertEqual(results[0][::2], expected[::2])
+        self.assertNotEqual(results[0], expected)
+
+    def test_rounding(self):
+        # the deltas are rounded half to even, with and without numpy
+        self.assertEqual(mutator._addGlyphDeltas(2, [[(1, 3), (5, -1)]], [.5]),
+                         [0, 2, 2, 0])
+        results = []
+        for useNumpy in sorted(set([False, mutator.haveNumpy])):
+            mutator.haveNumpy, haveNumpy = useNumpy, mutator.haveNumpy
+            try:
+                font = instantiateVariableFont(self.varfont, {"wght": 650})
+            finally:
+                mutator.haveNumpy = haveNumpy
+            glyf = font["glyf"]
+            results.append([list(glyf[glyphName].coordinates)
+                            for glyphName in font.getGlyphOrder()
+                            if glyf[glyphName].numberOfContours > 0])
+        self.assertEqual(results[0], results[-1])
+
+    def assertInstancesEqual(self, font, expected):
+        self.assertGlyphsEqual(font, expected)
+        self.assertEqual(self.getKerning(font).XAdvance,
+                         self.getKerning(expected).XAdvance)
+        self.assertEqual(sorted(font.keys()), sorted(expected.keys()))
+
+    def test_batch(self):
+        locations = [{"wght": 100}, {"wght": 250}, {"wght": 650}, {}]
+        expected = [instantiateVariableFont(self.varfont, location)
+                    for location in locations]
+        for workers in (None, 2):
+            fonts = list(instantiateVariableFonts(
+                self.varfont, locations, workers=workers))
+            self.assertEqual(len(fonts), len(locations))
+            for font, expectedFont in zip(fonts, expected):
+                self.assertInstancesEqual(font, expectedFont)
+        self.assertIn("gvar", self.varfont)
+        self.assertIsNotNone(self.getKerning(self.varfont).XAdvDevice)
+
+    def test_batch_lazy(self):
+        path = self.saveVariableFont()
+        locations = [{"wght": 100}, {"wght": 650}]
+        expected = [instantiateVariableFont(self.varfont, location)
+                    for location in locations]
+        for options in ({"lazy": True}, {"mmap": True},
+                        {"lazy": True, "mmap": True}):
+            for workers in (None, 2):
+                varfont = TTFont(path, **options)
+                fonts = list(instantiateVariableFonts(
+                    varfont, locations, workers=workers))
+                for font, expectedFont in zip(fonts, expected):
+                    self.assertInstancesEqual(font, expectedFont)
+                    font.save(BytesIO())
+                varfont.close()
+
+    def test_main(self):
+        varfont = self.copyVariableFont()
+        name = varfont["name"].addName("Semi Light")
+        instance = NamedInstance()
+        instance.subfamilyNameID = name
+        instance.coordinates = {"wght": 250}
+        varfont["fvar"].instances.append(instance)
+        path = os.path.join(self.tempdir, "TestVF.ttf")
+        varfont.save(path)
+        outputDir = os.path.join(self.tempdir, "instances")
+        os.mkdir(outputDir)
+        mutator.main([path, "-l", "wght=650", "--named-instances",
+                      "-d", outputDir, "-j", "2"])
+        self.assertEqual(sorted(os.listdir(outputDir)),
+                         ["TestVF-SemiLight.ttf", "TestVF-wght650.ttf"])
+        for filename, weight in [("TestVF-SemiLight.ttf", 250),
+                                 ("TestVF-wght650.ttf", 650)]:
+            self.assertInstancesEqual(
+                TTFont(os.path.join(outputDir, filename)),
+                instantiateVariableFont(self.varfont, {"wght": weight}))
+
+    def test_avar(self):
+        varfont = loadTTX("TestGVAR.ttx")
+        for weight, width in [(100, 600), (400, 700), (550, 750), (900, 800)]:
+            font = instantiateVariableFont(varfont, {"wght": weight})
+            self.assertEqual(font["hmtx"]["space"], (width, 0))
+            self.assertNotIn("avar", font)
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(unittest.main())
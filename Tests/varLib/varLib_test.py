@@ -0,0 +1,77 @@
+from __future__ import print_function, division, absolute_import
+from __future__ import unicode_literals
+from fontTools.misc.py23 import *
+from fontTools.ttLib import TTFont
+from fontTools.ttLib.tables._g_l_y_f import GlyphCoordinates
+from fontTools.varLib import build
+import os
+import shutil
+import tempfile
+import unittest
+
+
+TTX = os.path.join(os.path.dirname(__file__), os.pardir, "subset", "data",
+                   "TestTTF-Regular.ttx")
+
+DESIGNSPACE = """<?xml version="1.0"?>
+<designspace format="3">
+    <sources>
+        <source filename="Regular.ttf" name="master_0">
+            <info copy="1"/>
+            <location><dimension name="weight" xvalue="400"/></location>
+        </source>
+        <source filename="Light.ttf" name="master_1">
+            <location><dimension name="weight" xvalue="100"/></location>
+        </source>
+        <source filename="Bold.ttf" name="master_2">
+            <location><dimension name="weight" xvalue="900"/></location>
+        </source>
+        <source filename="SemiBold.ttf" name="master_3">
+            <location><dimension name="weight" xvalue="600"/></location>
+        </source>
+    </sources>
+</designspace>
+"""
+
+
+class BuildTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tempdir = tempfile.mkdtemp()
+        for name, scale in [("Regular", 1), ("Light", .9), ("Bold", 1.2),
+                            ("SemiBold", 1.05)]:
+            font = TTFont()
+            font.importXML(TTX)
+            glyf = font["glyf"]
+            for glyphName in font.getGlyphOrder():
+                glyph = glyf[glyphName]
+                if glyph.numberOfContours > 0:
+                    glyph.coordinates = GlyphCoordinates(
+                        [(int(x * scale), y + i % 3) for i, (x, y)
+                         in enumerate(glyph.coordinates)])
+            font.save(os.path.join(cls.tempdir, name + ".ttf"))
+        cls.designspace = os.path.join(cls.tempdir, "Test.designspace")
+        with open(cls.designspace, "w") as f:
+            f.write(DESIGNSPACE)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tempdir)
+
+    def test_build_workers(self):
+        font, _, _ = build(self.designspace)
+        variations = font["gvar"].variations
+        self.assertEqual(len(variations["A"]), 3)
+        self.assertTrue(any(var.hasImpact() for var in variations["A"]))
+        for workers in (2, 3):
+            parallel, _, _ = build(self.designspace, workers=workers)
+            self.assertEqual(parallel["gvar"].variations, variations)
+            for tag in ("gvar", "HVAR"):
+                self.assertEqual(parallel.getTableData(tag),
+                                 font.getTableData(tag))
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(unittest.main())